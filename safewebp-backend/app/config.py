@@ -1,4 +1,5 @@
 # app/config.py
+import os
 from pydantic_settings import BaseSettings
 from pathlib import Path
 
@@ -6,8 +7,52 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     PROJECT_NAME: str = "SafeWebp API"
     UPLOAD_DIR: Path = Path("static/uploads")
+    UPLOAD_TTL: float = 24 * 3600.0  # Çıktıların UPLOAD_DIR'de saklanma süresi (saniye)
+    UPLOAD_MAX_BYTES: int = 2 * 1024 * 1024 * 1024  # UPLOAD_DIR disk kotası, aşılınca en eski çıktılar silinir
+    UPLOAD_SWEEP_INTERVAL: float = 60.0  # UPLOAD_DIR temizlik aralığı (saniye)
+    OUTPUT_CACHE_MAX_AGE: int = 365 * 24 * 3600  # İçerik özetli çıktıların tarayıcı/CDN önbellek süresi
     MAX_UPLOAD_SIZE: int = 50 * 1024 * 1024  # 50MB
+    SPOOL_MAX_MEMORY: int = 8 * 1024 * 1024  # Bu boyutun altındaki yüklemeler bellekte işlenir
+    MAX_IMAGE_PIXELS: int = 150_000_000  # Bu piksel sayısının üstü sıkıştırma bombası sayılır
+    MEMORY_BUDGET: int = 2 * 1024 * 1024 * 1024  # Eşzamanlı dönüşümlerin tahmini bellek bütçesi (uvicorn işçisi başına)
+    ADMISSION_TIMEOUT: float = 30.0  # Bütçede yer beklemenin en uzun süresi, sonra 503
     ALLOWED_EXTENSIONS: set = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic"}
+    CONVERSION_WORKERS: int = os.cpu_count() or 1  # Dönüşüm süreç havuzu boyutu
+    MAX_CONCURRENT_CONVERSIONS: int = 2 * (os.cpu_count() or 1)  # Global eşzamanlı dönüşüm sınırı
+    BATCH_MAX_CONCURRENCY: int = os.cpu_count() or 1  # Batch başına eşzamanlı dönüşüm sınırı
+    TILED_MIN_PIXELS: int = 16_000_000  # Bu boyutun üstündeki görüntüler şeritler halinde işlenir
+    TILE_PIXELS: int = 2_000_000  # Şerit başına kaynak piksel sayısı (yükseklik genişliğe göre hesaplanır)
+    ML_FEATURE_MAX_EDGE: int = 1024  # Özellik çıkarımı için en uzun kenar (0: tam çözünürlük)
+    ML_TRAIN_MIN_SAMPLES: int = 10  # Yeniden eğitimi tetikleyen yeni örnek sayısı
+    ML_TRAIN_INTERVAL: float = 300.0  # Bekleyen örnekler için en uzun eğitim aralığı (saniye)
+    ML_TRAIN_QUEUE_SIZE: int = 1000  # Eğitim kuyruğu kapasitesi
+    ML_TRAIN_WINDOW: int = 5000  # Modelin eğitildiği en son örnek sayısı
+    ML_TRAIN_LEASE: float = 600.0  # Eğitim kilidinin en uzun süresi (saniye)
+    QUALITY_SEARCH_PROXY_EDGE: int = 1024  # Kalite aramasında deneme kodlamaları için en uzun kenar
+    QUALITY_SEARCH_MAX_ENCODES: int = 8  # Kalite aramasında en fazla tam çözünürlüklü kodlama
+    PASSTHROUGH_MAX_BYTES: int = 1024  # Bundan küçük dosyalar dönüştürülmeden döndürülür (kapsayıcı yükü kazancı aşar)
+    VARIANT_ENCODE_THREADS: int = 4  # Varyantları paralel kodlayan iş parçacığı sayısı
+    LOSSLESS_CANDIDATE_METHOD: int = 4  # Kayıpsız aday için libwebp yöntemi (0-6)
+    LOSSLESS_CANDIDATE_EFFORT: int = 75  # Kayıpsız adayda sıkıştırma çabası (quality, 0-100)
+    LOSSLESS_SAMPLE_FRACTION: float = 0.125  # Kayıpsız boyut tahmini için örneklenen satır oranı
+    LOSSLESS_ABORT_MARGIN: float = 1.5  # Tahmin en iyi boyutu bu katsayıyla aşarsa kayıpsız aday bırakılır
+    ANIMATION_KEYFRAME_MAX: int = 0  # Animasyonda anahtar kareler arası en fazla kare (0: yalnızca ilk kare, en küçük çıktı)
+    WS_MAX_PENDING: int = 16  # Bağlantı başına bekleyen (birleştirilmiş) iş güncellemesi
+    PROGRESS_RETAINED_JOBS: int = 1000  # Son durumu saklanan iş sayısı
+    CACHE_ENABLED: bool = True  # Dönüşüm önbelleği (False: her istek yeniden dönüştürülür)
+    CACHE_DIR: Path = Path("cache/conversions")  # İçerik adresli dönüşüm önbelleği
+    CACHE_MAX_BYTES: int = 1024 * 1024 * 1024  # 1GB
+    CACHE_SCAN_INTERVAL: float = 60.0  # Önbellek klasörünün kota için yeniden taranma aralığı (saniye)
+    PERCEPTUAL_CACHE_ENTRIES: int = 4096  # İşçi başına yakın kopya parametre indeksi (0: kapalı)
+    PERCEPTUAL_CACHE_MAX_DISTANCE: int = 6  # Eşleşme için en fazla farklı özet biti (64 bitten)
+    PERCEPTUAL_CACHE_SIZE_TOLERANCE: float = 0.25  # Eşleşen görüntülerin piksel sayısı farkı (oran)
+    ML_TRAINING_DB: Path = Path("models/training_samples.sqlite3")  # İşçiler arası ortak örnek deposu
+    JOBS_DIR: Path = Path("jobs")  # Kuyruktaki işlerin girdi/çıktıları (UPLOAD_DIR temizliğinden etkilenmez)
+    JOBS_DB: Path = Path("jobs/jobs.sqlite3")  # Kalıcı iş kuyruğu
+    JOB_WORKERS: int = os.cpu_count() or 1  # Kuyruğu boşaltan işçi sayısı
+    JOB_LEASE: float = 60.0  # Dosya kilidinin süresi; çöken işçinin dosyası bu sürede yeniden alınır
+    JOB_MAX_ATTEMPTS: int = 3  # Bir dosya için en fazla dönüşüm denemesi
+    JOB_RETENTION: float = 24 * 3600.0  # Biten işlerin saklanma süresi (saniye)
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,187 @@
+import asyncio
+import collections
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from PIL import Image
+
+from ..config import settings
+from ..schemas.image import ConversionSettings
+from ..utils.file_handler import FileHandler, SpooledUpload
+from .image_processor import ImageProcessor
+
+# Piksel başına tahmini bayt (Pillow RGB/RGBA görüntüleri 4 bayt/piksel tutar)
+DECODED_BYTES_PER_PIXEL = 4
+# libheif'in tam boyutlu RGB çözme tamponu; Pillow'a kopyalanırken ikisi
+# birlikte bellektedir (RGBA'da tampon paylaşılır, tahmin üst sınırdır)
+HEIF_BUFFER_BYTES_PER_PIXEL = 3
+# Özellik çıkarımı için çözülen görüntünün salt okunur RGB dışa aktarımı (3)
+# + RGB olmayan modlar için pay; şeritli yolda (TILED_MIN_PIXELS üstü)
+# yalnızca şerit boyutunda ayrılır
+ANALYSIS_BYTES_PER_PIXEL = 4
+# Çalışma boyutundaki kopyalar: boyutlandırma ve renk modu çıktıları (4 + 4)
+# + libwebp ARGB/YUV tamponları (~6)
+WORKING_BYTES_PER_PIXEL = 14
+# Şeritli yolda bir şeridin analiz tamponları (BGR, Canny, HSV, float64 Laplacian)
+STRIP_BYTES_PER_PIXEL = 40
+# Kalite aramasında proxy üzerindeki SSIM için float32 ara diziler
+SSIM_BYTES_PER_PIXEL = 64
+# Varyant görüntüsü (4) + kodlayıcı tamponları (~6)
+VARIANT_BYTES_PER_PIXEL = 10
+# Animasyonda önceki kaynak kare ve çıktı tuvali (4 + 4) + libwebp animasyon
+# kodlayıcısının önceki/aday tuvalleri (~12)
+ANIMATION_BYTES_PER_PIXEL = 20
+# Karışık modda (compare_lossless) her kare için ikinci aday kodlamanın tamponları
+ANIMATION_MIXED_BYTES_PER_PIXEL = 16
+
+class MemoryBudget:
+    """Dönüşümleri tahmini bellek ihtiyacına göre global bir bütçeye kabul eder
+
+    İhtiyaç piksel çözülmeden başlıktaki boyuttan hesaplanır. Bütçede yer
+    yoksa istek sırasını bekler (FIFO, büyük işler aç kalmaz); tek başına
+    bütçeyi aşan veya piksel sınırını geçen görüntüler hemen reddedilir.
+    """
+
+    def __init__(self, budget_bytes: Optional[int] = None, max_pixels: Optional[int] = None):
+        self.budget_bytes = budget_bytes or settings.MEMORY_BUDGET
+        self.max_pixels = max_pixels or settings.MAX_IMAGE_PIXELS
+        self.image_processor = ImageProcessor()
+        self.in_use = 0
+        self._waiters: collections.deque = collections.deque()
+        self.rejected = 0
+        self.timeouts = 0
+
+    def estimate(
+        self,
+        source_size: Tuple[int, int],
+        image_format: str,
+        conversion_settings: ConversionSettings,
+        animated: bool = False,
+    ) -> int:
+        """Dönüşümün en yüksek bellek kullanımını (bayt) kabaca tahmin et"""
+        source_pixels = source_size[0] * source_size[1]
+        known_quality = None if conversion_settings.smart_optimize else conversion_settings.quality
+        work_size = self.image_processor.get_target_size(source_size, known_quality)
+        work_pixels = work_size[0] * work_size[1]
+
+        if image_format == "JPEG":
+            # draft() en fazla 2 kat büyük (4 kat piksel) ölçekte çözer
+            decoded_pixels = min(source_pixels, 4 * work_pixels)
+        else:
+            # HEIC ve diğer formatlar tam boyutta çözülür
+            decoded_pixels = source_pixels
+        estimate = decoded_pixels * DECODED_BYTES_PER_PIXEL + work_pixels * WORKING_BYTES_PER_PIXEL
+        if image_format == "HEIF":
+            # libheif ölçekli çözmez; küçültme tam çözümden sonra yapılır
+            estimate += source_pixels * HEIF_BUFFER_BYTES_PER_PIXEL
+        if decoded_pixels >= settings.TILED_MIN_PIXELS:
+            estimate += min(decoded_pixels, settings.TILE_PIXELS) * STRIP_BYTES_PER_PIXEL
+        else:
+            estimate += decoded_pixels * ANALYSIS_BYTES_PER_PIXEL
+
+        if conversion_settings.target_size or conversion_settings.target_ssim:
+            proxy_edge = settings.QUALITY_SEARCH_PROXY_EDGE
+            estimate += min(work_pixels, proxy_edge * proxy_edge) * SSIM_BYTES_PER_PIXEL
+
+        if conversion_settings.variants:
+            width, height = work_size
+            for variant_width in set(conversion_settings.variants):
+                if variant_width < width:
+                    variant_height = max(1, round(height * variant_width / width))
+                    estimate += variant_width * variant_height * VARIANT_BYTES_PER_PIXEL
+        if animated:
+            # Kareler tek tek kodlanır, ihtiyaç kare sayısına bağlı değildir
+            estimate += work_pixels * ANIMATION_BYTES_PER_PIXEL
+            if conversion_settings.compare_lossless:
+                estimate += work_pixels * ANIMATION_MIXED_BYTES_PER_PIXEL
+        return estimate
+
+    def inspect(self, upload: SpooledUpload, conversion_settings: ConversionSettings) -> int:
+        """Başlığı oku, bombaları ve bütçeyi aşanları reddet, tahmini döndür
+
+        Dosya okuduğu için iş parçacığı havuzunda çağrılır.
+        """
+        try:
+            source_size, _, image_format = FileHandler.read_image_header(upload)
+        except Image.DecompressionBombError:
+            self.rejected += 1
+            raise HTTPException(status_code=413, detail="Görüntü piksel sınırını aşıyor")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        if source_size[0] * source_size[1] > self.max_pixels:
+            # Sıkıştırma bombası: hiçbir piksel ayrılmadan reddet
+            self.rejected += 1
+            raise HTTPException(status_code=413, detail="Görüntü piksel sınırını aşıyor")
+
+        # GIF'in ikinci karesini bulmak ilk karenin verisini okumayı gerektirir,
+        # kabul adımı ucuz kalsın diye animasyonlu varsayılır. WebP'de
+        # animasyon bayrağı başlıktan okunur.
+        animated = image_format == "GIF"
+        if image_format == "WEBP":
+            info = FileHandler.read_webp_info(upload)
+            animated = info is not None and info["animated"]
+        estimate = self.estimate(source_size, image_format, conversion_settings, animated)
+        if estimate > self.budget_bytes:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=413, detail="Görüntüyü işlemek için gereken bellek bütçeyi aşıyor"
+            )
+        return estimate
+
+    def _wake_next(self):
+        # Sıradaki bekleyen sığıyorsa uyandır; sıra korunur
+        while self._waiters:
+            nbytes, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if self.in_use + nbytes > self.budget_bytes:
+                return
+            self._waiters.popleft()
+            self.in_use += nbytes
+            future.set_result(None)
+
+    async def acquire(self, nbytes: int, timeout: Optional[float] = None):
+        """Bütçeden yer ayır; timeout dolarsa 503 (None: süresiz bekle)"""
+        if not self._waiters and self.in_use + nbytes <= self.budget_bytes:
+            self.in_use += nbytes
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((nbytes, future))
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # Süre dolarken yer ayrıldı
+                return
+            future.cancel()
+            self._wake_next()
+            self.timeouts += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Sunucu bellek bütçesi dolu, lütfen tekrar deneyin",
+                headers={"Retry-After": "5"},
+            )
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Yer ayrılmıştı ama istek iptal edildi
+                self.release(nbytes)
+            else:
+                future.cancel()
+                self._wake_next()
+            raise
+
+    def release(self, nbytes: int):
+        self.in_use -= nbytes
+        self._wake_next()
+
+    def stats(self) -> dict:
+        return {
+            "budget_bytes": self.budget_bytes,
+            "in_use_bytes": self.in_use,
+            "waiting": sum(not future.done() for _, future in self._waiters),
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
@@ -0,0 +1,170 @@
+import io
+import math
+from typing import Iterator, List, Optional, Tuple
+
+from PIL import Image, ImageChops, ImageSequence
+
+from ..config import settings
+from .image_processor import LANCZOS_SUPPORT
+
+# Animasyonlu olabilen giriş biçimleri
+ANIMATED_FORMATS = {"GIF", "WEBP"}
+
+class _CanvasSequence(Image.Image):
+    """save_all'a kareleri tek tek veren çok kareli görüntü
+
+    Pillow çok kareli görüntüleri n_frames ve seek ile sırayla okur; her
+    seek bir sonraki tuvali üretir, kodlanan kareler bir listede birikmez.
+    Tuval yerinde güncellendiğinden kare verisi kopyalanmaz.
+    """
+
+    def __init__(self, canvases: Iterator[Image.Image], n_frames: int, mode: str, size: Tuple[int, int]):
+        super().__init__()
+        self._canvases = canvases
+        self._frame = -1
+        self.n_frames = n_frames
+        self.is_animated = n_frames > 1
+        self._mode = mode
+        self._size = size
+        self.seek(0)
+
+    def tell(self) -> int:
+        return self._frame
+
+    def seek(self, frame: int):
+        if frame < self._frame:
+            # save_all kodlamadan sonra başa döner; kareler yeniden üretilmez
+            return
+        while self._frame < frame:
+            self.im = next(self._canvases).im
+            self._frame += 1
+
+class AnimationEncoder:
+    """Animasyonlu GIF/WebP'yi kare kare okuyup animasyonlu WebP'ye kodlar
+
+    Kareler iki kez sırayla çözülür: ilk geçişte her karenin önceki kareye
+    göre kirli dikdörtgeni ve süresi bulunur, ikincisinde kareler
+    kodlayıcıya tek tek verilir. Bellekte kare sayısından bağımsız olarak
+    en fazla iki kaynak kare ve tek çıktı tuvali tutulur. Önceki kareyle
+    aynı olan kareler atlanır (süresi öncekine eklenir). Değişen karelerde
+    yalnızca kirli dikdörtgen boyutlandırılıp tuvale yapıştırılır; libwebp
+    de karelerin yalnızca değişen alt dikdörtgenini yazar.
+    """
+
+    def __init__(
+        self,
+        image_processor,
+        work_size: Tuple[int, int],
+        webp_params: dict,
+        allow_mixed: bool = False,
+    ):
+        self.image_processor = image_processor
+        self.work_size = work_size
+        self.webp_params = webp_params
+        # Kare başına kayıplı ve kayıpsız kodlama denenir, küçük olan kullanılır
+        self.allow_mixed = allow_mixed
+        self.keyframe_max = settings.ANIMATION_KEYFRAME_MAX
+
+    @staticmethod
+    def available() -> bool:
+        """Pillow'un animasyonlu WebP yazıp yazamadığı (libwebp animasyon desteği)"""
+        Image.init()
+        return "WEBP" in Image.SAVE_ALL
+
+    def _output_window(self, box, source_size):
+        """Kaynaktaki kirli dikdörtgenden etkilenen çıktı bölgesi (filtre yarıçapı dahil)"""
+        left, top, right, bottom = box
+        out_width, out_height = self.work_size
+        scale_x = source_size[0] / out_width
+        scale_y = source_size[1] / out_height
+        support_x = LANCZOS_SUPPORT * max(scale_x, 1.0)
+        support_y = LANCZOS_SUPPORT * max(scale_y, 1.0)
+        return (
+            max(0, math.floor((left - support_x) / scale_x) - 1),
+            max(0, math.floor((top - support_y) / scale_y) - 1),
+            min(out_width, math.ceil((right + support_x) / scale_x) + 1),
+            min(out_height, math.ceil((bottom + support_y) / scale_y) + 1),
+        )
+
+    @staticmethod
+    def _plan(image: Image.Image, mode: str) -> Tuple[List[Optional[tuple]], List[float]]:
+        """Kaynak karelerin kirli dikdörtgenleri (aynıysa None) ve kodlanacak karelerin süreleri"""
+        boxes = []
+        durations = []
+        previous = None
+        for frame in ImageSequence.Iterator(image):
+            # convert kopya üretir; Pillow sonraki karede aynı tamponu yeniden kullanır
+            current = frame.convert(mode)
+            # WebP karelerinin süresi kare çözüldükten sonra okunabilir
+            duration = frame.info.get("duration") or 0
+            if previous is None:
+                box = (0, 0) + current.size
+            else:
+                box = ImageChops.difference(previous, current).getbbox(alpha_only=False)
+            if box is None:
+                # Aynı kare kodlanmaz; süresi önceki kareye eklenir
+                durations[-1] += duration
+            else:
+                durations.append(duration)
+            boxes.append(box)
+            previous = current
+        return boxes, durations
+
+    def _canvases(self, image: Image.Image, mode: str, boxes: List[Optional[tuple]]) -> Iterator[Image.Image]:
+        """Değişen her kare için güncellenen çıktı tuvalini üret (her seferinde aynı nesne)"""
+        resize = self.work_size != image.size
+        canvas = Image.new(mode, self.work_size)
+        for frame, box in zip(ImageSequence.Iterator(image), boxes):
+            if box is None:
+                continue
+            current = frame.convert(mode)
+            if resize:
+                window = self._output_window(box, current.size)
+                region = self.image_processor.resize_window(current, self.work_size, window)
+            else:
+                window = box
+                region = current.crop(box)
+            region = self.image_processor.optimize_color_mode(region)
+            canvas.paste(region, window[:2])
+            yield canvas
+
+    def encode(self, image: Image.Image, metadata: Optional[dict] = None) -> dict:
+        """Tüm kareleri kodla
+
+        metadata verilirse icc_profile/exif/xmp çıktıya yazılır.
+        Dönüş: {data, source_frames, encoded_frames}
+        """
+        metadata = metadata or {}
+        mode = 'RGBA' if image.has_transparency_data else 'RGB'
+        boxes, durations = self._plan(image, mode)
+
+        lossless = bool(self.webp_params.get("lossless")) and not self.allow_mixed
+        save_params = {
+            "lossless": lossless,
+            "quality": self.webp_params.get("quality", 80),
+            "method": self.webp_params.get("method", 4),
+            # Arka plan: saydam siyah
+            "background": (0, 0, 0, 0),
+            # NETSCAPE uzantısı olmayan GIF bir kez oynatılır
+            "loop": image.info.get("loop", 1),
+            # minimize_size: karışık modda her kare için iki kodlama da denenir
+            "minimize_size": self.allow_mixed,
+            "allow_mixed": self.allow_mixed,
+            # Ara anahtar kareler ileri sarmayı hızlandırır ama boyutu katlar
+            "kmin": self.keyframe_max // 2,
+            "kmax": self.keyframe_max,
+        }
+        for key in ("icc_profile", "exif", "xmp"):
+            if metadata.get(key):
+                save_params[key] = metadata[key]
+
+        sequence = _CanvasSequence(
+            self._canvases(image, mode, boxes), len(durations), mode, self.work_size
+        )
+        buffer = io.BytesIO()
+        sequence.save(buffer, "WEBP", save_all=True, duration=durations, **save_params)
+        return {
+            "data": buffer.getvalue(),
+            "source_frames": len(boxes),
+            "encoded_frames": len(durations),
+        }
@@ -0,0 +1,136 @@
+import io
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from PIL import Image
+
+from ..config import settings
+
+# Kayıpsız tahmin için görüntünün farklı yüksekliklerinden alınan şerit sayısı
+SAMPLE_BANDS = 8
+# Bundan kısa şeritlerle tahmin güvenilmez, doğrudan tam kodlama yapılır
+MIN_BAND_ROWS = 16
+
+class CandidateEncoder:
+    """Kayıplı ve kayıpsız WebP adaylarını paralel kodlar, hedefi tutan en küçüğünü seçer
+
+    Kayıplı aday verilen fonksiyonla (tek kodlama veya kalite araması)
+    üretilir. Kayıpsız aday önce tam çözünürlükteki yatay şeritlerden
+    örneklenerek tahmin edilir; tahmin o ana kadarki en iyi boyutu
+    abort_margin katından fazla aşıyorsa tam kodlamaya hiç başlanmaz.
+    Pillow'un tek seferlik kodlayıcısı yarıda kesilemediğinden vazgeçme bu
+    adım sınırında yapılır.
+    """
+
+    def __init__(self, image: Image.Image, webp_params: dict, abort_margin: Optional[float] = None):
+        self.image = image
+        self.lossy_params = {**webp_params, "lossless": False}
+        self.lossless_params = {
+            **webp_params,
+            "lossless": True,
+            # Kayıpsız kodlamada quality sıkıştırma çabasıdır
+            "quality": settings.LOSSLESS_CANDIDATE_EFFORT,
+            "method": settings.LOSSLESS_CANDIDATE_METHOD,
+        }
+        self.abort_margin = abort_margin or settings.LOSSLESS_ABORT_MARGIN
+        self.encode_count = 0
+        self._count_lock = threading.Lock()
+
+    def _encode(self, image: Image.Image, params: dict) -> bytes:
+        buffer = io.BytesIO()
+        image.save(buffer, "webp", **params)
+        with self._count_lock:
+            self.encode_count += 1
+        return buffer.getvalue()
+
+    @staticmethod
+    def _sample(image: Image.Image):
+        """Görüntüye yayılmış şeritleri tek görüntüde birleştir, (örnek, ölçek) döndür"""
+        width, height = image.size
+        band_rows = int(height * settings.LOSSLESS_SAMPLE_FRACTION / SAMPLE_BANDS)
+        if band_rows < MIN_BAND_ROWS:
+            return None, 1.0
+        sample = Image.new(image.mode, (width, band_rows * SAMPLE_BANDS))
+        for band in range(SAMPLE_BANDS):
+            top = (height - band_rows) * band // (SAMPLE_BANDS - 1)
+            sample.paste(image.crop((0, top, width, top + band_rows)), (0, band * band_rows))
+        return sample, height / sample.size[1]
+
+    def _encode_lossless(
+        self,
+        image: Image.Image,
+        lossy: Future,
+        size_limit: Optional[int],
+        meets_target: Callable[[str, bytes], Optional[bool]],
+    ) -> Optional[bytes]:
+        """Kayıpsız adayı kodla; kazanamayacağı tahmin edilirse None döndür"""
+        sample, scale = self._sample(image)
+        if sample is not None:
+            estimate = len(self._encode(sample, self.lossless_params)) * scale
+            if lossy.done() and lossy.exception() is None:
+                best = len(lossy.result())
+            else:
+                # Kayıplı sonuç henüz yok, aynı örnekten tahmin et
+                best = len(self._encode(sample, self.lossy_params)) * scale
+            if size_limit is not None:
+                best = min(best, size_limit)
+            # Hedefi tutmayan kayıplı adayı boyutu ne olursa olsun kayıpsız geçer;
+            # vazgeçmeden önce kayıplı sonucun hedefi tuttuğu görülmeli
+            if (
+                estimate > best * self.abort_margin
+                and meets_target("lossy", lossy.result()) is not False
+            ):
+                return None
+        return self._encode(image, self.lossless_params)
+
+    def run(
+        self,
+        encode_lossy: Callable[[], bytes],
+        size_limit: Optional[int] = None,
+        meets_target: Optional[Callable[[str, bytes], Optional[bool]]] = None,
+    ) -> dict:
+        """İki adayı paralel kodla; hedefi tutanlar önce, sonra küçük olan kazanır
+
+        meets_target(aday, veri) adayın hedefi (boyut ya da SSIM) tutup
+        tutmadığını döndürür; None hedef yok demektir. size_limit (bayt
+        bütçesi) verilirse tahmini bu sınırı aşan kayıpsız aday da bırakılır.
+        encode_lossy self.image'i kullanabilir; kayıpsız kodlama kendi
+        kopyasıyla yapılır. Dönüş: {candidate, data, webp_params, sizes,
+        target_met, aborted}
+        """
+        meets_target = meets_target or (lambda candidate, data: None)
+        # Image.save parametreleri görüntünün üstüne (encoderinfo) yazar; aynı
+        # nesne iki iş parçacığında kaydedilirse biri diğerinin ayarlarını alır
+        lossless_image = self.image.copy()
+        # Pillow, WebPEncode sırasında GIL'i bırakır; iki kodlama gerçekten paralel çalışır
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            lossy_future = pool.submit(encode_lossy)
+            lossless_future = pool.submit(
+                self._encode_lossless, lossless_image, lossy_future, size_limit, meets_target
+            )
+            lossy = lossy_future.result()
+            lossless = lossless_future.result()
+
+        sizes = {"lossy": len(lossy), "lossless": None if lossless is None else len(lossless)}
+        lossy_met = meets_target("lossy", lossy)
+        if lossless is not None:
+            lossless_met = meets_target("lossless", lossless)
+            # Hedefi tutmayan aday ancak diğeri de tutmuyorsa boyutla yarışır
+            if (lossless_met is False, len(lossless)) < (lossy_met is False, len(lossy)):
+                return {
+                    "candidate": "lossless",
+                    "data": lossless,
+                    "webp_params": self.lossless_params,
+                    "sizes": sizes,
+                    "target_met": lossless_met,
+                    "aborted": False,
+                }
+        return {
+            "candidate": "lossy",
+            "data": lossy,
+            "webp_params": self.lossy_params,
+            "sizes": sizes,
+            "target_met": lossy_met,
+            "aborted": lossless is None,
+        }
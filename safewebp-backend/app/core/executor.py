@@ -0,0 +1,91 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+import cv2
+from fastapi import HTTPException
+
+from ..config import settings
+from .pipeline import ConversionPipeline
+
+# Her işçi sürecinde bir kez oluşturulan, sıcak tutulan pipeline
+_pipeline: Optional[ConversionPipeline] = None
+
+def _init_worker():
+    """İşçi süreci başlangıcında modelleri ve işlemcileri yükle"""
+    global _pipeline
+    # Süreçler zaten çekirdekleri paylaşıyor, OpenCV iş parçacıkları çakışmasın
+    cv2.setNumThreads(1)
+    _pipeline = ConversionPipeline()
+
+def _warmup() -> bool:
+    """İşçinin ayağa kalkmasını beklemek için boş iş"""
+    return _pipeline is not None
+
+def _run_job(method: str, *args):
+    """Pipeline metodunu işçi sürecinde çalıştır"""
+    return getattr(_pipeline, method)(*args)
+
+class ConversionExecutor:
+    """CPU yoğun dönüşüm işlerini olay döngüsü dışında süreç havuzunda çalıştırır"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or settings.CONVERSION_WORKERS
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> ProcessPoolExecutor:
+        """Süreç havuzunu oluştur (zaten varsa mevcut olanı döndür)"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                # fork, olay döngüsü ve iş parçacıkları çalışırken güvenli değil
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return self._pool
+
+    async def warmup(self):
+        """Tüm işçileri önceden başlat ki ilk istek bekleme yapmasın"""
+        pool = self.start()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(pool, _warmup) for _ in range(self.max_workers))
+        )
+
+    async def run(self, method: str, *args):
+        """ConversionPipeline metodunu havuzda çalıştır ve sonucunu bekle
+
+        Bir işçi beklenmedik şekilde ölürse (ör. OOM) havuz kalıcı olarak
+        bozulur; yenisi kurulur ve yalnızca etkilenen istekler 503 alır.
+        """
+        pool = self.start()
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(pool, _run_job, method, *args)
+        except BrokenProcessPool:
+            await self._replace(pool)
+            raise HTTPException(
+                status_code=503,
+                detail="Dönüşüm işçisi beklenmedik şekilde sonlandı, tekrar deneyin",
+                headers={"Retry-After": "5"},
+            )
+
+    async def _replace(self, broken: ProcessPoolExecutor):
+        """Bozulan havuzu kapatıp yenisini başlat (aynı havuz için bir kez)"""
+        if self._pool is not broken:
+            # Aynı havuzda bekleyen başka bir istek yenisini zaten kurdu
+            return
+        self._pool = None
+        broken.shutdown(wait=False, cancel_futures=True)
+        try:
+            await self.warmup()
+        except Exception as e:
+            print(f"Error in ConversionExecutor warmup: {str(e)}")
+
+    def shutdown(self):
+        """Havuzu kapat"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
@@ -1,6 +1,15 @@
-from PIL import Image, ImageEnhance
 import math
 
+from PIL import Image, ImageEnhance
+import numpy as np
+
+from ..config import settings
+
+# Kenar yoğunluğu hesaplanırken aynı anda işlenen satır sayısı (bellek sınırı)
+EDGE_DENSITY_ROW_CHUNK = 1024
+# Pillow'un LANCZOS filtresinin yarıçapı (piksel)
+LANCZOS_SUPPORT = 3.0
+
 class ImageProcessor:
     def analyze_image(self, image):
         """Görüntü analizi yaparak optimal ayarları belirle"""
@@ -8,14 +17,13 @@ class ImageProcessor:
         total_pixels = width * height
         
         # Renk analizi
+        color_count = None
         try:
-            if image.mode == 'P':
-                color_count = len(image.getcolors(maxcolors=256))
-            else:
-                converted = image.convert('P', palette=Image.Palette.ADAPTIVE, colors=256)
-                color_count = len(converted.getcolors(maxcolors=256))
+            # getcolors 256 rengi aşınca erken çıkar, palet nicemlemesine gerek yok
+            colors = image.getcolors(maxcolors=256)
+            color_count = len(colors) if colors is not None else 256
             
-            is_photo = color_count is None or color_count > 192
+            is_photo = color_count > 192
         except:
             is_photo = True
         
@@ -33,9 +41,13 @@ class ImageProcessor:
             'color_complexity': color_count if isinstance(color_count, int) else 256
         }
 
-    def optimize_image_size(self, image, quality):
-        """Görüntü boyutunu optimize et"""
-        width, height = image.size
+    def get_target_size(self, size, quality=None):
+        """optimize_image_size'ın üreteceği boyutu hesapla
+
+        quality None ise (akıllı optimizasyonda kalite henüz bilinmiyor)
+        olası en büyük hedef boyut döndürülür.
+        """
+        width, height = size
         max_dimension = 5000  # Ultra HD için maksimum boyut
         min_dimension = 800   # Minimum kalite boyutu
         optimal_dimension = 3000  # Optimal boyut
@@ -43,37 +55,133 @@ class ImageProcessor:
         # Boyut optimizasyonu
         if max(width, height) > max_dimension:
             ratio = max_dimension / max(width, height)
-            new_size = tuple(int(dim * ratio) for dim in (width, height))
-            image = self._high_quality_resize(image, new_size)
         elif max(width, height) > optimal_dimension:
-            if quality < 90:  # Yüksek kalite istenmiyor ise boyutu düşür
-                ratio = optimal_dimension / max(width, height)
-                new_size = tuple(int(dim * ratio) for dim in (width, height))
-                image = self._high_quality_resize(image, new_size)
-        elif max(width, height) < min_dimension and quality > 60:
+            if quality is None or quality >= 90:  # Yüksek kalite isteniyorsa boyutu koru
+                return size
+            ratio = optimal_dimension / max(width, height)
+        elif max(width, height) < min_dimension and quality is not None and quality > 60:
             ratio = min_dimension / max(width, height)
-            new_size = tuple(int(dim * ratio) for dim in (width, height))
+        else:
+            return size
+
+        return tuple(int(dim * ratio) for dim in (width, height))
+
+    def optimize_image_size(self, image, quality, source_size=None):
+        """Görüntü boyutunu optimize et
+
+        source_size, görüntü küçültülerek çözüldüyse dosyadaki asıl boyuttur;
+        hedef boyut her zaman asıl boyuta göre hesaplanır.
+        """
+        new_size = self.get_target_size(source_size or image.size, quality)
+        if new_size != image.size:
             image = self._high_quality_resize(image, new_size)
 
         return image
 
+    def build_variants(self, image, widths):
+        """Verilen genişliklerde küçültülmüş kopyalar üret (boyutlandırma piramidi)
+
+        Her kopya bir öncekinden (daha büyük olandan) üretilir, böylece her
+        adım tam boyutlu görüntü yerine gittikçe küçülen bir girdiyle çalışır.
+        Görüntüden geniş olan genişlikler atlanır. [(genişlik, görüntü), ...]
+        büyükten küçüğe döner.
+        """
+        width, height = image.size
+        variants = []
+        current = image
+        for variant_width in sorted(set(widths), reverse=True):
+            if variant_width >= width:
+                continue
+            variant_height = max(1, round(height * variant_width / width))
+            current = self._high_quality_resize(current, (variant_width, variant_height))
+            variants.append((variant_width, current))
+        return variants
+
     def _high_quality_resize(self, image, size):
-        """Yüksek kaliteli boyutlandırma"""
+        """Yüksek kaliteli boyutlandırma
+
+        Eşiğin üstündeki görüntüler şeritler halinde boyutlandırılır; böylece
+        RGBA için oluşturulan ara kopyalar tam boyutlu değil şerit boyutlu olur.
+        """
+        if image.size[0] * image.size[1] >= settings.TILED_MIN_PIXELS:
+            return self._resize_in_strips(image, size)
+        return self._resize_region(image, size)
+
+    def _resize_region(self, image, size, box=None):
+        """LANCZOS boyutlandırma; box verilirse yalnızca o kaynak bölgesi ölçeklenir"""
         if image.mode == 'RGBA':
-            # Alfa kanalını ayrı işle
+            # Alfa kanalını ayrı işle (split() her çağrıda dört bandı da kopyalar)
+            alpha = image.getchannel('A')
             background = Image.new('RGB', image.size, (255, 255, 255))
-            background.paste(image, mask=image.split()[3])
-            resized_background = background.resize(size, Image.Resampling.LANCZOS)
-            
-            alpha = image.split()[3]
-            resized_alpha = alpha.resize(size, Image.Resampling.LANCZOS)
+            background.paste(image, mask=alpha)
+            resized_background = background.resize(size, Image.Resampling.LANCZOS, box=box)
+            del background
+
+            resized_alpha = alpha.resize(size, Image.Resampling.LANCZOS, box=box)
             
             resized = resized_background.convert('RGBA')
             resized.putalpha(resized_alpha)
             
             return resized
         else:
-            return image.resize(size, Image.Resampling.LANCZOS)
+            return image.resize(size, Image.Resampling.LANCZOS, box=box)
+
+    def resize_window(self, image, size, window):
+        """Tam boyutlandırmanın yalnızca window (çıktı koordinatları) bölgesini üret
+
+        Kaynaktan filtre yarıçapı kadar taşan bölge kırpılır ve box ile tam
+        görüntüdeki konumuyla ölçeklenir; ağırlıklar tam boyutlandırmayla aynı
+        olduğundan pencere sınırlarında dikiş oluşmaz.
+        """
+        width, height = image.size
+        out_width, out_height = size
+        left, top, right, bottom = window
+        # Pillow'da LANCZOS yarıçapı 3 pikseldir, küçültmede ölçekle büyür
+        support_x = LANCZOS_SUPPORT * max(width / out_width, 1.0)
+        support_y = LANCZOS_SUPPORT * max(height / out_height, 1.0)
+        source_left = left * width / out_width
+        source_top = top * height / out_height
+        source_right = right * width / out_width
+        source_bottom = bottom * height / out_height
+        crop_left = max(0, math.floor(source_left - support_x) - 1)
+        crop_top = max(0, math.floor(source_top - support_y) - 1)
+        crop_right = min(width, math.ceil(source_right + support_x) + 1)
+        crop_bottom = min(height, math.ceil(source_bottom + support_y) + 1)
+
+        region = image.crop((crop_left, crop_top, crop_right, crop_bottom))
+        return self._resize_region(
+            region,
+            (right - left, bottom - top),
+            box=(
+                source_left - crop_left,
+                source_top - crop_top,
+                source_right - crop_left,
+                source_bottom - crop_top,
+            ),
+        )
+
+    def _resize_in_strips(self, image, size, strip_rows=None):
+        """Boyutlandırmayı yatay şeritler (resize_window) halinde yap"""
+        width, height = image.size
+        strip_rows = strip_rows or max(1, settings.TILE_PIXELS // width)
+        out_width, out_height = size
+        scale = height / out_height
+        rows_per_strip = max(1, int(strip_rows / max(scale, 1.0)))
+
+        output = None
+        for out_top in range(0, out_height, rows_per_strip):
+            out_bottom = min(out_height, out_top + rows_per_strip)
+            resized = self.resize_window(image, size, (0, out_top, out_width, out_bottom))
+            if output is None:
+                output = Image.new(resized.mode, size)
+                if resized.mode in ('P', 'PA'):
+                    # paste yalnızca palet indekslerini kopyalar
+                    output.putpalette(image.getpalette())
+            output.paste(resized, (0, out_top))
+        if image.mode != 'RGBA':
+            # Tam boyutlandırmada olduğu gibi (RGBA yolu meta veriyi taşımaz)
+            output.info = image.info.copy()
+        return output
 
     def _calculate_edge_density(self, image):
         """Kenar yoğunluğunu hesapla"""
@@ -81,17 +189,17 @@ class ImageProcessor:
             image = image.convert('L')
         
         width, height = image.size
-        pixels = image.load()
+        pixels = np.asarray(image, dtype=np.int16)
         edge_count = 0
         
-        for y in range(1, height-1):
-            for x in range(1, width-1):
-                # Basit Sobel operatörü
-                gx = pixels[x+1, y] - pixels[x-1, y]
-                gy = pixels[x, y+1] - pixels[x, y-1]
-                gradient = math.sqrt(gx*gx + gy*gy)
-                if gradient > 30:  # Eşik değeri
-                    edge_count += 1
+        # Merkezi farklar satır blokları halinde hesaplanır
+        for top in range(1, height - 1, EDGE_DENSITY_ROW_CHUNK):
+            bottom = min(top + EDGE_DENSITY_ROW_CHUNK, height - 1)
+            # Basit Sobel operatörü
+            gx = (pixels[top:bottom, 2:] - pixels[top:bottom, :-2]).astype(np.int32)
+            gy = (pixels[top + 1:bottom + 1, 1:-1] - pixels[top - 1:bottom - 1, 1:-1]).astype(np.int32)
+            # sqrt(gx² + gy²) > 30 ile aynı, karekök almadan
+            edge_count += int(np.count_nonzero(gx * gx + gy * gy > 30 * 30))  # Eşik değeri
         
         return edge_count / (width * height)
 
@@ -104,9 +212,10 @@ class ImageProcessor:
             else:
                 # Yarı saydam pikselleri optimize et
                 threshold = 128
-                alpha_data = alpha.getdata()
-                new_alpha = Image.new('L', alpha.size)
-                new_alpha.putdata([255 if a > threshold else 0 for a in alpha_data])
+                alpha_data = np.asarray(alpha)
+                new_alpha = Image.fromarray(
+                    np.where(alpha_data > threshold, 255, 0).astype(np.uint8), 'L'
+                )
                 channels = list(image.split())
                 channels[3] = new_alpha
                 image = Image.merge('RGBA', channels)
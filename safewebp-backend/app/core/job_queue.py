@@ -0,0 +1,177 @@
+import asyncio
+import shutil
+import time
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from .job_store import JobStore
+
+class JobQueue:
+    """Kalıcı iş kuyruğunu boşaltan asyncio işçi havuzu
+
+    İşler JobStore'dan dosya dosya alınır ve verilen `handler` ile
+    dönüştürülür. Dönüşüm sürdükçe kilit yenilenir; süreç çökerse kilit
+    dolar ve dosya başka bir işçi tarafından yeniden alınır. Geçici hatalar
+    (bellek bütçesi dolu, işçi süreci çöktü: 503) dosyayı başarısız saymaz;
+    dosya JOB_MAX_ATTEMPTS denemeye kadar kuyruğa geri konur.
+    """
+
+    def __init__(
+        self,
+        store: Optional[JobStore] = None,
+        workers: Optional[int] = None,
+        lease: Optional[float] = None,
+    ):
+        self.store = store or JobStore(settings.JOBS_DB)
+        self.workers = workers or settings.JOB_WORKERS
+        self.lease = lease or settings.JOB_LEASE
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @staticmethod
+    def job_dir(job_id: str) -> Path:
+        return settings.JOBS_DIR / job_id
+
+    @classmethod
+    def output_dir(cls, job_id: str) -> Path:
+        return cls.job_dir(job_id) / "outputs"
+
+    def start(
+        self,
+        handler: Callable[[dict], Awaitable[dict]],
+        on_progress: Optional[Callable[[str, dict], None]] = None,
+    ):
+        """İşçileri başlat; handler alınan dosyayı dönüştürüp sonucunu döndürür"""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(handler, on_progress))
+            for _ in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._purge_expired()))
+
+    async def stop(self):
+        """İşçileri durdur; yarıda kalan dosyalar kuyruğa geri konur"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Yeni iş eklendiğini boştaki işçilere bildir"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _wait_for_work(self):
+        # Diğer süreçlerin eklediği işleri de görmek için kısa aralıkla yokla.
+        # wait_for, süre dolarken gelen iptali yutabilir ve stop() hiç bitmez;
+        # asyncio.wait iptali her zaman iletir
+        waiter = asyncio.ensure_future(self._wakeup.wait())
+        try:
+            await asyncio.wait((waiter,), timeout=1.0)
+        finally:
+            waiter.cancel()
+        self._wakeup.clear()
+
+    async def _keep_lease(self, item: dict):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            renewed = await run_in_threadpool(
+                self.store.renew_lease, item['job_id'], item['index'], item['claim'], self.lease
+            )
+            if not renewed:
+                # Kilit dolup öğe başka işçiye geçti; sonucu o işçi yazacak
+                return
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        """Hata geçiciyse yeniden denemeden önce beklenecek süreyi, değilse None döndür"""
+        if isinstance(error, BrokenProcessPool):
+            return 0.0
+        if isinstance(error, HTTPException) and error.status_code == 503:
+            try:
+                return float((error.headers or {}).get("Retry-After", 0))
+            except ValueError:
+                return 0.0
+        return None
+
+    async def _worker(self, handler, on_progress):
+        while True:
+            try:
+                item = await run_in_threadpool(self.store.claim_next, self.lease)
+            except Exception as e:
+                print(f"Error in JobQueue._worker: {str(e)}")
+                item = None
+            if item is None:
+                await self._wait_for_work()
+                continue
+
+            result = None
+            error = None
+            retry_after = None
+            if item['attempts'] > settings.JOB_MAX_ATTEMPTS:
+                # Dönüşüm sırasında süreci tekrar tekrar düşüren dosyayı bırak
+                error = "Dönüşüm tamamlanamadı (deneme sınırı aşıldı)"
+            else:
+                keeper = asyncio.create_task(self._keep_lease(item))
+                try:
+                    result = await handler(item)
+                except asyncio.CancelledError:
+                    # Kapanışta yarıda kalan dosyayı hemen kuyruğa geri koy; ikinci
+                    # bir iptal yazmayı yarıda kesmesin
+                    await asyncio.shield(run_in_threadpool(
+                        self.store.requeue_file, item['job_id'], item['index'], item['claim']
+                    ))
+                    raise
+                except Exception as e:
+                    error = str(getattr(e, "detail", None) or e)
+                    print(f"Error in JobQueue._worker: {error}")
+                    retry_after = self._retry_after(e)
+                finally:
+                    keeper.cancel()
+
+            if retry_after is not None and item['attempts'] < settings.JOB_MAX_ATTEMPTS:
+                # Sunucu geçici olarak dolu; dosya başarısız sayılmadan yeniden denenir
+                try:
+                    await asyncio.sleep(retry_after)
+                finally:
+                    await asyncio.shield(run_in_threadpool(
+                        self.store.requeue_file, item['job_id'], item['index'], item['claim'], True
+                    ))
+                self.notify()
+                continue
+
+            try:
+                progress = await run_in_threadpool(
+                    self.store.finish_file, item['job_id'], item['index'], item['claim'], result, error
+                )
+            except Exception as e:
+                print(f"Error in JobQueue._worker: {str(e)}")
+                continue
+            if progress is None:
+                # Kilit başka işçiye geçti; girdi onun dönüşümünde hâlâ kullanılıyor
+                continue
+            # Girdi artık gerekmiyor
+            Path(item['input_path']).unlink(missing_ok=True)
+            if on_progress is not None:
+                on_progress(item['job_id'], {**progress, 'current_file': item['filename']})
+
+    async def _purge_expired(self):
+        """Saklama süresi dolan işlerin kayıtlarını ve dosyalarını sil"""
+        while True:
+            try:
+                expired = await run_in_threadpool(
+                    self.store.expired_jobs, time.time() - settings.JOB_RETENTION
+                )
+                for job_id in expired:
+                    await run_in_threadpool(shutil.rmtree, self.job_dir(job_id), True)
+                    await run_in_threadpool(self.store.delete_job, job_id)
+            except Exception as e:
+                print(f"Error in JobQueue._purge_expired: {str(e)}")
+            await asyncio.sleep(60)
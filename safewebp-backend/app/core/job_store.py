@@ -0,0 +1,270 @@
+import json
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from pathlib import Path
+from typing import List, Optional
+
+class JobStore:
+    """Kuyruktaki dönüşüm işlerini yeniden başlatmalar arasında SQLite'ta tutar
+
+    Her dosya ayrı bir kuyruk öğesidir; işçiler öğeleri süreli bir kilit
+    (lease) ile alır. Kilidi yenilenmeyen öğe (çöken süreç) tekrar kuyruğa
+    döner, böylece birden fazla uvicorn işçisi aynı kuyruğu güvenle boşaltır.
+    Her alımda yeni bir claim belirteci yazılır; kilidi dolup öğesi başka
+    işçiye geçen işçinin yenileme ve sonuç yazmaları yok sayılır.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    status TEXT NOT NULL,
+                    settings TEXT NOT NULL,
+                    total_files INTEGER NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_files (
+                    job_id TEXT NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+                    idx INTEGER NOT NULL,
+                    filename TEXT NOT NULL,
+                    input_path TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    digest TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_until REAL NOT NULL DEFAULT 0,
+                    claim TEXT,
+                    result TEXT,
+                    error TEXT,
+                    PRIMARY KEY (job_id, idx)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS job_files_status ON job_files (status, lease_until)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def create_job(self, job_id: str, settings_json: str, files: List[dict]) -> bool:
+        """İşi ve dosyalarını kuyruğa ekle; aynı kimlikli iş varsa False döner"""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT INTO jobs (id, created_at, updated_at, status, settings, total_files) "
+                    "VALUES (?, ?, ?, 'queued', ?, ?)",
+                    (job_id, now, now, settings_json, len(files)),
+                )
+            except sqlite3.IntegrityError:
+                conn.execute("ROLLBACK")
+                return False
+            conn.executemany(
+                "INSERT INTO job_files (job_id, idx, filename, input_path, size, digest, status) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'queued')",
+                [
+                    (job_id, index, item['filename'], str(item['input_path']), item['size'], item['digest'])
+                    for index, item in enumerate(files)
+                ],
+            )
+            conn.execute("COMMIT")
+        return True
+
+    def claim_next(self, lease_seconds: float) -> Optional[dict]:
+        """Sıradaki dosyayı (veya kilidi dolmuş olanı) al; kuyruk boşsa None
+
+        Dönen öğedeki 'claim', sonraki yenileme ve sonuç yazmalarında verilir.
+        """
+        now = time.time()
+        claim = uuid.uuid4().hex
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                """
+                SELECT f.job_id, f.idx, f.filename, f.input_path, f.size, f.digest, f.attempts, j.settings
+                FROM job_files f JOIN jobs j ON j.id = f.job_id
+                WHERE f.status = 'queued' OR (f.status = 'running' AND f.lease_until < ?)
+                ORDER BY j.created_at, f.idx
+                LIMIT 1
+                """,
+                (now,),
+            ).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return None
+            job_id, index = row[0], row[1]
+            conn.execute(
+                "UPDATE job_files SET status = 'running', attempts = attempts + 1, lease_until = ?, "
+                "claim = ? WHERE job_id = ? AND idx = ?",
+                (now + lease_seconds, claim, job_id, index),
+            )
+            conn.execute(
+                "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ? AND status = 'queued'",
+                (now, job_id),
+            )
+            conn.execute("COMMIT")
+        return {
+            'job_id': job_id,
+            'index': index,
+            'filename': row[2],
+            'input_path': row[3],
+            'size': row[4],
+            'digest': row[5],
+            'attempts': row[6] + 1,
+            'settings': row[7],
+            'claim': claim,
+        }
+
+    def renew_lease(self, job_id: str, index: int, claim: str, lease_seconds: float) -> bool:
+        """Süren dönüşümün kilidini uzat; kilit başka işçiye geçtiyse False"""
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE job_files SET lease_until = ? "
+                "WHERE job_id = ? AND idx = ? AND status = 'running' AND claim = ?",
+                (time.time() + lease_seconds, job_id, index, claim),
+            )
+        return cursor.rowcount > 0
+
+    def requeue_file(self, job_id: str, index: int, claim: str, count_attempt: bool = False):
+        """Dosyayı kuyruğa geri koy
+
+        Yarıda bırakılan (kapanışta iptal edilen) dosya deneme sayılmaz;
+        geçici bir hatayla başarısız olan deneme count_attempt ile sayılır.
+        """
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE job_files SET status = 'queued', attempts = attempts - ?, lease_until = 0, "
+                "claim = NULL WHERE job_id = ? AND idx = ? AND status = 'running' AND claim = ?",
+                (0 if count_attempt else 1, job_id, index, claim),
+            )
+
+    def finish_file(
+        self,
+        job_id: str,
+        index: int,
+        claim: str,
+        result: Optional[dict] = None,
+        error: Optional[str] = None,
+    ) -> Optional[dict]:
+        """Dosyanın sonucunu kaydet, tüm dosyalar bittiyse işi kapat; iş ilerlemesini döndür
+
+        Kilit bu arada başka işçiye geçtiyse hiçbir şey yazılmaz ve None döner.
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute(
+                "UPDATE job_files SET status = ?, result = ?, error = ?, lease_until = 0, claim = NULL "
+                "WHERE job_id = ? AND idx = ? AND status = 'running' AND claim = ?",
+                (
+                    'failed' if error is not None else 'completed',
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    job_id,
+                    index,
+                    claim,
+                ),
+            )
+            if cursor.rowcount == 0:
+                conn.execute("ROLLBACK")
+                return None
+            progress = self._progress(conn, job_id)
+            if progress['pending_files'] == 0:
+                # Hiçbir dosya dönüştürülemediyse iş başarısız sayılır
+                status = 'failed' if progress['completed_files'] == 0 else 'completed'
+            else:
+                status = 'running'
+            conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?", (status, now, job_id)
+            )
+            conn.execute("COMMIT")
+        progress['status'] = status
+        return progress
+
+    @staticmethod
+    def _progress(conn: sqlite3.Connection, job_id: str) -> dict:
+        row = conn.execute(
+            """
+            SELECT COUNT(*),
+                   SUM(status = 'completed'),
+                   SUM(status = 'failed'),
+                   SUM(status IN ('queued', 'running'))
+            FROM job_files WHERE job_id = ?
+            """,
+            (job_id,),
+        ).fetchone()
+        return {
+            'total_files': row[0],
+            'completed_files': row[1] or 0,
+            'failed_files': row[2] or 0,
+            'pending_files': row[3] or 0,
+        }
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        """İşin durumunu ve dosya sonuçlarını giriş sırasıyla döndür"""
+        with closing(self._connect()) as conn:
+            job = conn.execute(
+                "SELECT status, created_at, updated_at, total_files FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+            if job is None:
+                return None
+            rows = conn.execute(
+                "SELECT idx, filename, status, result, error FROM job_files WHERE job_id = ? ORDER BY idx",
+                (job_id,),
+            ).fetchall()
+        return {
+            'job_id': job_id,
+            'status': job[0],
+            'created_at': job[1],
+            'updated_at': job[2],
+            'total_files': job[3],
+            'files': [
+                {
+                    'index': index,
+                    'filename': filename,
+                    'status': status,
+                    'result': json.loads(result) if result is not None else None,
+                    'error': error,
+                }
+                for index, filename, status, result, error in rows
+            ],
+        }
+
+    def expired_jobs(self, finished_before: float) -> List[str]:
+        """Bu zamandan önce biten işlerin kimlikleri"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('completed', 'failed') AND updated_at < ?",
+                (finished_before,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def delete_job(self, job_id: str):
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def stats(self) -> dict:
+        """Durumlarına göre iş sayıları ve kuyrukta bekleyen dosya sayısı"""
+        with closing(self._connect()) as conn:
+            jobs = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            queued = conn.execute(
+                "SELECT COUNT(*) FROM job_files WHERE status IN ('queued', 'running')"
+            ).fetchone()[0]
+        return {'jobs': jobs, 'pending_files': queued}
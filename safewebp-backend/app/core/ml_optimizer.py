@@ -4,42 +4,123 @@ from sklearn.ensemble import RandomForestRegressor
 import joblib
 from pathlib import Path
 import cv2
-from typing import Dict, Tuple
+from PIL import Image
+from typing import Dict, List, Optional, Tuple
+import math
 import os
 
+from ..config import settings
+
+# Küçültülmüş görüntüde ölçülen ölçeğe bağlı özelliklerin tam çözünürlüğe
+# düzeltilmesi için üsler: feature_full ≈ feature_proxy * scale ** -exp.
+# 1/f² güç spektrumlu (doğal fotoğraf istatistiği) sentetik görüntülerde
+# ölçülen medyan değerlerdir.
+EDGE_DENSITY_SCALE_EXPONENT = 0.10
+TEXTURE_SCALE_EXPONENT = 0.13
+
+# Windows'ta açık bellek eşlemli dosya os.replace ile değiştirilemez
+MODEL_MMAP_MODE = None if os.name == 'nt' else 'r'
+
+# Model girdisindeki özellik sırası
+FEATURE_NAMES = (
+    'size',
+    'aspect_ratio',
+    'edge_density',
+    'color_complexity',
+    'saturation',
+    'texture_complexity',
+)
+
 class MLOptimizer:
-    def __init__(self, model_path: str = "models/optimizer_model.joblib"):
+    def __init__(
+        self,
+        model_path: str = "models/optimizer_model.joblib",
+        feature_max_edge: Optional[int] = None,
+    ):
         self.model_path = Path(model_path)
+        # Özellik çıkarımı için en uzun kenar sınırı (0: tam çözünürlük)
+        self.feature_max_edge = (
+            settings.ML_FEATURE_MAX_EDGE if feature_max_edge is None else feature_max_edge
+        )
+        self._model_mtime = 0
         self.model = self._load_or_create_model()
-        self.training_data = []
         
     def _load_or_create_model(self) -> RandomForestRegressor:
         """Mevcut modeli yükle veya yeni model oluştur"""
         if self.model_path.exists():
-            return joblib.load(self.model_path)
+            self._model_mtime = self.model_path.stat().st_mtime_ns
+            return joblib.load(self.model_path, mmap_mode=MODEL_MMAP_MODE)
         
-        model = RandomForestRegressor(
+        self.model_path.parent.mkdir(parents=True, exist_ok=True)
+        return self.create_model()
+
+    @staticmethod
+    def create_model() -> RandomForestRegressor:
+        """Eğitilmemiş yeni model oluştur"""
+        return RandomForestRegressor(
             n_estimators=100,
             max_depth=10,
             random_state=42
         )
-        self.model_path.parent.mkdir(parents=True, exist_ok=True)
-        return model
 
-    def extract_features(self, image: np.ndarray) -> Dict[str, float]:
-        """Görüntüden özellik çıkarımı yap"""
-        # Temel özellikler
+    def reload_if_updated(self) -> bool:
+        """Model dosyası başka bir süreç tarafından güncellendiyse yeniden yükle"""
+        try:
+            mtime = self.model_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime <= self._model_mtime:
+            return False
+
+        try:
+            # Dizi verileri, mümkünse süreçler arasında paylaşılan sayfa önbelleğinden okunur
+            model = joblib.load(self.model_path, mmap_mode=MODEL_MMAP_MODE)
+        except Exception as e:
+            print(f"Error in reload_if_updated: {str(e)}")
+            return False
+        # Referans ataması atomik, devam eden tahminler eski modeli kullanır
+        self.model = model
+        self._model_mtime = mtime
+        return True
+
+    def _make_proxy(self, image: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Özellik çıkarımı için en uzun kenarı sınırlı küçük kopya oluştur"""
         height, width = image.shape[:2]
+        longest = max(height, width)
+        if not self.feature_max_edge or longest <= self.feature_max_edge:
+            return image, 1.0
+
+        scale = self.feature_max_edge / longest
+        proxy_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        proxy = cv2.resize(image, proxy_size, interpolation=cv2.INTER_AREA)
+        return proxy, scale
+
+    def extract_features(
+        self, image: np.ndarray, source_size: Optional[Tuple[int, int]] = None
+    ) -> Dict[str, float]:
+        """RGB (veya gri) diziden özellik çıkarımı yap
+
+        Özellikler kanal sırasından bağımsızdır, yalnızca doygunluk için RGB
+        varsayılır. source_size, görüntü küçültülerek çözüldüyse asıl (genişlik, yükseklik)
+        değeridir; boyut özellikleri ve ölçek normalizasyonu buna göre yapılır.
+        """
+        # Temel özellikler
+        width, height = source_size or (image.shape[1], image.shape[0])
         total_pixels = height * width
+
+        # Büyük görüntülerde özellikler küçültülmüş kopya üzerinde hesaplanır
+        image, _ = self._make_proxy(image)
+        proxy_pixels = image.shape[0] * image.shape[1]
+        scale = image.shape[1] / width
         
         # Kenar tespiti
         edges = cv2.Canny(image, 100, 200)
-        edge_density = np.count_nonzero(edges) / total_pixels
+        edge_density = np.count_nonzero(edges) / proxy_pixels
         
         # Renk karmaşıklığı
         if len(image.shape) == 3:
             color_std = np.std(image, axis=(0,1)).mean()
-            hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+            hsv = cv2.cvtColor(image, cv2.COLOR_RGB2HSV)
             saturation = hsv[:,:,1].mean()
         else:
             color_std = np.std(image)
@@ -47,6 +128,11 @@ class MLOptimizer:
         
         # Doku analizi
         texture = np.std(cv2.Laplacian(image, cv2.CV_64F))
+
+        # Ölçeğe bağlı özellikleri tam çözünürlük eşdeğerine normalize et
+        if scale < 1.0:
+            edge_density = min(1.0, edge_density * scale ** -EDGE_DENSITY_SCALE_EXPONENT)
+            texture *= scale ** -TEXTURE_SCALE_EXPONENT
         
         return {
             'size': total_pixels,
@@ -57,10 +143,104 @@ class MLOptimizer:
             'texture_complexity': texture
         }
 
-    def predict_optimal_params(self, image: np.ndarray) -> Tuple[int, dict]:
+    def extract_image_features(
+        self, image: Image.Image, source_size: Optional[Tuple[int, int]] = None
+    ) -> Dict[str, float]:
+        """Çözülmüş PIL görüntüsünden özellik çıkar
+
+        BGR kopyası oluşturulmaz; eşiğin altındaki görüntüler Pillow'un tek
+        seferlik dışa aktarımının salt okunur dizi görünümüyle, üstündekiler
+        şerit şerit işlenir.
+        """
+        if image.size[0] * image.size[1] >= settings.TILED_MIN_PIXELS:
+            return self.extract_features_tiled(image, source_size)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        return self.extract_features(np.asarray(image), source_size)
+
+    def extract_features_tiled(
+        self, image: Image.Image, source_size: Optional[Tuple[int, int]] = None
+    ) -> Dict[str, float]:
+        """Büyük görüntüde tam boyutlu numpy/cv2 kopyası oluşturmadan özellik çıkar
+
+        Küçültülmüş kopya kullanılıyorsa kopya şerit şerit tam sayı katsayıyla
+        küçültülerek oluşturulur; tam çözünürlükte (feature_max_edge=0)
+        istatistikler şerit şerit biriktirilir.
+        """
+        width, height = image.size
+        strip_rows = max(1, settings.TILE_PIXELS // width)
+        longest = max(width, height)
+        if not self.feature_max_edge or longest <= self.feature_max_edge:
+            return self._accumulate_features(image, source_size, strip_rows)
+
+        factor = max(1, longest // (2 * self.feature_max_edge))
+        # Şerit yüksekliği katsayının katı olmalı, yoksa kutu ortalaması şerit sınırında kayar
+        rows = max(factor, strip_rows - strip_rows % factor)
+        proxy = Image.new('RGB', (math.ceil(width / factor), math.ceil(height / factor)))
+        for top in range(0, height, rows):
+            strip = image.crop((0, top, width, min(height, top + rows))).convert('RGB')
+            proxy.paste(strip.reduce(factor), (0, top // factor))
+        proxy = np.asarray(proxy)
+        # Kalan kesirli küçültme ve ölçek düzeltmesi normal yoldan yapılır
+        return self.extract_features(proxy, source_size or image.size)
+
+    def _accumulate_features(
+        self, image: Image.Image, source_size: Optional[Tuple[int, int]], strip_rows: int
+    ) -> Dict[str, float]:
+        """extract_features istatistiklerini şerit şerit biriktirerek hesapla"""
+        width, height = image.size
+        # Canny (Sobel + maksimum bastırma) ve Laplacian için komşu satırlar
+        overlap = 2
+        channel_sum = np.zeros(3)
+        channel_sq = np.zeros(3)
+        laplacian_sum = 0.0
+        laplacian_sq = 0.0
+        saturation_sum = 0.0
+        edge_count = 0
+
+        for top in range(0, height, strip_rows):
+            bottom = min(height, top + strip_rows)
+            crop_top = max(0, top - overlap)
+            strip = image.crop((0, crop_top, width, min(height, bottom + overlap))).convert('RGB')
+            strip = np.asarray(strip)
+            inner = slice(top - crop_top, bottom - crop_top)
+            rows = bottom - top
+
+            edge_count += np.count_nonzero(cv2.Canny(strip, 100, 200)[inner])
+            core = np.ascontiguousarray(strip[inner])
+            mean, std = cv2.meanStdDev(core)
+            channel_sum += mean.ravel() * rows * width
+            channel_sq += (std.ravel() ** 2 + mean.ravel() ** 2) * rows * width
+            saturation_sum += cv2.cvtColor(core, cv2.COLOR_RGB2HSV)[:, :, 1].sum(dtype=np.float64)
+            mean, std = cv2.meanStdDev(np.ascontiguousarray(cv2.Laplacian(strip, cv2.CV_64F)[inner]))
+            laplacian_sum += mean.sum() * rows * width
+            laplacian_sq += (std ** 2 + mean ** 2).sum() * rows * width
+
+        pixels = width * height
+        channel_mean = channel_sum / pixels
+        color_std = np.sqrt(np.maximum(channel_sq / pixels - channel_mean ** 2, 0)).mean()
+        # Laplacian'ın standart sapması tüm kanallar üzerinden
+        laplacian_mean = laplacian_sum / (3 * pixels)
+        texture = math.sqrt(max(laplacian_sq / (3 * pixels) - laplacian_mean ** 2, 0))
+
+        source_width, source_height = source_size or image.size
+        return {
+            'size': source_width * source_height,
+            'aspect_ratio': source_width / source_height,
+            'edge_density': edge_count / pixels,
+            'color_complexity': color_std,
+            'saturation': saturation_sum / pixels,
+            'texture_complexity': texture
+        }
+
+    def predict_optimal_params(
+        self, image: Optional[np.ndarray], features: Optional[Dict[str, float]] = None
+    ) -> Tuple[int, dict]:
         """Optimal WebP parametrelerini tahmin et"""
         try:
-            features = self.extract_features(image)
+            self.reload_if_updated()
+            if features is None:
+                features = self.extract_features(image)
             
             # Model henüz eğitilmemişse veya hata varsa varsayılan değerleri kullan
             if not hasattr(self.model, 'predict') or True:  # Şimdilik her zaman varsayılan kullan
@@ -82,14 +262,7 @@ class MLOptimizer:
                 return quality, params
                 
             # ML model hazır olduğunda bu kısmı kullan
-            feature_vector = np.array([[
-                features['size'],
-                features['aspect_ratio'],
-                features['edge_density'],
-                features['color_complexity'],
-                features['saturation'],
-                features['texture_complexity']
-            ]])
+            feature_vector = np.array([[features[name] for name in FEATURE_NAMES]])
             quality = int(self.model.predict(feature_vector)[0])
             
             return quality, self._get_webp_params(quality, features)
@@ -129,40 +302,32 @@ class MLOptimizer:
             
         return params
 
-    def train(self, image_data: np.ndarray, quality_score: float, compression_ratio: float):
-        """Modeli yeni verilerle eğit"""
-        try:
-            features = self.extract_features(image_data)
-            self.training_data.append({
-                'features': list(features.values()),
-                'quality': quality_score,
-                'compression': compression_ratio
-            })
-            
-            # Belirli sayıda veri toplandığında modeli güncelle
-            if len(self.training_data) >= 10:
-                self._update_model()
-        except Exception as e:
-            print(f"Error in train: {str(e)}")
-            
-    def _update_model(self):
-        """Modeli toplanan verilerle güncelle"""
-        try:
-            if not self.training_data:
-                return
-                
-            X = np.array([data['features'] for data in self.training_data])
-            y = np.array([data['quality'] for data in self.training_data])
-            
-            if not hasattr(self.model, 'predict'):
-                self.model = RandomForestRegressor(
-                    n_estimators=100,
-                    max_depth=10,
-                    random_state=42
-                )
-                
-            self.model.fit(X, y)
-            joblib.dump(self.model, self.model_path)
-            self.training_data = []  # Veriyi temizle
-        except Exception as e:
-            print(f"Error in _update_model: {str(e)}")
\ No newline at end of file
+    @staticmethod
+    def make_training_sample(
+        features: Dict[str, float], quality_score: float, compression_ratio: float
+    ) -> dict:
+        """Arka plan eğitimine gönderilecek örneği oluştur"""
+        return {
+            'features': [float(features[name]) for name in FEATURE_NAMES],
+            'quality': float(quality_score),
+            'compression': float(compression_ratio)
+        }
+
+    def fit(self, training_data: List[dict]) -> RandomForestRegressor:
+        """Örneklerle yeni bir model eğit (mevcut modele dokunmaz)"""
+        X = np.array([data['features'] for data in training_data])
+        y = np.array([data['quality'] for data in training_data])
+
+        model = self.create_model()
+        model.fit(X, y)
+        return model
+
+    def set_model(self, model: RandomForestRegressor, persist: bool = True):
+        """Eğitilmiş modeli yerine koy ve diske atomik olarak yaz"""
+        if persist:
+            # Okuyucular yarım yazılmış dosya görmesin diye önce geçici dosyaya yaz
+            tmp_path = self.model_path.with_name(f".{self.model_path.name}.{os.getpid()}.tmp")
+            joblib.dump(model, tmp_path)
+            os.replace(tmp_path, self.model_path)
+            self._model_mtime = self.model_path.stat().st_mtime_ns
+        self.model = model
@@ -0,0 +1,108 @@
+import queue
+import threading
+import time
+from typing import Optional
+
+from ..config import settings
+from .ml_optimizer import MLOptimizer
+from .training_store import TrainingSampleStore
+
+class ModelTrainer:
+    """Eğitim örneklerini kuyruktan toplayıp modeli arka planda yeniden eğitir
+
+    Örnekler tüm uvicorn işçilerinin paylaştığı TrainingSampleStore'a yazılır;
+    aynı anda yalnızca eğitim kilidini alan işçi modeli eğitip diske yazar,
+    diğerleri model dosyasının değiştiğini görüp yeniden yükler.
+    """
+
+    def __init__(
+        self,
+        ml_optimizer: MLOptimizer,
+        store: Optional[TrainingSampleStore] = None,
+        min_samples: Optional[int] = None,
+        interval: Optional[float] = None,
+    ):
+        self.ml_optimizer = ml_optimizer
+        self.store = store or TrainingSampleStore(settings.ML_TRAINING_DB)
+        # Bu kadar yeni örnek birikince hemen eğit
+        self.min_samples = min_samples or settings.ML_TRAIN_MIN_SAMPLES
+        # Eşiğe ulaşılmasa da bekleyen örnekler bu sürede bir eğitilir (saniye)
+        self.interval = interval or settings.ML_TRAIN_INTERVAL
+        self.queue: queue.Queue = queue.Queue(maxsize=settings.ML_TRAIN_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def submit(self, sample: dict) -> bool:
+        """Örneği kuyruğa ekle, kuyruk doluysa örneği at (istek beklemez)"""
+        try:
+            self.queue.put_nowait(sample)
+            return True
+        except queue.Full:
+            return False
+
+    def start(self):
+        """Eğitim iş parçacığını başlat"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="model-trainer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Eğitim iş parçacığını durdur, bekleyen örnekleri kaydet"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._flush()
+
+    def _flush(self):
+        """Kuyruktaki örnekleri kalıcı depoya yaz"""
+        samples = []
+        while True:
+            try:
+                samples.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            self.store.add_many(samples)
+        except Exception as e:
+            print(f"Error in ModelTrainer._flush: {str(e)}")
+
+    def _run(self):
+        while not self._stop.wait(1.0):
+            self._flush()
+            try:
+                self._maybe_fit()
+            except Exception as e:
+                print(f"Error in ModelTrainer._maybe_fit: {str(e)}")
+
+    def _maybe_fit(self):
+        """Yeterli yeni örnek varsa veya süre dolduysa modeli eğit"""
+        max_id = self.store.max_id()
+        new_samples = max_id - int(self.store.get_meta('last_fit_id'))
+        if new_samples <= 0:
+            return
+
+        # Süre koşulu yalnızca ilk eğitimden sonra geçerli, ilk model min_samples bekler
+        last_fit_at = self.store.get_meta('last_fit_at')
+        due = bool(last_fit_at) and time.time() - last_fit_at >= self.interval
+        if new_samples < self.min_samples and not due:
+            return
+
+        if not self.store.try_claim_fit(settings.ML_TRAIN_LEASE):
+            return
+        self._fit(max_id)
+
+    def _fit(self, max_id: int):
+        """Modeli son örneklerle eğit ve tahmin edicilere aktar"""
+        try:
+            training_data = self.store.latest(settings.ML_TRAIN_WINDOW)
+            model = self.ml_optimizer.fit(training_data)
+            self.ml_optimizer.set_model(model)
+            self.store.finish_fit(max_id)
+        except Exception as e:
+            print(f"Error in ModelTrainer._fit: {str(e)}")
+            self.store.release_fit()
@@ -0,0 +1,516 @@
+import io
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+from ..config import settings
+from ..schemas.image import ConversionSettings
+from ..utils.file_handler import FileHandler, SpooledUpload
+from ..utils.metrics import StageTimer
+from ..utils.perceptual_cache import PerceptualParamCache, perceptual_hash
+from .animation_encoder import ANIMATED_FORMATS, AnimationEncoder
+from .candidate_encoder import CandidateEncoder
+from .image_processor import ImageProcessor
+from .webp_optimizer import WebPOptimizer
+from .ml_optimizer import MLOptimizer
+from .quality_search import QualitySearch
+
+# Yeniden kodlama kazandırmazsa özgün baytlarıyla döndürülebilen (tarayıcıların
+# gösterebildiği) biçimler
+PASSTHROUGH_FORMATS = {"JPEG", "PNG", "GIF", "WEBP"}
+
+class ConversionPipeline:
+    """Tek bir görüntü için CPU yoğun dönüşüm adımlarını bir arada tutar"""
+
+    def __init__(self):
+        self.file_handler = FileHandler()
+        self.image_processor = ImageProcessor()
+        self.webp_optimizer = WebPOptimizer()
+        self.ml_optimizer = MLOptimizer()
+        self.param_cache = PerceptualParamCache()
+
+    @staticmethod
+    def _tmp_path(output_path: Path) -> Path:
+        # Önbellekle bağlı dosyalar ezilmesin diye çıktılar geçici dosyaya
+        # yazılıp yerine taşınır
+        return output_path.with_name(f".{output_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    def _save_webp(self, image, output_path: Path, webp_params: dict) -> int:
+        """WebP'yi atomik olarak kaydet, boyutu döndür"""
+        tmp_path = self._tmp_path(output_path)
+        image.save(tmp_path, "webp", **webp_params)
+        os.replace(tmp_path, output_path)
+        return output_path.stat().st_size
+
+    def _write_bytes(self, data: bytes, output_path: Path) -> int:
+        """Kodlanmış veriyi atomik olarak yaz, boyutu döndür"""
+        tmp_path = self._tmp_path(output_path)
+        with open(tmp_path, "wb") as out_file:
+            out_file.write(data)
+        os.replace(tmp_path, output_path)
+        return len(data)
+
+    def _write_original(self, upload: SpooledUpload, output_path: Path, source_format: str) -> Path:
+        """Özgün baytları kendi uzantısıyla (WebP ise çıktı adıyla) atomik olarak yerleştir"""
+        if source_format != "WEBP":
+            output_path = output_path.with_suffix(upload.suffix.lower())
+        if upload.in_memory:
+            self._write_bytes(upload.data, output_path)
+            return output_path
+        tmp_path = self._tmp_path(output_path)
+        try:
+            # Geçici yükleme dosyası sonradan silinse de bağlantı kalır
+            os.link(upload.path, tmp_path)
+        except OSError:
+            shutil.copyfile(upload.path, tmp_path)
+        os.replace(tmp_path, output_path)
+        return output_path
+
+    def _fallback_to_original(
+        self, upload: SpooledUpload, output_path: Path, source_format: str, timer: StageTimer
+    ) -> Path:
+        """Kodlanmış çıktıyı özgün baytlarla değiştir, son dosya yolunu döndür"""
+        with timer.stage("passthrough"):
+            final_path = self._write_original(upload, output_path, source_format)
+            if final_path != output_path:
+                output_path.unlink(missing_ok=True)
+        return final_path
+
+    @staticmethod
+    def _original_meets_target(original_size: int, conversion_settings: ConversionSettings):
+        if conversion_settings.target_size:
+            return original_size <= conversion_settings.target_size
+        # Özgün görüntünün kendisiyle SSIM'i 1'dir
+        return True if conversion_settings.target_ssim else None
+
+    def _original_allowed(
+        self, upload: SpooledUpload, source_format: str, conversion_settings: ConversionSettings
+    ) -> bool:
+        """Özgün baytlar olduğu gibi döndürülebilir mi
+
+        Meta veri istenmiyorsa özgün dosya ancak meta veri taşımıyorsa
+        kullanılır; aksi halde EXIF/GPS gibi bilgiler kullanıcıya geri döner.
+        """
+        return (
+            conversion_settings.preserve_metadata
+            or not self.file_handler.has_metadata(upload, source_format)
+        )
+
+    def _predict_passthrough(
+        self,
+        upload: SpooledUpload,
+        source_size,
+        source_format: str,
+        work_size,
+        conversion_settings: ConversionSettings,
+    ):
+        """Yalnızca başlıklara bakarak dönüşümün kazandırmayacağı girdileri bul
+
+        Nedeni ("tiny", "within_target", "webp_quality") veya None döndürür.
+        Küçültme yapılacaksa ya da varyant isteniyorsa her zaman dönüştürülür.
+        """
+        if source_format not in PASSTHROUGH_FORMATS or conversion_settings.variants:
+            return None
+        if work_size[0] * work_size[1] < source_size[0] * source_size[1]:
+            return None
+        if conversion_settings.target_size and upload.size > conversion_settings.target_size:
+            # Bütçeyi aşan özgün dosya ne kadar küçük olursa olsun dönüştürülür
+            return None
+        if upload.size <= settings.PASSTHROUGH_MAX_BYTES:
+            return "tiny"
+        if source_format != "WEBP":
+            return None
+
+        info = self.file_handler.read_webp_info(upload)
+        if info is None or info["animated"]:
+            return None
+        if conversion_settings.target_size:
+            # Bütçe zaten tutuyor, yeniden kodlama yalnızca kalite kaybettirir
+            return "within_target"
+        if conversion_settings.target_ssim or info["lossless"]:
+            return None
+        # Akıllı optimizasyonda da kullanıcının kalite değeri referans alınır
+        if info["quality"] is not None and info["quality"] <= conversion_settings.quality:
+            return "webp_quality"
+        return None
+
+    def _encode_lossy(self, image, webp_params: dict, conversion_settings: ConversionSettings):
+        """Kayıplı kodla, hedef modunda kaliteyi ara
+
+        Dönüş: (kalite, veri, hedef tuttu mu, kodlama sayısı)
+        """
+        if conversion_settings.target_size or conversion_settings.target_ssim:
+            # Hedef boyut / kalite modu: kaliteyi arayarak bul
+            search = QualitySearch(image, webp_params)
+            if conversion_settings.target_size:
+                quality, data, target_met = search.for_size(conversion_settings.target_size)
+            else:
+                quality, data, target_met = search.for_ssim(conversion_settings.target_ssim)
+            return quality, data, target_met, search.encode_count
+        buffer = io.BytesIO()
+        image.save(buffer, "webp", **webp_params)
+        return webp_params["quality"], buffer.getvalue(), None, 1
+
+    def _convert_animation(
+        self,
+        upload: SpooledUpload,
+        output_path: Path,
+        conversion_settings: ConversionSettings,
+        source_size,
+        source_format: str,
+        timer: StageTimer,
+    ) -> dict:
+        """Animasyonlu girdiyi kareleri akış halinde işleyerek animasyonlu WebP'ye çevir
+
+        Kalite ve hedef boyut bir kez belirlenir ve tüm karelere aynen
+        uygulanır. Hedef modlarında kalite aranmaz (her deneme tüm kareleri
+        yeniden kodlamayı gerektirir), yalnızca sonuç raporlanır; varyantlar
+        üretilmez.
+        """
+        original_size = upload.size
+        with timer.stage("decode"):
+            # Kareler kodlama sırasında tek tek çözülür
+            img = self.file_handler.load_image(upload)
+
+        if conversion_settings.smart_optimize:
+            # Parametreler ilk kareden tahmin edilir
+            with timer.stage("features"):
+                features = self.ml_optimizer.extract_image_features(img, source_size)
+            with timer.stage("predict"):
+                quality, webp_params = self.ml_optimizer.predict_optimal_params(None, features)
+        else:
+            quality = conversion_settings.quality
+            webp_params = self.webp_optimizer.get_webp_params(quality, {"is_photo": True})
+
+        # optimize_image_size ile aynı hedef boyut, tüm karelere uygulanır
+        work_size = self.image_processor.get_target_size(source_size, quality)
+        # Kare değiştikçe info güncellenir, dosya düzeyindeki meta veri baştan alınır
+        metadata = dict(img.info) if conversion_settings.preserve_metadata else None
+        with timer.stage("encode"):
+            encoder = AnimationEncoder(
+                self.image_processor,
+                work_size,
+                webp_params,
+                allow_mixed=conversion_settings.compare_lossless,
+            )
+            encoded = encoder.encode(img, metadata)
+            converted_size = self._write_bytes(encoded["data"], output_path)
+        img.close()
+
+        target_met = None
+        if conversion_settings.target_size:
+            target_met = converted_size <= conversion_settings.target_size
+
+        final_path = output_path
+        passthrough = None
+        if converted_size >= original_size and self._original_allowed(
+            upload, source_format, conversion_settings
+        ):
+            final_path = self._fallback_to_original(upload, output_path, source_format, timer)
+            converted_size = original_size
+            quality = None
+            target_met = self._original_meets_target(original_size, conversion_settings)
+            passthrough = "larger_output"
+
+        return {
+            "original_size": original_size,
+            "converted_size": converted_size,
+            "reduction_percent": ((original_size - converted_size) / original_size) * 100,
+            "quality": quality,
+            "encode_count": 1,
+            "target_met": target_met,
+            "param_reuse": None,
+            "candidate": None,
+            "candidate_sizes": None,
+            "passthrough": passthrough,
+            "frames": {
+                "source": encoded["source_frames"],
+                "encoded": encoded["encoded_frames"],
+            },
+            "filename": final_path.name,
+            "variants": None,
+            # Animasyon boyutları tek karelik örneklerle karşılaştırılamaz
+            "training_sample": None,
+            "timings": timer.timings,
+        }
+
+    def _encode_variants(self, image, widths, output_path: Path, webp_params: dict) -> list:
+        """Tek çözülmüş görüntüden varyantları üret ve paralel kodla"""
+        variants = self.image_processor.build_variants(image, widths)
+        if not variants:
+            return []
+
+        def encode(variant):
+            width, variant_image = variant
+            variant_path = output_path.with_name(f"{output_path.stem}_{width}w.webp")
+            return {
+                "width": width,
+                "height": variant_image.size[1],
+                "converted_size": self._save_webp(variant_image, variant_path, webp_params),
+                "filename": variant_path.name,
+            }
+
+        # Pillow, WebPEncode sırasında GIL'i bırakır; iş parçacıkları gerçekten paralel çalışır
+        with ThreadPoolExecutor(max_workers=settings.VARIANT_ENCODE_THREADS) as pool:
+            results = list(pool.map(encode, variants))
+        # Küçükten büyüğe sırala (srcset sırası)
+        return sorted(results, key=lambda variant: variant["width"])
+
+    def convert(
+        self,
+        upload: SpooledUpload,
+        output_path: Path,
+        conversion_settings: ConversionSettings,
+    ) -> dict:
+        """Görüntüyü yükle, optimize et ve WebP olarak kaydet
+
+        Adım süreleri (saniye) sonuçtaki "timings" alanında döner.
+        """
+        timer = StageTimer()
+        original_size = upload.size
+
+        # Hedef boyutu başlıktan hesapla, görüntüyü gerekmedikçe tam boyutta çözme
+        with timer.stage("header"):
+            source_size, _, source_format = self.file_handler.read_image_header(upload)
+            known_quality = None if conversion_settings.smart_optimize else conversion_settings.quality
+            decode_size = self.image_processor.get_target_size(source_size, known_quality)
+            passthrough = self._predict_passthrough(
+                upload, source_size, source_format, decode_size, conversion_settings
+            )
+            if passthrough is not None and not self._original_allowed(
+                upload, source_format, conversion_settings
+            ):
+                passthrough = None
+            animated = (
+                passthrough is None
+                and source_format in ANIMATED_FORMATS
+                and AnimationEncoder.available()
+                and self.file_handler.is_animated(upload)
+            )
+
+        if passthrough is not None:
+            # Kod çözme ve kodlama tamamen atlanır
+            with timer.stage("passthrough"):
+                final_path = self._write_original(upload, output_path, source_format)
+            return {
+                "original_size": original_size,
+                "converted_size": original_size,
+                "reduction_percent": 0.0,
+                "quality": None,
+                "encode_count": 0,
+                "target_met": self._original_meets_target(original_size, conversion_settings),
+                "param_reuse": None,
+                "candidate": None,
+                "candidate_sizes": None,
+                "passthrough": passthrough,
+                "frames": None,
+                "filename": final_path.name,
+                "variants": None,
+                "training_sample": None,
+                "timings": timer.timings,
+            }
+
+        if animated:
+            return self._convert_animation(
+                upload, output_path, conversion_settings, source_size, source_format, timer
+            )
+
+        # Görüntüyü yükle (Pillow pikselleri burada çözer)
+        with timer.stage("decode"):
+            img = self.file_handler.load_image(
+                upload, decode_size if decode_size != source_size else None
+            )
+            img.load()
+
+        # Yakın kopyalar (yeniden kırpma, yeniden dışa aktarma) daha önce
+        # seçilen parametrelerle analiz ve kalite araması yapılmadan kodlanır
+        param_key = PerceptualParamCache.make_key(conversion_settings)
+        decoded_size = img.size
+        image_hash = None
+        reused = None
+        param_reuse = None
+        if self.param_cache.enabled and (
+            conversion_settings.smart_optimize
+            or conversion_settings.target_size
+            or conversion_settings.target_ssim
+            or conversion_settings.compare_lossless
+        ):
+            with timer.stage("similarity"):
+                image_hash = perceptual_hash(img)
+                reused = self.param_cache.lookup(image_hash, param_key, decoded_size)
+            param_reuse = "miss" if reused is None else "hit"
+
+        features = None
+        if reused is not None:
+            quality = reused["quality"]
+            webp_params = dict(reused["webp_params"])
+        else:
+            # ML model ile optimal parametreleri tahmin et; özellikler çözülmüş
+            # görüntüden kopyalanmadan (çok büyüklerde şerit şerit) okunur
+            with timer.stage("features"):
+                features = self.ml_optimizer.extract_image_features(img, source_size)
+            with timer.stage("predict"):
+                optimal_quality, webp_params = self.ml_optimizer.predict_optimal_params(
+                    None, features
+                )
+
+            if conversion_settings.smart_optimize:
+                # ML tahminlerini kullan
+                quality = optimal_quality
+            else:
+                # Kullanıcı ayarlarını kullan
+                quality = conversion_settings.quality
+                webp_params = self.webp_optimizer.get_webp_params(
+                    quality, {"is_photo": True}  # Basit varsayılan değer
+                )
+
+        # Görüntüyü optimize et
+        with timer.stage("resize"):
+            img = self.image_processor.optimize_image_size(img, quality, source_size)
+        with timer.stage("color_mode"):
+            img = self.image_processor.optimize_color_mode(img)
+
+        # WebP parametrelerini güncelle
+        if conversion_settings.preserve_metadata:
+            exif = img.info.get("exif")
+            icc_profile = img.info.get("icc_profile")
+            if exif is not None:
+                webp_params["exif"] = exif
+            if icc_profile is not None:
+                webp_params["icc_profile"] = icc_profile
+
+        # WebP olarak kaydet
+        encode_count = 1
+        target_met = None
+        candidate = None
+        candidate_sizes = None
+        with timer.stage("encode"):
+            if reused is not None:
+                # Yakın kopyanın parametreleriyle tek kodlama
+                converted_size = self._save_webp(img, output_path, webp_params)
+                candidate = reused["candidate"]
+                # Hedef, kaydedilen sonuçtan değil bu kodlamadan ölçülür
+                if conversion_settings.target_size:
+                    target_met = converted_size <= conversion_settings.target_size
+                elif conversion_settings.target_ssim:
+                    with Image.open(output_path) as encoded:
+                        target_met = (
+                            QualitySearch.measure(img, encoded) >= conversion_settings.target_ssim
+                        )
+                if target_met is False:
+                    # Bu görüntüde hedef tutmadı, normal aramaya dön
+                    reused = None
+                    param_reuse = "fallback"
+            if reused is None:
+                previous_encodes = encode_count if param_reuse == "fallback" else 0
+                if conversion_settings.compare_lossless:
+                    # Kayıplı ve kayıpsız adaylar paralel kodlanır, küçük olan kazanır
+                    encoder = CandidateEncoder(img, webp_params)
+                    lossy = {}
+
+                    def encode_lossy() -> bytes:
+                        (
+                            lossy["quality"], data, lossy["target_met"], lossy["encode_count"]
+                        ) = self._encode_lossy(img, encoder.lossy_params, conversion_settings)
+                        return data
+
+                    def meets_target(name: str, data: bytes):
+                        if name == "lossy":
+                            return lossy["target_met"]
+                        if conversion_settings.target_size:
+                            return len(data) <= conversion_settings.target_size
+                        # Kayıpsız çıktının SSIM'i 1'dir
+                        return True if conversion_settings.target_ssim else None
+
+                    chosen = encoder.run(
+                        encode_lossy, conversion_settings.target_size, meets_target
+                    )
+                    data = chosen["data"]
+                    candidate = chosen["candidate"]
+                    candidate_sizes = chosen["sizes"]
+                    target_met = chosen["target_met"]
+                    encode_count = lossy["encode_count"] + encoder.encode_count
+                    if candidate == "lossless":
+                        # Kayıpsız adayda quality sıkıştırma çabasıdır
+                        webp_params = chosen["webp_params"]
+                        quality = webp_params["quality"]
+                    else:
+                        quality = lossy["quality"]
+                        webp_params = {**chosen["webp_params"], "quality": quality}
+                else:
+                    quality, data, target_met, encode_count = self._encode_lossy(
+                        img, webp_params, conversion_settings
+                    )
+                    if conversion_settings.target_size or conversion_settings.target_ssim:
+                        webp_params = {**webp_params, "quality": quality, "lossless": False}
+                encode_count += previous_encodes
+                converted_size = self._write_bytes(data, output_path)
+
+        if image_hash is not None and reused is None:
+            self.param_cache.store(image_hash, param_key, decoded_size, {
+                "quality": quality,
+                "webp_params": {
+                    key: value for key, value in webp_params.items()
+                    if key not in ("exif", "icc_profile")
+                },
+                "target_met": target_met,
+                "candidate": candidate,
+                "converted_size": converted_size,
+            })
+
+        final_path = output_path
+        if (
+            converted_size >= original_size
+            and source_format in PASSTHROUGH_FORMATS
+            and self._original_allowed(upload, source_format, conversion_settings)
+        ):
+            # Yeniden kodlama kazandırmadı (ör. küçük PNG ikonlar), özgün baytlar kullanılır
+            final_path = self._fallback_to_original(upload, output_path, source_format, timer)
+            converted_size = original_size
+            quality = None
+            target_met = self._original_meets_target(original_size, conversion_settings)
+            passthrough = "larger_output"
+
+        # Duyarlı varyantlar aynı çözülmüş görüntüden üretilir
+        variants = None
+        if conversion_settings.variants:
+            with timer.stage("variants"):
+                variants = self._encode_variants(
+                    img, conversion_settings.variants, output_path, webp_params
+                )
+            encode_count += len(variants)
+
+        # Sonuçları hesapla
+        reduction = ((original_size - converted_size) / original_size) * 100
+
+        # Eğitim örneği oluştur, eğitim istek dışında arka planda yapılır
+        training_sample = None
+        if conversion_settings.smart_optimize and features is not None:
+            quality_score = min(
+                100, max(0, 100 - (reduction * 0.5))
+            )  # Basit kalite skoru
+            training_sample = self.ml_optimizer.make_training_sample(
+                features, quality_score, reduction / 100
+            )
+
+        return {
+            "original_size": original_size,
+            "converted_size": converted_size,
+            "reduction_percent": reduction,
+            "quality": quality,
+            "encode_count": encode_count,
+            "target_met": target_met,
+            "param_reuse": param_reuse,
+            "candidate": candidate,
+            "candidate_sizes": candidate_sizes,
+            "passthrough": passthrough,
+            "frames": None,
+            "filename": final_path.name,
+            "variants": variants,
+            "training_sample": training_sample,
+            "timings": timer.timings,
+        }
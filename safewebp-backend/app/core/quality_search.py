@@ -0,0 +1,191 @@
+import io
+from typing import Callable, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from ..config import settings
+
+MIN_QUALITY = 1
+MAX_QUALITY = 100
+
+class QualitySearch:
+    """Bayt bütçesine veya SSIM tabanına ulaşan WebP kalitesini arar
+
+    Aday kaliteler önce küçültülmüş bir kopya (proxy) üzerinde ikili arama ile
+    denenir; proxy sonucu tam çözünürlüğe ölçeklenerek tahmin edilir ve her
+    tam çözünürlüklü kodlamadan sonra ölçek düzeltmesi güncellenir. Çözülmüş
+    görüntü ve referans diziler tüm denemelerde yeniden kullanılır.
+    """
+
+    def __init__(self, image: Image.Image, webp_params: dict):
+        self.image = image
+        # Kalite araması yalnızca kayıplı kodlamada anlamlı
+        self.webp_params = {**webp_params, "lossless": False}
+        self.encode_count = 0
+
+        width, height = image.size
+        max_edge = settings.QUALITY_SEARCH_PROXY_EDGE
+        if max(width, height) > max_edge:
+            scale = max_edge / max(width, height)
+            proxy_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            self.proxy = image.resize(proxy_size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+        else:
+            self.proxy = None
+
+        self._full: Dict[int, bytes] = {}
+        self._proxy: Dict[int, bytes] = {}
+        self._references: Dict[bool, np.ndarray] = {}
+
+    def _encode(self, image: Image.Image, quality: int) -> bytes:
+        buffer = io.BytesIO()
+        image.save(buffer, "webp", **{**self.webp_params, "quality": quality})
+        self.encode_count += 1
+        return buffer.getvalue()
+
+    def _encode_full(self, quality: int) -> bytes:
+        if quality not in self._full:
+            self._full[quality] = self._encode(self.image, quality)
+        return self._full[quality]
+
+    def _encode_proxy(self, quality: int) -> bytes:
+        if self.proxy is None:
+            return self._encode_full(quality)
+        if quality not in self._proxy:
+            self._proxy[quality] = self._encode(self.proxy, quality)
+        return self._proxy[quality]
+
+    @staticmethod
+    def _luma(image: Image.Image) -> np.ndarray:
+        return np.asarray(image.convert("L"), dtype=np.float32)
+
+    @staticmethod
+    def ssim(reference: np.ndarray, candidate: np.ndarray) -> float:
+        """Gri tonlamalı iki görüntü arasındaki ortalama SSIM (Wang vd. 2004)"""
+        c1 = (0.01 * 255) ** 2
+        c2 = (0.03 * 255) ** 2
+
+        def blur(array):
+            return cv2.GaussianBlur(array, (11, 11), 1.5)
+
+        mu_x = blur(reference)
+        mu_y = blur(candidate)
+        mu_xx = mu_x * mu_x
+        mu_yy = mu_y * mu_y
+        mu_xy = mu_x * mu_y
+        sigma_xx = blur(reference * reference) - mu_xx
+        sigma_yy = blur(candidate * candidate) - mu_yy
+        sigma_xy = blur(reference * candidate) - mu_xy
+
+        ssim_map = ((2 * mu_xy + c1) * (2 * sigma_xy + c2)) / (
+            (mu_xx + mu_yy + c1) * (sigma_xx + sigma_yy + c2)
+        )
+        return float(ssim_map.mean())
+
+    @classmethod
+    def measure(cls, image: Image.Image, encoded: Image.Image) -> float:
+        """Görüntü ile kodlanmış halinin SSIM'i (tek kodlamayı doğrulamak için)"""
+        return cls.ssim(cls._luma(image), cls._luma(encoded))
+
+    def _ssim_of(self, data: bytes, proxy: bool) -> float:
+        if proxy not in self._references:
+            self._references[proxy] = self._luma(self.proxy if proxy else self.image)
+        decoded = self._luma(Image.open(io.BytesIO(data)))
+        return self.ssim(self._references[proxy], decoded)
+
+    @staticmethod
+    def _bisect_last(passes: Callable[[int], bool], low: int, high: int) -> int:
+        """passes'in doğru olduğu en büyük değeri bul (yoksa low - 1)"""
+        while low <= high:
+            middle = (low + high) // 2
+            if passes(middle):
+                low = middle + 1
+            else:
+                high = middle - 1
+        return high
+
+    @staticmethod
+    def _bisect_first(passes: Callable[[int], bool], low: int, high: int) -> int:
+        """passes'in doğru olduğu en küçük değeri bul (yoksa high + 1)"""
+        while low <= high:
+            middle = (low + high) // 2
+            if passes(middle):
+                high = middle - 1
+            else:
+                low = middle + 1
+        return low
+
+    def for_size(self, target_bytes: int) -> Tuple[int, bytes, bool]:
+        """Çıktı target_bytes'ı aşmayacak en yüksek kaliteyi bul
+
+        Döndürür: (kalite, kodlanmış veri, hedefe ulaşıldı mı)
+        """
+        ratio = 1.0
+        if self.proxy is not None:
+            ratio = (self.image.size[0] * self.image.size[1]) / (self.proxy.size[0] * self.proxy.size[1])
+
+        low, high = MIN_QUALITY, MAX_QUALITY
+        best: Optional[int] = None
+        for _ in range(settings.QUALITY_SEARCH_MAX_ENCODES):
+            if low > high:
+                break
+            # Proxy boyutunu tam çözünürlüğe ölçekleyerek aday seç
+            quality = self._bisect_last(
+                lambda q: len(self._encode_proxy(q)) * ratio <= target_bytes, low, high
+            )
+            quality = max(quality, low)
+            size = len(self._encode_full(quality))
+            # Proxy -> tam çözünürlük oranını gerçek ölçümle düzelt
+            ratio = size / len(self._encode_proxy(quality))
+            if size <= target_bytes:
+                best = quality
+                low = quality + 1
+            else:
+                high = quality - 1
+
+        if best is None:
+            # Bütçe en düşük kalitede bile aşılıyor, en küçük çıktıyı döndür
+            return MIN_QUALITY, self._encode_full(MIN_QUALITY), False
+        return best, self._full[best], True
+
+    def for_ssim(self, target_ssim: float) -> Tuple[int, bytes, bool]:
+        """SSIM >= target_ssim sağlayan en düşük kaliteyi bul
+
+        Döndürür: (kalite, kodlanmış veri, hedefe ulaşıldı mı)
+        """
+        offset = 0.0
+        proxy_scores: Dict[int, float] = {}
+
+        def proxy_ssim(quality: int) -> float:
+            if quality not in proxy_scores:
+                proxy_scores[quality] = self._ssim_of(
+                    self._encode_proxy(quality), self.proxy is not None
+                )
+            return proxy_scores[quality]
+
+        low, high = MIN_QUALITY, MAX_QUALITY
+        best: Optional[int] = None
+        for _ in range(settings.QUALITY_SEARCH_MAX_ENCODES):
+            if low > high:
+                break
+            quality = self._bisect_first(
+                lambda q: proxy_ssim(q) + offset >= target_ssim, low, high
+            )
+            quality = min(quality, high)
+            score = (
+                self._ssim_of(self._encode_full(quality), False)
+                if self.proxy is not None
+                else proxy_ssim(quality)
+            )
+            # Proxy ile tam çözünürlük SSIM farkını gerçek ölçümle düzelt
+            offset = score - proxy_ssim(quality)
+            if score >= target_ssim:
+                best = quality
+                high = quality - 1
+            else:
+                low = quality + 1
+
+        if best is None:
+            return MAX_QUALITY, self._encode_full(MAX_QUALITY), False
+        return best, self._full[best], True
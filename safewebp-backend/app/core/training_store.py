@@ -0,0 +1,114 @@
+import json
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import List
+
+class TrainingSampleStore:
+    """Eğitim örneklerini süreçler arasında paylaşılan SQLite dosyasında tutar
+
+    Birden fazla uvicorn işçisi aynı dosyaya yazar; hangi işçinin modeli
+    eğiteceği de aynı veritabanındaki süreli bir kilit (lease) ile belirlenir.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            # WAL, okuyucuların yazıcıları beklememesini sağlar
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS samples (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created_at REAL NOT NULL,
+                    features TEXT NOT NULL,
+                    quality REAL NOT NULL,
+                    compression REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def add_many(self, samples: List[dict]):
+        """Örnekleri tek işlemde ekle"""
+        if not samples:
+            return
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT INTO samples (created_at, features, quality, compression) VALUES (?, ?, ?, ?)",
+                [
+                    (now, json.dumps(sample['features']), sample['quality'], sample['compression'])
+                    for sample in samples
+                ],
+            )
+            conn.execute("COMMIT")
+
+    def latest(self, limit: int) -> List[dict]:
+        """En son eklenen en fazla `limit` örneği eski->yeni sırayla döndür"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT features, quality, compression FROM samples ORDER BY id DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [
+            {'features': json.loads(features), 'quality': quality, 'compression': compression}
+            for features, quality, compression in reversed(rows)
+        ]
+
+    def max_id(self) -> int:
+        """Son örneğin kimliği (örnek yoksa 0)"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT MAX(id) FROM samples").fetchone()
+        return row[0] or 0
+
+    def get_meta(self, key: str, default: float = 0) -> float:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else default
+
+    def try_claim_fit(self, lease_seconds: float) -> bool:
+        """Eğitim hakkını al; başka bir işçi eğitiyorsa False döner"""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            # IMMEDIATE, okuma-karşılaştırma-yazma adımını süreçler arası atomik yapar
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT value FROM meta WHERE key = 'fit_lease_until'").fetchone()
+            if row is not None and row[0] > now:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('fit_lease_until', ?)",
+                (now + lease_seconds,),
+            )
+            conn.execute("COMMIT")
+        return True
+
+    def finish_fit(self, fitted_id: int):
+        """Eğitimi tamamla: hangi örneğe kadar eğitildiğini kaydet ve kilidi bırak"""
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [
+                    ('last_fit_id', fitted_id),
+                    ('last_fit_at', time.time()),
+                    ('fit_lease_until', 0),
+                ],
+            )
+            conn.execute("COMMIT")
+
+    def release_fit(self):
+        """Başarısız eğitimden sonra kilidi bırak"""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('fit_lease_until', 0)"
+            )
@@ -7,14 +7,19 @@ from fastapi import (
     BackgroundTasks,
     WebSocket,
     Form,
+    Request,
+    Response,
 )
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from typing import List, Set
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, List, Optional, Tuple
 import asyncio
+import hashlib
+import re
+import time
+import uuid
 from pathlib import Path
-import cv2
-import numpy as np
 import json
 
 from .config import settings
@@ -22,11 +27,23 @@ from .schemas.image import (
     ConversionSettings,
     ConversionResponse,
     BatchConversionResponse,
+    VariantResponse,
+    ZipDownloadRequest,
+    JobSubmitResponse,
+    JobStatusResponse,
 )
-from .utils.file_handler import FileHandler
-from .core.image_processor import ImageProcessor
-from .core.webp_optimizer import WebPOptimizer
+from .utils.file_handler import SPOOL_PREFIX, FileHandler, SpooledUpload
+from .utils.file_delivery import deliver_file, publish_content_addressed
+from .utils.upload_sweeper import UploadSweeper
+from .utils.conversion_cache import ConversionCache
+from .utils.zip_stream import iter_zip_stream
+from .utils.progress_hub import ProgressHub
+from .utils.metrics import MetricsRegistry, StageTimer, render_counter, render_gauge, server_timing_header
 from .core.ml_optimizer import MLOptimizer
+from .core.executor import ConversionExecutor
+from .core.model_trainer import ModelTrainer
+from .core.job_queue import JobQueue
+from .core.admission import MemoryBudget
 
 app = FastAPI(title=settings.PROJECT_NAME)
 
@@ -39,198 +56,414 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Statik dosya sunucusu
-app.mount("/static", StaticFiles(directory="static"), name="static")
-
 # Bağımlılıklar
 file_handler = FileHandler()
-image_processor = ImageProcessor()
-webp_optimizer = WebPOptimizer()
+conversion_cache = ConversionCache()
 ml_optimizer = MLOptimizer()
+model_trainer = ModelTrainer(ml_optimizer)
+conversion_executor = ConversionExecutor()
+job_queue = JobQueue()
+# UPLOAD_DIR için süre ve kota temizliği
+upload_sweeper = UploadSweeper()
 
-# WebSocket bağlantılarını tut
-websocket_connections: Set[WebSocket] = set()
-
-async def broadcast_progress(progress: dict):
-    """Tüm WebSocket bağlantılarına ilerleme durumunu gönder"""
-    dead_connections = set()
-    for websocket in websocket_connections:
-        try:
-            await websocket.send_json(progress)
-        except:
-            dead_connections.add(websocket)
+# Tüm istekler genelinde aynı anda çalışan dönüşüm sınırı
+conversion_semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_CONVERSIONS)
 
-    # Kapalı bağlantıları temizle
-    websocket_connections.difference_update(dead_connections)
+# Çözülmüş piksellerin tahmini bellek ihtiyacına göre kabul kontrolü
+memory_budget = MemoryBudget()
 
-@app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket bağlantısını yönet"""
-    await websocket.accept()
-    websocket_connections.add(websocket)
-    try:
-        while True:
-            await websocket.receive_text()
-    except:
-        websocket_connections.remove(websocket)
+# İş bazlı WebSocket ilerleme yayını
+progress_hub = ProgressHub()
 
-@app.post("/api/v1/convert", response_model=ConversionResponse)
-async def convert_single_image(
-    image: UploadFile = File(...),
-    conversion_settings: ConversionSettings = ConversionSettings(),
-):
-    """Tek bir görüntüyü WebP formatına dönüştür"""
-    if not file_handler.validate_file(image):
-        raise HTTPException(status_code=400, detail="Desteklenmeyen dosya formatı")
+# Prometheus metrikleri (uvicorn işçisi başına)
+metrics = MetricsRegistry()
+stage_seconds = metrics.histogram(
+    "safewebp_stage_duration_seconds", "Dönüşüm adımlarının süresi"
+)
+conversion_seconds = metrics.histogram(
+    "safewebp_conversion_duration_seconds", "Tek görüntü dönüşümünün toplam süresi"
+)
+conversions_total = metrics.counter(
+    "safewebp_conversions_total", "Sonucuna göre dönüşüm sayısı"
+)
+input_bytes_total = metrics.counter("safewebp_input_bytes_total", "Dönüştürülen girdi baytları")
+output_bytes_total = metrics.counter("safewebp_output_bytes_total", "Üretilen WebP baytları")
+bytes_saved_total = metrics.counter("safewebp_bytes_saved_total", "Dönüşümle kazanılan baytlar")
+param_reuse_total = metrics.counter(
+    "safewebp_param_reuse_total",
+    "Yakın kopya parametre indeksi sonuçları (hit, miss, fallback: hedef tutmadı)",
+)
+candidate_total = metrics.counter(
+    "safewebp_encode_candidates_total",
+    "compare_lossless ile kazanan aday ve kayıpsız adayın erken bırakılıp bırakılmadığı",
+)
+conversions_in_flight = metrics.gauge(
+    "safewebp_conversions_in_flight", "Süreç havuzunda çalışan dönüşümler"
+)
 
-    try:
-        # Dosyayı kaydet
-        input_path = await file_handler.save_upload_file(image)
-        original_size = file_handler.get_file_size(input_path)
+# Önbellek isabetinde yanıtın ilk dönüşümle aynı olması için saklanan sonuç alanları
+CACHED_RESULT_FIELDS = ("quality", "target_met", "candidate", "candidate_sizes", "passthrough", "frames")
 
-        # Görüntüyü yükle ve analiz et
-        img = file_handler.load_image(input_path)
+JOB_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
 
-        # OpenCV formatına dönüştür
-        cv_image = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
+def resolve_job_id(job_id: Optional[str]) -> str:
+    """İstemcinin verdiği iş kimliğini doğrula, yoksa yeni bir tane üret"""
+    if job_id is None:
+        return uuid.uuid4().hex
+    if not JOB_ID_PATTERN.match(job_id):
+        raise HTTPException(status_code=422, detail="Geçersiz job_id")
+    return job_id
 
-        # ML model ile optimal parametreleri tahmin et
-        optimal_quality, webp_params = ml_optimizer.predict_optimal_params(cv_image)
+@app.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket, job_id: Optional[str] = None):
+    """WebSocket bağlantısını yönet (?job_id=... ile bağlanırken abone olunabilir)"""
+    await progress_hub.serve(websocket, [job_id] if job_id else [])
+
+async def run_conversion(
+    upload: SpooledUpload,
+    content_digest: str,
+    conversion_settings: ConversionSettings,
+    output_path: Path,
+    url_prefix: str,
+    admission_timeout: Optional[float] = settings.ADMISSION_TIMEOUT,
+    timer: Optional[StageTimer] = None,
+    content_addressed: bool = False,
+) -> ConversionResponse:
+    """Okunmuş girdiyi önbellek veya süreç havuzu üzerinden dönüştür
+
+    Bellek bütçesinde yer admission_timeout saniye beklenir (None: süresiz).
+    Adım süreleri `timer` içinde toplanır ve histogramlara eklenir.
+    content_addressed ise çıktılar içerik özetli adlarla yayımlanır.
+    """
+    timer = timer or StageTimer()
+    started = time.perf_counter()
+    try:
+        response, cache_hit = await _run_conversion(
+            upload, content_digest, conversion_settings, output_path, url_prefix,
+            admission_timeout, timer, content_addressed,
+        )
+    except Exception:
+        conversions_total.inc(result="failed")
+        raise
+
+    for stage, seconds in timer.timings.items():
+        stage_seconds.observe(seconds, stage=stage)
+    conversion_seconds.observe(time.perf_counter() - started)
+    if cache_hit:
+        conversions_total.inc(result="cache_hit")
+    elif response.passthrough is not None:
+        conversions_total.inc(result="passthrough")
+    else:
+        conversions_total.inc(result="converted")
+    input_bytes_total.inc(response.original_size)
+    output_bytes_total.inc(response.converted_size)
+    bytes_saved_total.inc(max(0, response.original_size - response.converted_size))
+    return response
 
-        if conversion_settings.smart_optimize:
-            # ML tahminlerini kullan
-            quality = optimal_quality
-        else:
-            # Kullanıcı ayarlarını kullan
-            quality = conversion_settings.quality
-            webp_params = webp_optimizer.get_webp_params(
-                quality, {"is_photo": True}  # Basit varsayılan değer
+async def _run_conversion(
+    upload: SpooledUpload,
+    content_digest: str,
+    conversion_settings: ConversionSettings,
+    output_path: Path,
+    url_prefix: str,
+    admission_timeout: Optional[float],
+    timer: StageTimer,
+    content_addressed: bool,
+) -> Tuple[ConversionResponse, bool]:
+    """(yanıt, önbellekten mi geldi) döndür"""
+    cache_key = conversion_cache.make_key(content_digest, conversion_settings)
+
+    async def publish(filename: str, suffix: str = "") -> str:
+        # Önbelleğe alındıktan sonra taşınır; önbellek kaydı aynı dosyaya bağlı kalır
+        if not content_addressed:
+            return filename
+        with timer.stage("publish"):
+            published = await run_in_threadpool(
+                publish_content_addressed,
+                output_path.with_name(filename),
+                f"{upload.stem}_optimized{suffix}",
             )
-
-        # Görüntüyü optimize et
-        img = image_processor.optimize_image_size(img, quality)
-        img = image_processor.optimize_color_mode(img)
-
-        # Çıktı dosya yolu
-        output_filename = f"{input_path.stem}_optimized.webp"
-        output_path = settings.UPLOAD_DIR / output_filename
-
-        # WebP parametrelerini güncelle
-        if conversion_settings.preserve_metadata:
-            exif = img.info.get("exif")
-            icc_profile = img.info.get("icc_profile")
-            if exif is not None:
-                webp_params["exif"] = exif
-            if icc_profile is not None:
-                webp_params["icc_profile"] = icc_profile
-
-        # WebP olarak kaydet
-        img.save(output_path, "webp", **webp_params)
-        converted_size = file_handler.get_file_size(output_path)
-
-        # Sonuçları hesapla
+        return published.name
+
+    original_size = upload.size
+    quality = None
+    encode_count = 0
+    target_met = None
+    candidate = None
+    candidate_sizes = None
+    passthrough = None
+    frames = None
+    output_name = output_path.name
+    variants = None
+    # Varyantlı istekler önbelleği atlar (önbellek yalnızca ana çıktıyı tutar)
+    use_cache = settings.CACHE_ENABLED and not conversion_settings.variants
+    cached = None
+    if use_cache:
+        with timer.stage("cache"):
+            cached = await run_in_threadpool(conversion_cache.fetch, cache_key, output_path)
+    if cached is not None:
+        # Aynı girdi daha önce dönüştürüldü, kod çözmeye gerek yok; yanıt
+        # alanları ilk dönüşümün sonucundan gelir
+        converted_size = await run_in_threadpool(file_handler.get_file_size, output_path)
         reduction = ((original_size - converted_size) / original_size) * 100
+        output_name = await publish(output_name)
+        quality = cached.get("quality")
+        target_met = cached.get("target_met")
+        candidate = cached.get("candidate")
+        candidate_sizes = cached.get("candidate_sizes")
+        passthrough = cached.get("passthrough")
+        frames = cached.get("frames")
+    else:
+        # Piksel çözülmeden önce bellek ihtiyacını başlıktan tahmin et ve bütçeye kabul ettir
+        with timer.stage("admission"):
+            memory_estimate = await run_in_threadpool(
+                memory_budget.inspect, upload, conversion_settings
+            )
+            await memory_budget.acquire(memory_estimate, admission_timeout)
+        try:
+            with timer.stage("admission"):
+                await conversion_semaphore.acquire()
+            try:
+                # CPU yoğun dönüşümü süreç havuzunda çalıştır
+                conversions_in_flight.inc()
+                with timer.stage("worker"):
+                    result = await conversion_executor.run(
+                        "convert", upload, output_path, conversion_settings
+                    )
+            finally:
+                conversions_in_flight.dec()
+                conversion_semaphore.release()
+        finally:
+            memory_budget.release(memory_estimate)
+        # İşçi süreçte ölçülen adımlar (decode, features, encode, ...)
+        timer.timings.update(result["timings"])
+        output_name = result["filename"]
+        # Özgün biçimde döndürülen dosyalar önbelleğe alınmaz (önbellek yalnızca WebP tutar)
+        if use_cache and output_name == output_path.name:
+            with timer.stage("cache"):
+                await run_in_threadpool(
+                    conversion_cache.store,
+                    cache_key,
+                    output_path,
+                    {key: result[key] for key in CACHED_RESULT_FIELDS},
+                )
+        output_name = await publish(output_name)
+
+        converted_size = result["converted_size"]
+        reduction = result["reduction_percent"]
+        quality = result["quality"]
+        encode_count = result["encode_count"]
+        target_met = result["target_met"]
+        if result["param_reuse"] is not None:
+            param_reuse_total.inc(result=result["param_reuse"])
+        candidate = result["candidate"]
+        passthrough = result["passthrough"]
+        candidate_sizes = result["candidate_sizes"]
+        frames = result["frames"]
+        if candidate_sizes is not None:
+            candidate_total.inc(
+                winner=candidate,
+                lossless="aborted" if candidate_sizes["lossless"] is None else "encoded",
+            )
+        if result["variants"] is not None:
+            variants = []
+            for variant in result["variants"]:
+                variant_name = await publish(variant["filename"], f"_{variant['width']}w")
+                variants.append(VariantResponse(
+                    width=variant["width"],
+                    height=variant["height"],
+                    converted_size=variant["converted_size"],
+                    output_path=f"{url_prefix}/{variant_name}",
+                ))
+
+        # Eğitim örneğini arka plan eğiticisine gönder
+        if result["training_sample"] is not None:
+            model_trainer.submit(result["training_sample"])
+
+    response = ConversionResponse(
+        original_size=original_size,
+        converted_size=converted_size,
+        reduction_percent=reduction,
+        output_path=f"{url_prefix}/{output_name}",
+        quality=quality,
+        encode_count=encode_count,
+        target_met=target_met,
+        candidate=candidate,
+        candidate_sizes=candidate_sizes,
+        passthrough=passthrough,
+        frames=frames,
+        variants=variants,
+    )
+    return response, cached is not None
+
+async def convert_upload(
+    image: UploadFile,
+    conversion_settings: ConversionSettings,
+    timer: Optional[StageTimer] = None,
+) -> ConversionResponse:
+    """Yüklenen dosyayı oku ve dönüştür"""
+    timer = timer or StageTimer()
+    if not file_handler.validate_file(image):
+        raise HTTPException(status_code=400, detail="Desteklenmeyen dosya formatı")
 
-        # Modeli eğit
-        if conversion_settings.smart_optimize:
-            quality_score = min(
-                100, max(0, 100 - (reduction * 0.5))
-            )  # Basit kalite skoru
-            ml_optimizer.train(cv_image, quality_score, reduction / 100)
-
-        # Dosyaları temizle
-        if input_path.exists():
-            input_path.unlink()
-
-        return ConversionResponse(
-            original_size=original_size,
-            converted_size=converted_size,
-            reduction_percent=reduction,
-            output_path=f"/static/uploads/{output_filename}",
+    upload = None
+    try:
+        # Dosyayı oku, boyutu ve içerik özetini akış sırasında hesapla
+        hasher = hashlib.sha256()
+        with timer.stage("upload"):
+            upload = await file_handler.spool_upload_file(image, hasher)
+
+        # Çıktı önce benzersiz geçici adla yazılır, sonra içerik özetli adla yayımlanır
+        output_path = settings.UPLOAD_DIR / f".{uuid.uuid4().hex}.webp"
+        return await run_conversion(
+            upload,
+            hasher.hexdigest(),
+            conversion_settings,
+            output_path,
+            "/static/uploads",
+            timer=timer,
+            content_addressed=True,
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
-        # Hata durumunda dosyaları temizle
-        if "input_path" in locals() and input_path.exists():
-            input_path.unlink()
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Diske taşmış geçici dosyayı temizle
+        if upload is not None:
+            upload.cleanup()
+
+def published_output_path(filename: str, directory: Optional[Path] = None) -> Optional[Path]:
+    """İstemciye verilebilecek çıktının klasör (varsayılan UPLOAD_DIR) içindeki yolu
+
+    Yalnızca dosya adı kullanılır, klasör dışına çıkılamaz. Geçici
+    dosyalar (yarım çıktılar, diske taşan yüklemeler) için None döner.
+    """
+    name = Path(filename).name
+    if not name or name.startswith(".") or name.startswith(SPOOL_PREFIX):
+        return None
+    return (directory or settings.UPLOAD_DIR) / name
+
+@app.api_route("/static/uploads/{filename}", methods=["GET", "HEAD"])
+async def get_output_file(request: Request, filename: str):
+    """Dönüştürülmüş çıktıyı indir
+
+    İçerik özetli adlar immutable önbelleklenir; ETag, If-None-Match ve
+    Range desteklenir. Geçici dosyalar (yarım çıktılar, yüklemeler) sunulmaz.
+    """
+    path = published_output_path(filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Dosya bulunamadı")
+    return deliver_file(request, path)
 
-@app.post("/api/v1/convert-batch", response_model=BatchConversionResponse)
-async def convert_batch_images(
-    images: List[UploadFile] = File(...), 
-    conversion_settings: str = Form(...)
+@app.post("/api/v1/convert", response_model=ConversionResponse)
+async def convert_single_image(
+    response: Response,
+    image: UploadFile = File(...),
+    conversion_settings: ConversionSettings = ConversionSettings(),
 ):
-    """Birden fazla görüntüyü WebP formatına dönüştür"""
-    print("Received conversion settings:", conversion_settings)  # Debug için
+    """Tek bir görüntüyü WebP formatına dönüştür
 
-    if not images:
-        raise HTTPException(status_code=400, detail="Dosya yüklenmedi")
+    Adım süreleri Server-Timing başlığında döner.
+    """
+    timer = StageTimer()
+    result = await convert_upload(image, conversion_settings, timer)
+    response.headers["Server-Timing"] = server_timing_header(timer.timings)
+    return result
 
+def parse_batch_settings(conversion_settings: str) -> ConversionSettings:
+    """Form alanındaki JSON ayarlarını doğrula"""
     try:
         # Settings'i parse et
         settings_dict = json.loads(conversion_settings)
-        print("Parsed settings:", settings_dict)  # Debug için
-
-        settings = ConversionSettings(**settings_dict)
-        print("Converted to ConversionSettings:", settings)  # Debug için
+        return ConversionSettings(**settings_dict)
     except Exception as e:
-        print("Error parsing settings:", str(e))  # Debug için
         raise HTTPException(status_code=422, detail=f"Geçersiz ayarlar: {str(e)}")
 
-    results = []
-    total_original = 0
-    total_converted = 0
-    failed_files = []
+def new_batch_totals() -> dict:
+    return {
+        "original": 0,
+        "converted": 0,
+        "processed_files": 0,
+        "converted_files": 0,
+        "failed_files": 0,
+        # Dosyalar genelinde toplanan adım süreleri (saniye)
+        "timings": {},
+    }
 
-    for index, image in enumerate(images):
-        try:
-            print(f"Processing image {index + 1}/{len(images)}: {image.filename}")  # Debug için
+async def iter_batch_results(
+    images: List[UploadFile], batch_settings: ConversionSettings, totals: dict, job_id: str
+):
+    """Dosyaları eşzamanlı dönüştür, her biri bittikçe sonucunu üret
 
-            # İlerleme durumunu başlangıçta gönder
-            progress = {
-                "current_file": image.filename,
-                "progress": (index / len(images)) * 100,
-                "total_files": len(images),
-                "processed_files": index,
-                "total_saved": total_original - total_converted,
-            }
-            await broadcast_progress(progress)
+    (index, filename, result, error) döner; toplamlar `totals` içinde
+    güncellenir ve ilerleme job_id abonelerine WebSocket üzerinden yayınlanır.
+    """
+    total_files = len(images)
+    completed: asyncio.Queue = asyncio.Queue()
 
-            # Görüntüyü dönüştür
-            result = await convert_single_image(image, settings)
-            print(f"Conversion result for {image.filename}:", result)  # Debug için
+    # Tek bir batch'in havuzu tekelleştirmemesi için eşzamanlılık sınırı
+    batch_semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
 
-            results.append(result)
+    async def process_image(index: int, image: UploadFile):
+        async with batch_semaphore:
+            # İlerleme durumunu başlangıçta gönder
+            progress_hub.publish(job_id, {
+                "current_file": image.filename,
+                "progress": (totals["processed_files"] / total_files) * 100,
+                "total_files": total_files,
+                "processed_files": totals["processed_files"],
+                "total_saved": totals["original"] - totals["converted"],
+            })
 
-            total_original += result.original_size
-            total_converted += result.converted_size
+            try:
+                # Görüntüyü dönüştür
+                timer = StageTimer()
+                try:
+                    result = await convert_upload(image, batch_settings, timer)
+                finally:
+                    for stage, seconds in timer.timings.items():
+                        totals["timings"][stage] = totals["timings"].get(stage, 0.0) + seconds
+            except Exception as e:
+                totals["processed_files"] += 1
+                totals["failed_files"] += 1
+                error = getattr(e, "detail", None) or str(e)
+                completed.put_nowait((index, image.filename, None, str(error)))
+                return
+
+            totals["original"] += result.original_size
+            totals["converted"] += result.converted_size
+            totals["processed_files"] += 1
+            totals["converted_files"] += 1
+            completed.put_nowait((index, image.filename, result, None))
 
             # İlerleme durumunu güncelle
-            progress.update({
-                "progress": ((index + 1) / len(images)) * 100,
-                "processed_files": index + 1,
-                "total_saved": total_original - total_converted,
+            progress_hub.publish(job_id, {
+                "current_file": image.filename,
+                "progress": (totals["processed_files"] / total_files) * 100,
+                "total_files": total_files,
+                "processed_files": totals["processed_files"],
+                "total_saved": totals["original"] - totals["converted"],
                 "current_reduction": result.reduction_percent,
             })
-            await broadcast_progress(progress)
-
-        except Exception as e:
-            import traceback
-            print(f"Error processing {image.filename}:")
-            print(traceback.format_exc())  # Detaylı hata mesajı
-            
-            failed_files.append({"filename": image.filename, "error": str(e)})
-            continue
-
-    if not results:
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "message": "Hiçbir dosya dönüştürülemedi",
-                "failed_files": failed_files,
-            },
-        )
 
+    tasks = [
+        asyncio.create_task(process_image(index, image))
+        for index, image in enumerate(images)
+    ]
+    try:
+        for _ in range(total_files):
+            yield await completed.get()
+    finally:
+        # İstemci bağlantıyı koparırsa kalan işleri iptal et
+        for task in tasks:
+            task.cancel()
+
+def finish_batch(total_files: int, totals: dict, job_id: str) -> float:
+    """Son ilerleme durumunu gönder ve ortalama kazancı döndür"""
+    total_original = totals["original"]
+    total_converted = totals["converted"]
     avg_reduction = (
         ((total_original - total_converted) / total_original) * 100
         if total_original > 0
@@ -240,53 +473,444 @@ async def convert_batch_images(
     # Son durumu gönder
     final_progress = {
         "progress": 100,
-        "total_files": len(images),
-        "processed_files": len(results),
-        "failed_files": len(failed_files),
+        "total_files": total_files,
+        "processed_files": totals["converted_files"],
+        "failed_files": totals["failed_files"],
         "total_saved": total_original - total_converted,
         "average_reduction": avg_reduction,
     }
-    await broadcast_progress(final_progress)
+    progress_hub.publish(job_id, final_progress)
+    return avg_reduction
 
-    response = BatchConversionResponse(
+@app.post("/api/v1/convert-batch", response_model=BatchConversionResponse)
+async def convert_batch_images(
+    http_response: Response,
+    images: List[UploadFile] = File(...), 
+    conversion_settings: str = Form(...),
+    job_id: Optional[str] = Form(default=None),
+):
+    """Birden fazla görüntüyü WebP formatına dönüştür
+
+    İlerleme, /ws üzerinden job_id'ye abone olan istemcilere gönderilir.
+    Server-Timing başlığı adım sürelerinin dosyalar genelindeki toplamını verir.
+    """
+    if not images:
+        raise HTTPException(status_code=400, detail="Dosya yüklenmedi")
+
+    batch_settings = parse_batch_settings(conversion_settings)
+    job_id = resolve_job_id(job_id)
+
+    total_files = len(images)
+    ordered_results: List[Optional[ConversionResponse]] = [None] * total_files
+    failures: Dict[int, dict] = {}
+    totals = new_batch_totals()
+
+    async for index, filename, result, error in iter_batch_results(
+        images, batch_settings, totals, job_id
+    ):
+        if error is None:
+            ordered_results[index] = result
+        else:
+            failures[index] = {"filename": filename, "error": error}
+
+    # Sonuçları giriş sırasına göre topla
+    results = [result for result in ordered_results if result is not None]
+    failed_files = [failures[index] for index in sorted(failures)]
+
+    if not results:
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "message": "Hiçbir dosya dönüştürülemedi",
+                "failed_files": failed_files,
+            },
+        )
+
+    avg_reduction = finish_batch(total_files, totals, job_id)
+    http_response.headers["Server-Timing"] = server_timing_header(totals["timings"])
+
+    return BatchConversionResponse(
+        job_id=job_id,
+        total_files=len(results),
+        total_original_size=totals["original"],
+        total_converted_size=totals["converted"],
+        average_reduction=avg_reduction,
+        files=results,
+        failed_files=failed_files,
+    )
+
+@app.post("/api/v1/convert-batch/stream")
+async def convert_batch_images_stream(
+    images: List[UploadFile] = File(...),
+    conversion_settings: str = Form(...),
+    job_id: Optional[str] = Form(default=None),
+):
+    """Birden fazla görüntüyü dönüştür, her sonucu bittiği anda NDJSON satırı olarak gönder
+
+    Her dosya için bir "file" veya "error" satırı, en sonda bir "summary"
+    satırı yazılır. Sonuçlar tamamlanma sırasındadır; "index" alanı giriş
+    sırasını verir.
+    """
+    if not images:
+        raise HTTPException(status_code=400, detail="Dosya yüklenmedi")
+
+    batch_settings = parse_batch_settings(conversion_settings)
+    job_id = resolve_job_id(job_id)
+    total_files = len(images)
+
+    async def stream_results():
+        totals = new_batch_totals()
+        failed_files = []
+
+        async for index, filename, result, error in iter_batch_results(
+            images, batch_settings, totals, job_id
+        ):
+            if error is None:
+                line = {
+                    "type": "file",
+                    "index": index,
+                    "filename": filename,
+                    "result": result.model_dump(),
+                }
+            else:
+                failed = {"filename": filename, "error": error}
+                failed_files.append(failed)
+                line = {"type": "error", "index": index, **failed}
+            yield json.dumps(line) + "\n"
+
+        avg_reduction = finish_batch(total_files, totals, job_id)
+        yield json.dumps({
+            "type": "summary",
+            "job_id": job_id,
+            "total_files": totals["converted_files"],
+            "total_original_size": totals["original"],
+            "total_converted_size": totals["converted"],
+            "average_reduction": avg_reduction,
+            "failed_files": failed_files,
+        }) + "\n"
+
+    return StreamingResponse(
+        stream_results(),
+        media_type="application/x-ndjson",
+        headers={"X-Job-Id": job_id},
+    )
+
+@app.post("/api/v1/download-zip")
+async def download_zip(request: ZipDownloadRequest):
+    """Dönüştürülmüş dosyaları tek bir ZIP akışı olarak indir"""
+    entries = []
+    seen = set()
+    for output_path in request.files:
+        path = published_output_path(output_path)
+        if path is None or not path.is_file():
+            raise HTTPException(status_code=404, detail=f"Dosya bulunamadı: {output_path}")
+        if path.name not in seen:
+            seen.add(path.name)
+            entries.append((path.name, path))
+
+    # Senkron üreteç, StreamingResponse tarafından iş parçacığı havuzunda tüketilir
+    return StreamingResponse(
+        iter_zip_stream(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="safewebp.zip"'},
+    )
+
+async def process_job_file(item: dict) -> dict:
+    """Kuyruktan alınan dosyayı dönüştür; sonuç iş kaydına yazılır"""
+    job_id = item["job_id"]
+    upload = SpooledUpload(item["filename"], item["size"], path=Path(item["input_path"]))
+    job_settings = ConversionSettings.model_validate_json(item["settings"])
+
+    # Aynı işteki aynı isimli dosyalar çakışmasın diye sıra numarası eklenir
+    output_dir = job_queue.output_dir(job_id)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"{item['index']}_{upload.stem}_optimized.webp"
+
+    # Kuyruktaki işler bütçede yer açılana kadar bekler
+    result = await run_conversion(
+        upload,
+        item["digest"],
+        job_settings,
+        output_path,
+        f"/api/v1/jobs/{job_id}/files",
+        admission_timeout=None,
+    )
+    return result.model_dump()
+
+def publish_job_progress(job_id: str, progress: dict):
+    """Kuyruk ilerlemesini batch ile aynı biçimde WebSocket abonelerine gönder"""
+    processed = progress["completed_files"] + progress["failed_files"]
+    progress_hub.publish(job_id, {
+        "status": progress["status"],
+        "current_file": progress["current_file"],
+        "progress": (processed / progress["total_files"]) * 100,
+        "total_files": progress["total_files"],
+        "processed_files": processed,
+        "failed_files": progress["failed_files"],
+    })
+
+async def get_job_or_404(job_id: str) -> dict:
+    if not JOB_ID_PATTERN.match(job_id):
+        raise HTTPException(status_code=404, detail="İş bulunamadı")
+    job = await run_in_threadpool(job_queue.store.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="İş bulunamadı")
+    return job
+
+@app.post("/api/v1/jobs", response_model=JobSubmitResponse, status_code=202)
+async def submit_job(
+    images: List[UploadFile] = File(...),
+    conversion_settings: str = Form(...),
+    job_id: Optional[str] = Form(default=None),
+):
+    """Görüntüleri kalıcı kuyruğa ekle ve hemen dön
+
+    Durum GET /api/v1/jobs/{job_id} ile sorgulanır; ilerleme ayrıca /ws
+    üzerinden job_id abonelerine gönderilir. İşler yeniden başlatmadan sonra
+    kaldıkları yerden devam eder.
+    """
+    if not images:
+        raise HTTPException(status_code=400, detail="Dosya yüklenmedi")
+    for image in images:
+        if not file_handler.validate_file(image):
+            raise HTTPException(
+                status_code=400, detail=f"Desteklenmeyen dosya formatı: {image.filename}"
+            )
+
+    batch_settings = parse_batch_settings(conversion_settings)
+    job_id = resolve_job_id(job_id)
+    if await run_in_threadpool(job_queue.store.get_job, job_id) is not None:
+        raise HTTPException(status_code=409, detail="Bu job_id zaten kullanılıyor")
+
+    # Girdiler UPLOAD_DIR dışında tutulur, süre ve kota temizliği bekleyen işleri silmez
+    input_dir = job_queue.job_dir(job_id) / "inputs"
+    input_dir.mkdir(parents=True, exist_ok=True)
+    files = []
+    try:
+        for index, image in enumerate(images):
+            hasher = hashlib.sha256()
+            upload = await file_handler.persist_upload_file(
+                image, input_dir / f"{index}{Path(image.filename).suffix.lower()}", hasher
+            )
+            files.append({
+                "filename": image.filename,
+                "input_path": upload.path,
+                "size": upload.size,
+                "digest": hasher.hexdigest(),
+            })
+        created = await run_in_threadpool(
+            job_queue.store.create_job, job_id, batch_settings.model_dump_json(), files
+        )
+    except BaseException:
+        import shutil
+        shutil.rmtree(job_queue.job_dir(job_id), ignore_errors=True)
+        raise
+    if not created:
+        raise HTTPException(status_code=409, detail="Bu job_id zaten kullanılıyor")
+
+    job_queue.notify()
+    return JobSubmitResponse(job_id=job_id, status="queued", total_files=len(files))
+
+@app.get("/api/v1/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str):
+    """İşin durumunu ve o ana kadar tamamlanan dosya sonuçlarını döndür"""
+    job = await get_job_or_404(job_id)
+    return JobStatusResponse(
+        **job,
+        completed_files=sum(item["status"] == "completed" for item in job["files"]),
+        failed_files=sum(item["status"] == "failed" for item in job["files"]),
+    )
+
+@app.get("/api/v1/jobs/{job_id}/result", response_model=BatchConversionResponse)
+async def get_job_result(job_id: str):
+    """Biten işin sonucunu /convert-batch yanıtı biçiminde döndür"""
+    job = await get_job_or_404(job_id)
+    if job["status"] not in ("completed", "failed"):
+        raise HTTPException(status_code=409, detail="İş henüz tamamlanmadı")
+
+    results = [
+        ConversionResponse(**item["result"])
+        for item in job["files"]
+        if item["status"] == "completed"
+    ]
+    failed_files = [
+        {"filename": item["filename"], "error": item["error"]}
+        for item in job["files"]
+        if item["status"] == "failed"
+    ]
+    total_original = sum(result.original_size for result in results)
+    total_converted = sum(result.converted_size for result in results)
+    return BatchConversionResponse(
+        job_id=job_id,
         total_files=len(results),
         total_original_size=total_original,
         total_converted_size=total_converted,
-        average_reduction=avg_reduction,
+        average_reduction=(
+            ((total_original - total_converted) / total_original) * 100
+            if total_original > 0
+            else 0
+        ),
         files=results,
         failed_files=failed_files,
     )
 
-    print("Final response:", response)  # Debug için
-    return response
+@app.api_route("/api/v1/jobs/{job_id}/files/{filename}", methods=["GET", "HEAD"])
+async def get_job_file(request: Request, job_id: str, filename: str):
+    """İşin çıktı dosyasını indir (ETag ile yeniden doğrulama ve Range desteklenir)
+
+    Yazılmakta olan geçici dosyalar sunulmaz.
+    """
+    await get_job_or_404(job_id)
+    path = published_output_path(filename, job_queue.output_dir(job_id))
+    if path is None:
+        raise HTTPException(status_code=404, detail="Dosya bulunamadı")
+    return deliver_file(request, path)
+
+@app.get("/api/v1/jobs/{job_id}/zip")
+async def download_job_zip(job_id: str):
+    """İşin tamamlanan çıktılarını tek bir ZIP akışı olarak indir
+
+    Kayıtlar klasör taramasından değil tamamlanan sonuçlardan alınır;
+    yazılmakta olan veya yeniden adlandırılacak geçici dosyalar arşive girmez.
+    """
+    job = await get_job_or_404(job_id)
+    output_dir = job_queue.output_dir(job_id)
+    entries = []
+    for item in job["files"]:
+        if item["status"] != "completed":
+            continue
+        result = item["result"]
+        output_paths = [result["output_path"]]
+        output_paths += [variant["output_path"] for variant in result.get("variants") or []]
+        for output_path in output_paths:
+            path = published_output_path(output_path, output_dir)
+            if path is not None and path.is_file():
+                entries.append((path.name, path))
+    if not entries:
+        raise HTTPException(status_code=404, detail="İşin henüz çıktısı yok")
+    return StreamingResponse(
+        iter_zip_stream(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="safewebp-{job_id}.zip"'},
+    )
 
 @app.get("/api/v1/health")
 async def health_check():
     """API sağlık kontrolü"""
+    # SQLite kilitliyse olay döngüsü beklemesin
+    job_stats = await run_in_threadpool(job_queue.store.stats)
     return {
         "status": "healthy",
         "ml_model": "active" if ml_optimizer.model is not None else "initializing",
+        "cache": conversion_cache.stats(),
+        "websocket": progress_hub.stats(),
+        "jobs": job_stats,
+        "memory": memory_budget.stats(),
+        "uploads": upload_sweeper.stats(),
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus metin biçiminde metrikler"""
+    cache_stats = conversion_cache.stats()
+    memory_stats = memory_budget.stats()
+    websocket_stats = progress_hub.stats()
+    # SQLite sorguları iş parçacığında; kilitli veritabanı diğer istekleri durdurmasın
+    job_stats = await run_in_threadpool(job_queue.store.stats)
+    training_samples = await run_in_threadpool(model_trainer.store.max_id)
+    last_fit_at = await run_in_threadpool(model_trainer.store.get_meta, "last_fit_at")
+    upload_stats = upload_sweeper.stats()
+
+    lines = []
+    lines += render_gauge(
+        "safewebp_admission_waiting", "Bellek bütçesinde yer bekleyen dönüşümler", memory_stats["waiting"]
+    )
+    lines += render_gauge(
+        "safewebp_memory_reserved_bytes", "Kabul edilen dönüşümlerin tahmini belleği", memory_stats["in_use_bytes"]
+    )
+    lines += render_gauge(
+        "safewebp_memory_budget_bytes", "Dönüşüm bellek bütçesi", memory_stats["budget_bytes"]
+    )
+    lines += render_counter(
+        "safewebp_admission_rejected_total", "Bütçe veya piksel sınırı nedeniyle reddedilenler", memory_stats["rejected"]
+    )
+    lines += render_counter(
+        "safewebp_admission_timeouts_total", "Bütçede yer bulamayıp 503 dönenler", memory_stats["timeouts"]
+    )
+    lines += render_gauge(
+        "safewebp_job_queue_pending_files", "Kalıcı kuyrukta bekleyen veya işlenen dosyalar", job_stats["pending_files"]
+    )
+    lines += render_gauge(
+        "safewebp_jobs",
+        "Durumlarına göre kuyruk işleri",
+        [({"status": status}, count) for status, count in sorted(job_stats["jobs"].items())],
+    )
+    lines += render_counter("safewebp_cache_hits_total", "Dönüşüm önbelleği isabetleri", cache_stats["hits"])
+    lines += render_counter("safewebp_cache_misses_total", "Dönüşüm önbelleği ıskaları", cache_stats["misses"])
+    lines += render_counter("safewebp_cache_evictions_total", "Önbellekten çıkarılan kayıtlar", cache_stats["evictions"])
+    lines += render_gauge("safewebp_cache_entries", "Önbellekteki kayıt sayısı", cache_stats["entries"])
+    lines += render_gauge("safewebp_cache_bytes", "Önbelleğin disk kullanımı", cache_stats["bytes"])
+    lines += render_gauge(
+        "safewebp_upload_dir_bytes", "UPLOAD_DIR disk kullanımı (son taramada)", upload_stats["bytes"]
+    )
+    lines += render_gauge(
+        "safewebp_upload_dir_files", "UPLOAD_DIR'deki yayımlanmış çıktılar (son taramada)", upload_stats["files"]
+    )
+    lines += render_counter(
+        "safewebp_upload_dir_removed_total",
+        "UPLOAD_DIR'den silinen dosyalar (expired: süre, evicted: kota)",
+        [({"reason": "expired"}, upload_stats["expired"]), ({"reason": "evicted"}, upload_stats["evicted"])],
+    )
+    lines += render_gauge(
+        "safewebp_model_training_queue_depth", "Diske yazılmayı bekleyen eğitim örnekleri", model_trainer.queue.qsize()
+    )
+    lines += render_counter(
+        "safewebp_model_training_samples_total", "Kalıcı depodaki eğitim örneği sayısı", training_samples
+    )
+    lines += render_gauge(
+        "safewebp_model_last_fit_timestamp_seconds",
+        "Modelin son eğitildiği zaman",
+        last_fit_at,
+    )
+    lines += render_gauge(
+        "safewebp_websocket_connections", "Açık WebSocket bağlantıları", websocket_stats["connections"]
+    )
+    lines += render_gauge(
+        "safewebp_websocket_dropped_updates", "Yavaş istemciler için atlanan ilerleme güncellemeleri", websocket_stats["dropped_updates"]
+    )
+    return PlainTextResponse(
+        metrics.render(lines), media_type="text/plain; version=0.0.4"
+    )
+
 # Temizlik işlevi
 @app.on_event("startup")
 async def startup_event():
-    """Başlangıçta upload klasörünü temizle"""
-    import shutil
-
-    if settings.UPLOAD_DIR.exists():
-        shutil.rmtree(settings.UPLOAD_DIR)
+    """Arka plan görevlerini başlat"""
+    # Çıktılar yeniden başlatmada silinmez (içerik özetli URL'ler önbelleklerde
+    # geçerli kalır); süre ve kota temizliği ilk taramayla hemen başlar.
+    # Kuyruktaki işler JOBS_DIR'de tutulur ve bu temizlikten etkilenmez.
     settings.UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    upload_sweeper.start()
+
+    # Dönüşüm işçilerini önceden başlat
+    await conversion_executor.warmup()
+
+    # Model eğiticisini başlat
+    model_trainer.start()
+
+    # Kalıcı kuyruğu boşaltmaya başla (önceki çalıştırmadan kalan işler dahil)
+    job_queue.start(process_job_file, publish_job_progress)
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Kapanışta WebSocket bağlantılarını kapat"""
-    for websocket in websocket_connections:
-        try:
-            await websocket.close()
-        except:
-            pass
-    websocket_connections.clear()
+    """Kapanışta kuyruk işçilerini, WebSocket bağlantılarını, süreç havuzunu ve eğiticiyi kapat"""
+    await job_queue.stop()
+    await upload_sweeper.stop()
+    await progress_hub.close_all()
+
+    # Dönüşüm süreç havuzunu ve model eğiticisini kapat
+    conversion_executor.shutdown()
+    model_trainer.stop()
 
 if __name__ == "__main__":
     import uvicorn
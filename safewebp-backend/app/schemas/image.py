@@ -1,6 +1,6 @@
 # app/schemas/image.py
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Dict, List, Optional
 from fastapi import Form
 import json
 
@@ -8,6 +8,25 @@ class ConversionSettings(BaseModel):
     quality: int = Field(ge=1, le=100, default=80)
     preserve_metadata: bool = True
     smart_optimize: bool = True
+    # Hedef modları: kalite, çıktı bu bayt bütçesine veya SSIM tabanına göre aranır
+    target_size: Optional[int] = Field(default=None, ge=1)
+    target_ssim: Optional[float] = Field(default=None, gt=0, le=1)
+    # Duyarlı görseller (srcset) için ek çıktı genişlikleri, ör. [320, 640, 1280]
+    variants: Optional[List[int]] = Field(default=None, max_length=16)
+    # Kayıplı ve kayıpsız kodlamayı paralel dene, küçük olanı kullan
+    compare_lossless: bool = False
+
+    @model_validator(mode="after")
+    def check_variants(self):
+        if self.variants and any(width < 1 for width in self.variants):
+            raise ValueError("Varyant genişlikleri pozitif olmalı")
+        return self
+
+    @model_validator(mode="after")
+    def check_single_target(self):
+        if self.target_size is not None and self.target_ssim is not None:
+            raise ValueError("target_size ve target_ssim birlikte kullanılamaz")
+        return self
 
     @classmethod
     def from_form(cls, settings_json: str = Form(default=None)):
@@ -19,13 +38,33 @@ class ConversionSettings(BaseModel):
                 return cls()
         return cls()
 
+class VariantResponse(BaseModel):
+    width: int
+    height: int
+    converted_size: int
+    output_path: str
+
 class ConversionResponse(BaseModel):
     original_size: int
     converted_size: int
     reduction_percent: float
     output_path: str
+    quality: Optional[int] = None
+    encode_count: int = 1
+    target_met: Optional[bool] = None
+    # compare_lossless ile kazanan aday ("lossy"/"lossless") ve aday boyutları
+    # (kayıpsız aday erken bırakıldıysa boyutu None)
+    candidate: Optional[str] = None
+    candidate_sizes: Optional[Dict[str, Optional[int]]] = None
+    # Dönüşüm kazandırmadığı için özgün baytlar döndürüldüyse nedeni
+    # ("tiny", "within_target", "webp_quality", "larger_output")
+    passthrough: Optional[str] = None
+    # Animasyonlu girdilerde kaynak ve (aynı kareler atıldıktan sonra) kodlanan kare sayısı
+    frames: Optional[Dict[str, int]] = None
+    variants: Optional[List[VariantResponse]] = None
 
 class BatchConversionResponse(BaseModel):
+    job_id: Optional[str] = None
     total_files: int
     total_original_size: int
     total_converted_size: int
@@ -33,6 +72,33 @@ class BatchConversionResponse(BaseModel):
     files: List[ConversionResponse]
     failed_files: Optional[List[dict]] = None
 
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status: str
+    total_files: int
+
+class JobFileStatus(BaseModel):
+    index: int
+    filename: str
+    status: str  # queued, running, completed, failed
+    result: Optional[ConversionResponse] = None
+    error: Optional[str] = None
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str  # queued, running, completed, failed
+    created_at: float
+    updated_at: float
+    total_files: int
+    completed_files: int
+    failed_files: int
+    # Dosyalar tamamlandıkça sonuçları buradan alınabilir
+    files: List[JobFileStatus]
+
+class ZipDownloadRequest(BaseModel):
+    # Batch yanıtındaki output_path değerleri
+    files: List[str] = Field(min_length=1)
+
 class ErrorResponse(BaseModel):
     detail: str
     file: Optional[str] = None
\ No newline at end of file
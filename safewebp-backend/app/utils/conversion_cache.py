@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from ..config import settings
+
+class ConversionCache:
+    """Girdi içeriği + ayarlara göre adreslenen, boyutu sınırlı WebP önbelleği
+
+    Anahtar, yüklenen baytların SHA-256 özeti ile etkin dönüşüm ayarlarından
+    türetilir. Kayıtlar diskte tutulur ve tüm uvicorn işçileri aynı klasörü
+    paylaşır: arama doğrudan dosyaya bakar, kota da klasör taranarak
+    uygulanır. Son kullanım sırası dosyaların mtime değeridir; en az
+    kullanılan önce silinir. Her kaydın yanında dönüşüm sonucunun meta
+    verisi (kalite, hedef sonucu, ...) JSON olarak tutulur ve kayıtla
+    birlikte silinir; isabetler ilk dönüşümle aynı yanıtı verir.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        max_bytes: Optional[int] = None,
+        scan_interval: Optional[float] = None,
+    ):
+        self.cache_dir = Path(cache_dir or settings.CACHE_DIR)
+        self.max_bytes = settings.CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.scan_interval = settings.CACHE_SCAN_INTERVAL if scan_interval is None else scan_interval
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Son taramadaki klasör durumu ve o zamandan beri bu süreçte eklenenler
+        self._entries = 0
+        self._total_bytes = 0
+        self._last_scan = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._enforce_quota()
+
+    def _enforce_quota(self):
+        """Klasörü tara, kota aşılıyorsa en eski kayıtları sil"""
+        entries = []
+        total_bytes = 0
+        with os.scandir(self.cache_dir) as scan:
+            for entry in scan:
+                if not entry.name.endswith(".webp"):
+                    continue
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+                total_bytes += stat.st_size
+
+        if total_bytes > self.max_bytes:
+            entries.sort(key=lambda item: item[0])
+            while entries and total_bytes > self.max_bytes:
+                _, size, path = entries.pop(0)
+                try:
+                    path.unlink()
+                    self.evictions += 1
+                except FileNotFoundError:
+                    # Başka bir işçi önce silmiş
+                    pass
+                self._metadata_path(path.stem).unlink(missing_ok=True)
+                total_bytes -= size
+
+        self._entries = len(entries)
+        self._total_bytes = total_bytes
+        self._last_scan = time.monotonic()
+
+    @staticmethod
+    def make_key(content_digest: str, conversion_settings) -> str:
+        """Girdi özeti ve çıktıyı etkileyen ayarlardan önbellek anahtarı üret"""
+        effective = conversion_settings.model_dump()
+        if effective.get("smart_optimize"):
+            # Akıllı optimizasyonda kalite modelden gelir, kullanıcı değeri etkisiz
+            effective.pop("quality", None)
+        payload = json.dumps(effective, sort_keys=True, default=str)
+        return hashlib.sha256(f"{content_digest}:{payload}".encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.webp"
+
+    def _metadata_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    @staticmethod
+    def _link_or_copy(source: Path, destination: Path):
+        """Dosyayı hedefe atomik olarak bağla, mümkün değilse kopyala"""
+        tmp_path = destination.with_name(
+            f".{destination.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        try:
+            os.link(source, tmp_path)
+        except OSError:
+            shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, destination)
+
+    def fetch(self, key: str, output_path: Path) -> Optional[dict]:
+        """Kayıt varsa çıktı yoluna yerleştir ve sonuç meta verisini döndür; yoksa None"""
+        path = self._path(key)
+        try:
+            # Meta veri dosyadan önce yazılır ve sonra silinir, önce o okunur
+            metadata = json.loads(self._metadata_path(key).read_text())
+            self._link_or_copy(path, output_path)
+            os.utime(path)  # LRU sırası tüm işçiler için güncellenir
+        except (FileNotFoundError, ValueError):
+            # Kayıt yok, başka bir işçi tarafından silinmiş ya da yarım kalmış
+            self.misses += 1
+            return None
+        self.hits += 1
+        return metadata
+
+    def store(self, key: str, output_path: Path, metadata: Optional[dict] = None):
+        """Yeni üretilen çıktıyı meta verisiyle önbelleğe ekle ve gerekirse eski kayıtları sil
+
+        Hatalar yalnızca yazdırılır; dönüşüm önbelleğe alınamasa da başarılıdır.
+        """
+        try:
+            size = output_path.stat().st_size
+            if size > self.max_bytes:
+                return
+            metadata_path = self._metadata_path(key)
+            tmp_path = metadata_path.with_name(
+                f".{metadata_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+            )
+            tmp_path.write_text(json.dumps(metadata or {}))
+            os.replace(tmp_path, metadata_path)
+            self._link_or_copy(output_path, self._path(key))
+            with self._lock:
+                self._entries += 1
+                self._total_bytes += size
+                # Diğer işçilerin eklediklerini görmek için klasör aralıklarla taranır
+                if (
+                    self._total_bytes > self.max_bytes
+                    or time.monotonic() - self._last_scan > self.scan_interval
+                ):
+                    self._enforce_quota()
+        except Exception as e:
+            print(f"Error in ConversionCache.store: {str(e)}")
+
+    def stats(self) -> dict:
+        """Önbellek sayaçlarını döndür (kayıt ve bayt sayısı son taramaya göre)"""
+        return {
+            "entries": self._entries,
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,217 @@
+import hashlib
+import mimetypes
+import os
+import re
+from pathlib import Path
+from typing import Optional, Tuple
+
+import anyio
+from fastapi import HTTPException, Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from ..config import settings
+from .file_handler import SPOOL_PREFIX
+
+# Yayımlanan adlardaki içerik özeti uzunluğu (hex, 64 bit)
+CONTENT_HASH_LENGTH = 16
+# {ad}.{özet}.{uzantı}: aynı ad her zaman aynı içeriği gösterir
+CONTENT_NAME_PATTERN = re.compile(r"\.([0-9a-f]{%d})\.[A-Za-z0-9]+$" % CONTENT_HASH_LENGTH)
+# Dosya adında kullanılabilecek karakterler (geri kalanı "-" olur)
+UNSAFE_NAME_CHARS = re.compile(r"[^A-Za-z0-9_-]+")
+# Sendfile yokken dosyanın okunduğu parça boyutu
+CHUNK_SIZE = 256 * 1024
+# ASGI sıfır kopya gönderim uzantısı (sunucu destekliyorsa scope'ta bildirilir)
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+# Sistemin mime.types dosyasında olmayabilir
+mimetypes.add_type("image/webp", ".webp")
+
+def publish_content_addressed(path: Path, stem: str) -> Path:
+    """Dosyayı içerik özetli ada ({stem}.{özet}{uzantı}) taşı ve yeni yolu döndür
+
+    Aynı içerik aynı adı alır; ad zaten varsa geçici dosya silinir ve var
+    olan dosya kullanılır. Süre sınırı yayım anından sayılsın diye mtime
+    güncellenir. Ad hiçbir zaman geçici dosya adı (nokta veya SPOOL_PREFIX
+    önekli) olarak yorumlanamaz.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        while chunk := source.read(1024 * 1024):
+            digest.update(chunk)
+    safe_stem = UNSAFE_NAME_CHARS.sub("-", stem).strip("-")[:64] or "image"
+    # Nokta zaten ayıklanır; "upload-" ile başlayan yükleme adları taşan
+    # yüklemelerle karışıp sunulmaz ve kota temizliğinden kaçardı
+    if safe_stem.startswith(SPOOL_PREFIX):
+        safe_stem = f"_{safe_stem}"
+    final_path = path.with_name(
+        f"{safe_stem}.{digest.hexdigest()[:CONTENT_HASH_LENGTH]}{path.suffix.lower()}"
+    )
+    try:
+        os.utime(final_path)
+    except FileNotFoundError:
+        os.replace(path, final_path)
+        os.utime(final_path)
+    else:
+        # İki ad aynı inode'a bağlıysa (önbellekten gelen çıktı) rename hiçbir
+        # şey yapmaz ve geçici ad kalırdı
+        path.unlink(missing_ok=True)
+    return final_path
+
+def make_etag(path: Path, stat: os.stat_result) -> Tuple[str, bool]:
+    """(güçlü ETag, içerik özetli mi) döndür
+
+    İçerik özetli adlarda ETag özetin kendisidir. Diğer dosyalar atomik
+    olarak yer değiştirdiğinden boyut ve mtime ikilisi de içeriği belirler.
+    """
+    match = CONTENT_NAME_PATTERN.search(path.name)
+    if match:
+        return f'"{match.group(1)}"', True
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"', False
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match karşılaştırması (zayıf karşılaştırma, RFC 9110 13.1.2)"""
+    if header.strip() == "*":
+        return True
+    candidates = (value.strip() for value in header.split(","))
+    return any(value.removeprefix("W/") == etag for value in candidates)
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Tek aralıklı "bytes=" başlığını [başlangıç, bitiş) olarak döndür
+
+    Çok aralıklı veya anlaşılmayan başlıklar yok sayılır (tam yanıt döner);
+    karşılanamayan aralıkta 416 fırlatılır.
+    """
+    unit, _, ranges = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    first, _, last = ranges.strip().partition("-")
+    try:
+        if not first:
+            # Son N bayt
+            length = int(last)
+            if length <= 0:
+                raise ValueError
+            start, end = max(0, size - length), size
+        else:
+            start = int(first)
+            end = min(size, int(last) + 1) if last else size
+            if end <= start and start < size:
+                return None
+    except ValueError:
+        return None
+    if start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="İstenen aralık karşılanamıyor",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+class FileRangeResponse(Response):
+    """Dosyanın [offset, offset + length) bölümünü gönderen yanıt
+
+    Sunucu ASGI zerocopysend uzantısını destekliyorsa veri çekirdekte
+    sendfile ile kopyalanır; desteklemiyorsa parça parça iş parçacığında
+    okunur. send_body False ise (HEAD, 304) yalnızca başlıklar gider.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        offset: int,
+        length: int,
+        status_code: int = 200,
+        headers: Optional[dict] = None,
+        media_type: Optional[str] = None,
+        send_body: bool = True,
+    ):
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.send_body = send_body
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+        if status_code != 304:
+            # HEAD yanıtı da GET'in gövde boyutunu bildirir
+            self.headers["content-length"] = str(length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if not self.send_body or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        with open(self.path, "rb") as file:
+            if ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+                await send({
+                    "type": ZEROCOPY_EXTENSION,
+                    "file": file,
+                    "offset": self.offset,
+                    "count": self.length,
+                    "more_body": False,
+                })
+                return
+            position = self.offset
+            end = self.offset + self.length
+            while position < end:
+                chunk = await anyio.to_thread.run_sync(
+                    os.pread, file.fileno(), min(CHUNK_SIZE, end - position), position
+                )
+                if not chunk:
+                    break
+                position += len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": position < end,
+                })
+            if position < end:
+                # Dosya gönderim sırasında kısaldı; bağlantı eksik gövdeyle kapanır
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+def deliver_file(request: Request, path: Path) -> Response:
+    """Dosyayı ETag, koşullu istek ve aralık desteğiyle sun
+
+    İçerik özetli adlar süresiz (immutable) önbelleklenir, diğerleri her
+    kullanımda ETag ile yeniden doğrulanır.
+    """
+    try:
+        stat = path.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=404, detail="Dosya bulunamadı")
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Dosya bulunamadı")
+
+    etag, immutable = make_etag(path, stat)
+    headers = {
+        "etag": etag,
+        "accept-ranges": "bytes",
+        "cache-control": (
+            f"public, max-age={settings.OUTPUT_CACHE_MAX_AGE}, immutable" if immutable else "no-cache"
+        ),
+    }
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    send_body = request.method != "HEAD"
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and _etag_matches(if_none_match, etag):
+        return FileRangeResponse(path, 0, 0, 304, headers, send_body=False)
+
+    size = stat.st_size
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # If-Range tutmuyorsa (dosya değişmiş) aralık yok sayılır, tamamı gönderilir
+    if range_header and (if_range is None or if_range.strip() == etag):
+        requested = parse_range(range_header, size)
+        if requested is not None:
+            start, end = requested
+            headers["content-range"] = f"bytes {start}-{end - 1}/{size}"
+            return FileRangeResponse(path, start, end - start, 206, headers, media_type, send_body)
+    return FileRangeResponse(path, 0, size, 200, headers, media_type, send_body)
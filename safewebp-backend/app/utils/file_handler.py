@@ -1,23 +1,125 @@
 # app/utils/file_handler.py
+import io
 import os
+import tempfile
 import aiofiles
 from pathlib import Path
+from typing import Optional, Tuple, Union
 from PIL import Image
 import pillow_heif
-from fastapi import UploadFile
+from fastapi import HTTPException, UploadFile
 from ..config import settings
+from .metadata_probe import has_metadata
+from .webp_header import read_webp_info
+
+# Pillow'un sıkıştırma bombası sınırı (uyarı bu sınırda, hata iki katında)
+Image.MAX_IMAGE_PIXELS = settings.MAX_IMAGE_PIXELS
+
+# Diske taşan yüklemelerin UPLOAD_DIR içindeki geçici dosya öneki
+SPOOL_PREFIX = "upload-"
+
+class SpooledUpload:
+    """Yüklenen dosya: eşiğin altındaysa bellekte, üstündeyse benzersiz geçici dosyada"""
+
+    def __init__(self, filename: str, size: int, data: Optional[bytes] = None, path: Optional[Path] = None):
+        self.filename = filename
+        self.size = size
+        self.data = data
+        self.path = path
+
+    @property
+    def in_memory(self) -> bool:
+        return self.data is not None
+
+    @property
+    def suffix(self) -> str:
+        return Path(self.filename).suffix
+
+    @property
+    def stem(self) -> str:
+        return Path(self.filename).stem
+
+    def cleanup(self):
+        """Diske taşmış geçici dosyayı sil"""
+        if self.path is not None and self.path.exists():
+            self.path.unlink()
+
+ImageSource = Union[Path, SpooledUpload]
 
 class FileHandler:
     @staticmethod
-    async def save_upload_file(upload_file: UploadFile) -> Path:
-        """Yüklenen dosyayı kaydet"""
-        file_path = settings.UPLOAD_DIR / upload_file.filename
-        
-        async with aiofiles.open(file_path, 'wb') as out_file:
+    async def spool_upload_file(upload_file: UploadFile, hasher=None) -> SpooledUpload:
+        """Yüklenen dosyayı oku; küçükse bellekte tut, büyükse geçici dosyaya yaz
+
+        Boyut ve (hasher verilirse) içerik özeti akış sırasında hesaplanır.
+        """
+        buffer = bytearray()
+        size = 0
+        spill_path = None
+        out_file = None
+
+        try:
             while content := await upload_file.read(1024 * 1024):  # 1MB chunks
-                await out_file.write(content)
-                
-        return file_path
+                size += len(content)
+                if size > settings.MAX_UPLOAD_SIZE:
+                    raise HTTPException(status_code=413, detail="Dosya boyutu çok büyük")
+                if hasher is not None:
+                    hasher.update(content)
+
+                if out_file is None and size > settings.SPOOL_MAX_MEMORY:
+                    # Eşik aşıldı, aynı isimli yüklemeler çakışmasın diye benzersiz dosyaya taşı
+                    fd, name = tempfile.mkstemp(
+                        prefix=SPOOL_PREFIX, suffix=Path(upload_file.filename).suffix, dir=settings.UPLOAD_DIR
+                    )
+                    os.close(fd)
+                    spill_path = Path(name)
+                    out_file = await aiofiles.open(spill_path, 'wb')
+                    await out_file.write(buffer)
+                    buffer = None
+
+                if out_file is not None:
+                    await out_file.write(content)
+                else:
+                    buffer.extend(content)
+        except BaseException:
+            if out_file is not None:
+                await out_file.close()
+                out_file = None
+            if spill_path is not None:
+                spill_path.unlink(missing_ok=True)
+            raise
+        finally:
+            if out_file is not None:
+                await out_file.close()
+
+        if spill_path is not None:
+            return SpooledUpload(upload_file.filename, size, path=spill_path)
+        return SpooledUpload(upload_file.filename, size, data=bytes(buffer))
+
+    @staticmethod
+    async def persist_upload_file(upload_file: UploadFile, dest_path: Path, hasher=None) -> SpooledUpload:
+        """Yüklenen dosyayı doğrudan kalıcı bir yola yaz (kuyruktaki işler için)"""
+        size = 0
+        try:
+            async with aiofiles.open(dest_path, 'wb') as out_file:
+                while content := await upload_file.read(1024 * 1024):  # 1MB chunks
+                    size += len(content)
+                    if size > settings.MAX_UPLOAD_SIZE:
+                        raise HTTPException(status_code=413, detail="Dosya boyutu çok büyük")
+                    if hasher is not None:
+                        hasher.update(content)
+                    await out_file.write(content)
+        except BaseException:
+            dest_path.unlink(missing_ok=True)
+            raise
+        return SpooledUpload(upload_file.filename, size, path=dest_path)
+
+    @staticmethod
+    def _open_source(image: ImageSource):
+        """Pillow/pillow_heif'in açabileceği dosya yolu veya bellek tamponu döndür"""
+        if isinstance(image, SpooledUpload):
+            return io.BytesIO(image.data) if image.in_memory else str(image.path)
+        return str(image)
 
     @staticmethod
     def validate_file(upload_file: UploadFile) -> bool:
@@ -26,27 +128,108 @@ class FileHandler:
         return ext in settings.ALLOWED_EXTENSIONS
 
     @staticmethod
-    def process_heic_image(image_path: Path) -> Image.Image:
+    def read_image_header(image_path: ImageSource) -> Tuple[Tuple[int, int], str, str]:
+        """Piksel verisini çözmeden başlıktan (boyut, mod, format) oku"""
+        try:
+            source = FileHandler._open_source(image_path)
+            if image_path.suffix.lower() == '.heic':
+                heif_file = pillow_heif.open_heif(source)
+                return heif_file.size, heif_file.mode, "HEIF"
+            with Image.open(source) as image:
+                return image.size, image.mode, image.format
+        except Image.DecompressionBombError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Görüntü yükleme hatası: {str(e)}")
+
+    @staticmethod
+    def read_webp_info(image_path: ImageSource) -> Optional[dict]:
+        """WebP kapsayıcı bilgisini (kayıpsız, animasyon, tahmini kalite) oku; WebP değilse None"""
+        try:
+            source = FileHandler._open_source(image_path)
+            if isinstance(source, str):
+                with open(source, 'rb') as file:
+                    return read_webp_info(file)
+            return read_webp_info(source)
+        except Exception as e:
+            print(f"Error in read_webp_info: {str(e)}")
+            return None
+
+    @staticmethod
+    def has_metadata(image_path: ImageSource, source_format: str) -> bool:
+        """Dosyanın meta veri taşıyıp taşımadığını oku; okunamazsa True"""
+        try:
+            source = FileHandler._open_source(image_path)
+            if isinstance(source, str):
+                with open(source, 'rb') as file:
+                    return has_metadata(file, source_format)
+            return has_metadata(source, source_format)
+        except Exception as e:
+            print(f"Error in has_metadata: {str(e)}")
+            return True
+
+    @staticmethod
+    def is_animated(image_path: ImageSource) -> bool:
+        """Görüntünün birden fazla karesi olup olmadığını kareleri çözmeden oku"""
+        try:
+            with Image.open(FileHandler._open_source(image_path)) as image:
+                return bool(getattr(image, "is_animated", False))
+        except Exception as e:
+            print(f"Error in is_animated: {str(e)}")
+            return False
+
+    @staticmethod
+    def read_image_size(image_path: ImageSource) -> Tuple[int, int]:
+        """Piksel verisini çözmeden başlıktan görüntü boyutunu oku"""
+        return FileHandler.read_image_header(image_path)[0]
+
+    @staticmethod
+    def process_heic_image(image_path: ImageSource, target_size: Optional[Tuple[int, int]] = None) -> Image.Image:
         """HEIC formatındaki görüntüleri işle"""
         try:
-            heif_file = pillow_heif.read_heif(str(image_path))
-            image = Image.frombytes(
+            heif_file = pillow_heif.open_heif(FileHandler._open_source(image_path))
+            # RGBA tamponu kopyalanmadan sarılır; RGB, Pillow'un 4 bayt/piksel
+            # iç düzenine tek seferde kopyalanır ve libheif tamponu bırakılır
+            image = Image.frombuffer(
                 heif_file.mode,
                 heif_file.size,
                 heif_file.data,
                 "raw",
+                heif_file.mode,
+                heif_file.stride,
+                1,
             )
+            for key in ("exif", "icc_profile"):
+                if heif_file.info.get(key):
+                    image.info[key] = heif_file.info[key]
+
+            # libheif ölçekli çözme desteklemiyor; en ucuz yol, tam çözümden
+            # hemen sonra tam sayı katsayılı küçültme ile büyük tamponu bırakmak
+            if target_size:
+                factor = min(image.size[0] // target_size[0], image.size[1] // target_size[1])
+                if factor >= 2:
+                    info = image.info
+                    image = image.reduce(factor)
+                    image.info = info
             return image
         except Exception as e:
             raise ValueError(f"HEIC işleme hatası: {str(e)}")
 
     @staticmethod
-    def load_image(image_path: Path) -> Image.Image:
-        """Görüntü dosyasını yükle"""
+    def load_image(image_path: ImageSource, target_size: Optional[Tuple[int, int]] = None) -> Image.Image:
+        """Görüntü dosyasını yükle
+
+        target_size verilirse görüntü bu boyuttan küçük olmamak kaydıyla
+        küçültülerek çözülür (JPEG için DCT ölçekleme).
+        """
         try:
             if image_path.suffix.lower() == '.heic':
-                return FileHandler.process_heic_image(image_path)
-            return Image.open(image_path)
+                return FileHandler.process_heic_image(image_path, target_size)
+            image = Image.open(FileHandler._open_source(image_path))
+            if target_size:
+                # Yalnızca JPEG'de etkili, diğer formatlarda işlem yapmaz
+                image.draft(image.mode, target_size)
+            return image
         except Exception as e:
             raise ValueError(f"Görüntü yükleme hatası: {str(e)}")
 
@@ -0,0 +1,93 @@
+from typing import BinaryIO
+
+from PIL import Image
+
+from .webp_header import read_webp_info
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Kullanıcı meta verisi taşıyan PNG parçaları (metin, EXIF, renk profili, zaman)
+PNG_METADATA_CHUNKS = {b"tEXt", b"zTXt", b"iTXt", b"eXIf", b"iCCP", b"tIME"}
+# Görüntünün kendisine ait JPEG APP bölümleri (JFIF başlığı, Adobe renk dönüşümü)
+JPEG_IMAGE_SEGMENTS = {"APP0": b"JFIF\x00", "APP14": b"Adobe"}
+# Animasyon döngüsünü tanımlayan GIF uygulama uzantıları
+GIF_LOOP_EXTENSIONS = {b"NETSCAPE2.0", b"ANIMEXTS1.0"}
+
+def _png_has_metadata(file: BinaryIO) -> bool:
+    # Metin parçaları IDAT'tan sonra da gelebilir, IEND'e kadar taranır
+    if file.read(8) != PNG_SIGNATURE:
+        return True
+    while True:
+        header = file.read(8)
+        if len(header) < 8:
+            return False
+        length = int.from_bytes(header[:4], "big")
+        chunk_type = header[4:]
+        if chunk_type in PNG_METADATA_CHUNKS:
+            return True
+        if chunk_type == b"IEND":
+            return False
+        file.seek(length + 4, 1)  # Veri + CRC
+
+def _skip_gif_sub_blocks(file: BinaryIO):
+    while True:
+        size = file.read(1)
+        if not size or size[0] == 0:
+            return
+        file.seek(size[0], 1)
+
+def _gif_has_metadata(file: BinaryIO) -> bool:
+    header = file.read(13)
+    if len(header) < 13 or header[:3] != b"GIF":
+        return True
+    if header[10] & 0x80:
+        file.seek(3 << ((header[10] & 0x07) + 1), 1)  # Genel renk tablosu
+    while True:
+        introducer = file.read(1)
+        if not introducer or introducer == b"\x3b":
+            return False
+        if introducer == b"\x2c":
+            descriptor = file.read(9)
+            if len(descriptor) < 9:
+                return False
+            if descriptor[8] & 0x80:
+                file.seek(3 << ((descriptor[8] & 0x07) + 1), 1)  # Yerel renk tablosu
+            file.seek(1, 1)  # LZW kod boyutu
+            _skip_gif_sub_blocks(file)
+        elif introducer == b"\x21":
+            label = file.read(1)
+            if label == b"\xfe":
+                return True  # Yorum
+            if label == b"\xff":
+                size = file.read(1)
+                identifier = file.read(size[0]) if size else b""
+                if identifier not in GIF_LOOP_EXTENSIONS:
+                    return True  # XMP vb.
+            _skip_gif_sub_blocks(file)
+        else:
+            return True
+
+def _jpeg_has_metadata(file: BinaryIO) -> bool:
+    # Pillow başlığı açarken tarama başına kadarki APP ve COM bölümlerini toplar
+    with Image.open(file) as image:
+        for marker, data in image.applist:
+            prefix = JPEG_IMAGE_SEGMENTS.get(marker)
+            if prefix is None or not data.startswith(prefix):
+                return True
+    return False
+
+def has_metadata(file: BinaryIO, source_format: str) -> bool:
+    """Dosya EXIF, ICC, XMP, metin veya yorum taşıyor mu (pikseller çözülmez)
+
+    Tanınmayan veya okunamayan dosyalarda True döner; özgün baytlar ancak
+    meta veri içermediği bilindiğinde olduğu gibi kullanılabilir.
+    """
+    if source_format == "JPEG":
+        return _jpeg_has_metadata(file)
+    if source_format == "PNG":
+        return _png_has_metadata(file)
+    if source_format == "GIF":
+        return _gif_has_metadata(file)
+    if source_format == "WEBP":
+        info = read_webp_info(file)
+        return info is None or info["metadata"]
+    return True
@@ -0,0 +1,117 @@
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from ..config import settings
+
+# Özet 8x8 düşük frekans katsayısından (64 bit) oluşur
+HASH_SIZE = 8
+# DCT'nin uygulandığı gri küçük resmin kenarı
+THUMBNAIL_SIZE = 32
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """Ortonormal DCT-II dönüşüm matrisi"""
+    index = np.arange(size)
+    matrix = np.cos(np.pi * (2 * index[None, :] + 1) * index[:, None] / (2 * size))
+    matrix[0] /= np.sqrt(2)
+    return matrix * np.sqrt(2 / size)
+
+_DCT = _dct_matrix(THUMBNAIL_SIZE)
+
+def perceptual_hash(image: Image.Image) -> int:
+    """64 bitlik DCT tabanlı algısal özet (pHash)
+
+    Görüntü 32x32 gri küçük resme indirilir, düşük frekanslı 8x8 katsayılar
+    medyanlarıyla karşılaştırılır. Yeniden sıkıştırma, hafif düzenleme ve
+    ölçeklemede özet yalnızca birkaç bit değişir.
+    """
+    if image.mode not in ('L', 'RGB', 'RGBA'):
+        image = image.convert('RGB')
+    thumbnail = image.resize((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.Resampling.BOX).convert('L')
+    pixels = np.asarray(thumbnail, dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:HASH_SIZE, :HASH_SIZE].ravel()
+    # DC katsayısı ortalama parlaklıktır, medyanı kaydırmasın
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view('>u8')[0])
+
+class PerceptualParamCache:
+    """Yakın kopya görüntüler için seçilmiş WebP parametrelerinin LRU indeksi
+
+    Kayıtlar algısal özet ve parametre seçimini etkileyen ayarlarla tutulur.
+    Özeti en fazla max_distance bit farklı ve piksel sayısı yakın olan bir
+    görüntü, analiz ve kalite araması yapmadan önceki seçimi kullanır. İndeks
+    süreç içidir; her işçi kendi geçmişini tutar.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_distance: Optional[int] = None,
+        size_tolerance: Optional[float] = None,
+    ):
+        self.max_entries = settings.PERCEPTUAL_CACHE_ENTRIES if max_entries is None else max_entries
+        self.max_distance = (
+            settings.PERCEPTUAL_CACHE_MAX_DISTANCE if max_distance is None else max_distance
+        )
+        self.size_tolerance = (
+            settings.PERCEPTUAL_CACHE_SIZE_TOLERANCE if size_tolerance is None else size_tolerance
+        )
+        self._entries: "OrderedDict[Tuple[tuple, int], dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(conversion_settings) -> tuple:
+        """Parametre seçimini etkileyen ayarlar (meta veri ve varyantlar etkilemez)"""
+        return (
+            conversion_settings.smart_optimize,
+            None if conversion_settings.smart_optimize else conversion_settings.quality,
+            conversion_settings.target_size,
+            conversion_settings.target_ssim,
+            conversion_settings.compare_lossless,
+        )
+
+    def _similar_size(self, pixels: int, other: int) -> bool:
+        return abs(pixels - other) <= self.size_tolerance * max(pixels, other)
+
+    def lookup(self, image_hash: int, settings_key: tuple, size: Tuple[int, int]) -> Optional[dict]:
+        """En yakın kaydı döndür, eşik içinde kayıt yoksa None"""
+        pixels = size[0] * size[1]
+        best = None
+        with self._lock:
+            for entry_key, record in self._entries.items():
+                if entry_key[0] != settings_key:
+                    continue
+                distance = (entry_key[1] ^ image_hash).bit_count()
+                if distance > self.max_distance or not self._similar_size(pixels, record["pixels"]):
+                    continue
+                if best is None or distance < best[0]:
+                    best = (distance, entry_key, record)
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best[1])
+            self.hits += 1
+            return best[2]
+
+    def store(self, image_hash: int, settings_key: tuple, size: Tuple[int, int], record: dict):
+        """Seçilen parametreleri ve ölçülen sonucu kaydet, sınır aşılırsa en eskiyi at"""
+        if not self.enabled:
+            return
+        entry_key = (settings_key, image_hash)
+        with self._lock:
+            self._entries[entry_key] = {**record, "pixels": size[0] * size[1]}
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
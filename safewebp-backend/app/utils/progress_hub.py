@@ -0,0 +1,135 @@
+import asyncio
+import json
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set
+
+from fastapi import WebSocket
+
+from ..config import settings
+
+class _Subscriber:
+    """Tek bir WebSocket bağlantısı: abone olunan işler ve bekleyen güncellemeler"""
+
+    def __init__(self, websocket: WebSocket, max_pending: int):
+        self.websocket = websocket
+        self.job_ids: Set[str] = set()
+        # İş başına yalnızca en son güncelleme tutulur
+        self.pending: "OrderedDict[str, dict]" = OrderedDict()
+        self.max_pending = max_pending
+        self.ready = asyncio.Event()
+        self.dropped = 0
+
+    def offer(self, job_id: str, message: dict):
+        """Güncellemeyi kuyruğa koy; aynı işin eski güncellemesinin yerine geçer"""
+        self.pending.pop(job_id, None)
+        self.pending[job_id] = message
+        while len(self.pending) > self.max_pending:
+            self.pending.popitem(last=False)
+            self.dropped += 1
+        self.ready.set()
+
+class ProgressHub:
+    """İş (job) bazlı ilerleme yayını
+
+    İstemciler yalnızca abone oldukları işlerin güncellemelerini alır. Her
+    bağlantının kendi gönderim görevi ve sınırlı, birleştirilen (coalescing)
+    kuyruğu vardır; publish hiçbir zaman beklemez, bu yüzden yavaş bir
+    istemci dönüşümü yavaşlatamaz.
+    """
+
+    def __init__(self, max_pending: Optional[int] = None, retained_jobs: Optional[int] = None):
+        self.max_pending = max_pending or settings.WS_MAX_PENDING
+        self.retained_jobs = retained_jobs or settings.PROGRESS_RETAINED_JOBS
+        self._subscribers: Set[_Subscriber] = set()
+        self._by_job: Dict[str, Set[_Subscriber]] = {}
+        # Geç abone olanlara gönderilmek üzere işlerin son durumu
+        self._latest: "OrderedDict[str, dict]" = OrderedDict()
+
+    def publish(self, job_id: str, progress: dict):
+        """İşin ilerleme durumunu abonelerine ilet (beklemeden)"""
+        message = {"job_id": job_id, **progress}
+        self._latest.pop(job_id, None)
+        self._latest[job_id] = message
+        while len(self._latest) > self.retained_jobs:
+            self._latest.popitem(last=False)
+
+        for subscriber in self._by_job.get(job_id, ()):
+            subscriber.offer(job_id, message)
+
+    def subscribe(self, subscriber: _Subscriber, job_id: str):
+        subscriber.job_ids.add(job_id)
+        self._by_job.setdefault(job_id, set()).add(subscriber)
+        # İşin mevcut durumunu hemen gönder
+        if job_id in self._latest:
+            subscriber.offer(job_id, self._latest[job_id])
+
+    def unsubscribe(self, subscriber: _Subscriber, job_id: str):
+        subscriber.job_ids.discard(job_id)
+        subscribers = self._by_job.get(job_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._by_job[job_id]
+
+    async def serve(self, websocket: WebSocket, job_ids: Iterable[str] = ()):
+        """Bağlantıyı kabul et, abonelik mesajlarını işle ve güncellemeleri gönder
+
+        İstemci mesajları: {"action": "subscribe" | "unsubscribe", "job_id": "..."}
+        """
+        await websocket.accept()
+        subscriber = _Subscriber(websocket, self.max_pending)
+        self._subscribers.add(subscriber)
+        for job_id in job_ids:
+            self.subscribe(subscriber, job_id)
+
+        sender = asyncio.create_task(self._send_loop(subscriber))
+        try:
+            while True:
+                try:
+                    message = json.loads(await websocket.receive_text())
+                    action = message.get("action")
+                    job_id = str(message["job_id"])
+                except (ValueError, KeyError, AttributeError, TypeError):
+                    continue
+                if action == "subscribe":
+                    self.subscribe(subscriber, job_id)
+                elif action == "unsubscribe":
+                    self.unsubscribe(subscriber, job_id)
+        except Exception:
+            pass
+        finally:
+            sender.cancel()
+            for job_id in list(subscriber.job_ids):
+                self.unsubscribe(subscriber, job_id)
+            self._subscribers.discard(subscriber)
+
+    async def _send_loop(self, subscriber: _Subscriber):
+        try:
+            while True:
+                await subscriber.ready.wait()
+                subscriber.ready.clear()
+                while subscriber.pending:
+                    _, message = subscriber.pending.popitem(last=False)
+                    await subscriber.websocket.send_json(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Kopan bağlantı; serve() aboneliği temizler
+            pass
+
+    async def close_all(self):
+        """Tüm bağlantıları kapat"""
+        for subscriber in list(self._subscribers):
+            try:
+                await subscriber.websocket.close()
+            except:
+                pass
+        self._subscribers.clear()
+        self._by_job.clear()
+
+    def stats(self) -> dict:
+        return {
+            "connections": len(self._subscribers),
+            "subscribed_jobs": len(self._by_job),
+            "dropped_updates": sum(subscriber.dropped for subscriber in self._subscribers),
+        }
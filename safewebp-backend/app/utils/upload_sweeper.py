@@ -0,0 +1,114 @@
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from .file_handler import SPOOL_PREFIX
+
+class UploadSweeper:
+    """UPLOAD_DIR için süre ve disk kotası uygulayan arka plan temizleyici
+
+    Son yazımı (mtime) TTL'den eski dosyalar silinir; yarım kalmış geçici
+    dosyalar da buna dahildir. Kalan yayımlanmış çıktılar kotayı aşıyorsa en
+    eskiden başlanarak silinir. Geçici dosyalar (nokta önekli çıktılar,
+    taşan yüklemeler) sürmekte olan isteklere ait olabileceğinden kota için
+    silinmez. Birden fazla uvicorn işçisi aynı klasörü süpürebilir; silme
+    işlemleri birbirini bozmaz.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        interval: Optional[float] = None,
+    ):
+        self.directory = Path(directory or settings.UPLOAD_DIR)
+        self.ttl = settings.UPLOAD_TTL if ttl is None else ttl
+        self.max_bytes = settings.UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+        self.interval = interval or settings.UPLOAD_SWEEP_INTERVAL
+        self._task: Optional[asyncio.Task] = None
+        self.files = 0
+        self.bytes = 0
+        self.expired = 0
+        self.evicted = 0
+
+    @staticmethod
+    def _is_temporary(name: str) -> bool:
+        return name.startswith(".") or name.startswith(SPOOL_PREFIX)
+
+    def _remove(self, path: Path) -> bool:
+        try:
+            path.unlink()
+            return True
+        except FileNotFoundError:
+            # Başka bir işçi önce silmiş
+            return False
+
+    def sweep(self, now: Optional[float] = None) -> dict:
+        """Klasörü bir kez tara; süresi dolanları ve kotayı aşanları sil"""
+        now = time.time() if now is None else now
+        published = []
+        total_bytes = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                path = Path(entry.path)
+                if now - stat.st_mtime > self.ttl:
+                    if self._remove(path):
+                        self.expired += 1
+                    continue
+                total_bytes += stat.st_size
+                if not self._is_temporary(entry.name):
+                    published.append((stat.st_mtime, stat.st_size, path))
+
+        files = len(published)
+        if total_bytes > self.max_bytes:
+            for _, size, path in sorted(published, key=lambda item: item[0]):
+                if total_bytes <= self.max_bytes:
+                    break
+                if self._remove(path):
+                    self.evicted += 1
+                total_bytes -= size
+                files -= 1
+
+        self.files = files
+        self.bytes = total_bytes
+        return self.stats()
+
+    def start(self):
+        """Periyodik taramayı başlat (ilk tarama hemen yapılır)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await run_in_threadpool(self.sweep)
+            except Exception as e:
+                print(f"Error in UploadSweeper.sweep: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {
+            "files": self.files,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
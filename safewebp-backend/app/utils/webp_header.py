@@ -0,0 +1,131 @@
+import struct
+from typing import BinaryIO, List, Optional
+
+# VP8 kare başlığı: 3 bayt etiket + 3 bayt başlangıç kodu + 4 bayt boyut
+VP8_FRAME_HEADER = 10
+# Niceleyici indekslerine kadar olan bölüm için okunan bayt (fazlası zararsız)
+VP8_PROBE_BYTES = 64
+
+class _BoolDecoder:
+    """VP8 ilk bölümünün aritmetik (bool) kod çözücüsü (RFC 6386, bölüm 7)"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.value = (data[0] << 8) | data[1]
+        self.position = 2
+        self.range = 255
+        self.bit_count = 0
+
+    def read_bool(self, probability: int = 128) -> int:
+        split = 1 + (((self.range - 1) * probability) >> 8)
+        big_split = split << 8
+        if self.value >= big_split:
+            bit = 1
+            self.range -= split
+            self.value -= big_split
+        else:
+            bit = 0
+            self.range = split
+        while self.range < 128:
+            self.value <<= 1
+            self.range <<= 1
+            self.bit_count += 1
+            if self.bit_count == 8:
+                self.bit_count = 0
+                if self.position < len(self.data):
+                    self.value |= self.data[self.position]
+                self.position += 1
+        return bit
+
+    def read_literal(self, bits: int) -> int:
+        value = 0
+        for _ in range(bits):
+            value = (value << 1) | self.read_bool()
+        return value
+
+    def read_signed(self, bits: int) -> int:
+        value = self.read_literal(bits)
+        return -value if self.read_bool() else value
+
+    def read_optional_signed(self, bits: int) -> Optional[int]:
+        return self.read_signed(bits) if self.read_bool() else None
+
+def _vp8_quantizers(payload: bytes) -> List[int]:
+    """Anahtar karenin niceleyici indekslerini (0-127) oku
+
+    Segmentasyon mutlak değerlerle açıksa segment başına değerler, değilse
+    temel y_ac_qi döner (RFC 6386, bölüm 9.3 ve 9.6).
+    """
+    decoder = _BoolDecoder(payload[VP8_FRAME_HEADER:])
+    decoder.read_literal(2)  # Renk uzayı, kırpma türü
+    segment_quantizers = None
+    absolute = False
+    if decoder.read_bool():
+        update_map = decoder.read_bool()
+        if decoder.read_bool():
+            absolute = decoder.read_bool()
+            segment_quantizers = [decoder.read_optional_signed(7) for _ in range(4)]
+            for _ in range(4):
+                decoder.read_optional_signed(6)  # Segment döngü filtresi
+        if update_map:
+            for _ in range(3):
+                if decoder.read_bool():
+                    decoder.read_literal(8)
+    decoder.read_literal(1 + 6 + 3)  # Filtre türü, düzeyi, keskinlik
+    if decoder.read_bool() and decoder.read_bool():
+        for _ in range(8):
+            decoder.read_optional_signed(6)  # Referans/mod filtre farkları
+    decoder.read_literal(2)  # DCT bölüm sayısı
+    base = decoder.read_literal(7)
+    if absolute and segment_quantizers:
+        return [base if value is None else value for value in segment_quantizers]
+    return [base]
+
+def quantizer_to_quality(quantizer: float) -> float:
+    """libwebp'nin kalite -> niceleyici eşlemesinin tersi (yaklaşık, 0-100)"""
+    compression = (1 - quantizer / 127) ** 3
+    if compression < 0.5:
+        return compression * 1.5 * 100
+    return (compression + 1) / 2 * 100
+
+def read_webp_info(file: BinaryIO) -> Optional[dict]:
+    """WebP kapsayıcısını piksel çözmeden incele
+
+    Dönüş: {lossless, animated, alpha, metadata, quality}; quality kayıplı görüntüler
+    için segment niceleyicilerinden tahmin edilir (±5), kayıpsızda None.
+    WebP değilse None döner.
+    """
+    header = file.read(12)
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WEBP":
+        return None
+
+    info = {"lossless": False, "animated": False, "alpha": False, "metadata": False, "quality": None}
+    while True:
+        chunk_header = file.read(8)
+        if len(chunk_header) < 8:
+            return info
+        fourcc = chunk_header[:4]
+        size = struct.unpack("<I", chunk_header[4:])[0]
+        if fourcc == b"VP8X":
+            flags = file.read(size)[0]
+            info["animated"] = bool(flags & 0x02)
+            info["alpha"] = bool(flags & 0x10)
+            # ICC (0x20), EXIF (0x08), XMP (0x04); yalın VP8/VP8L meta veri taşıyamaz
+            info["metadata"] = bool(flags & 0x2C)
+            size = 0
+        elif fourcc == b"ALPH":
+            info["alpha"] = True
+        elif fourcc == b"VP8L":
+            info["lossless"] = True
+            return info
+        elif fourcc == b"VP8 ":
+            payload = file.read(min(size, VP8_PROBE_BYTES))
+            if len(payload) > VP8_FRAME_HEADER + 2:
+                quantizers = _vp8_quantizers(payload)
+                info["quality"] = quantizer_to_quality(sum(quantizers) / len(quantizers))
+            return info
+        elif fourcc == b"ANMF":
+            # Animasyon karelerinin ayrıntısı gerekmiyor
+            return info
+        # Parça verisi tek sayıda bayt ise bir dolgu baytı eklenir
+        file.seek(size + (size & 1), 1)
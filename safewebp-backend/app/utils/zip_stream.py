@@ -0,0 +1,41 @@
+import zipfile
+from pathlib import Path
+from typing import Iterable, Iterator, Tuple
+
+class _ChunkBuffer:
+    """zipfile'ın yazdığı baytları toplayan, konumlanamayan (unseekable) akış"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def iter_zip_stream(files: Iterable[Tuple[str, Path]], chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """Dosyaları sıkıştırmadan (stored) ZIP olarak parça parça üret
+
+    Arşiv diske yazılmaz; akış konumlanamadığı için zipfile her kaydın CRC
+    ve boyutunu veri tanımlayıcısıyla (data descriptor) sona yazar. Bellekte
+    yalnızca bir parça ve merkezi dizin kayıtları tutulur.
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+        for arcname, path in files:
+            zinfo = zipfile.ZipInfo.from_file(path, arcname)
+            zinfo.compress_type = zipfile.ZIP_STORED
+            with open(path, "rb") as source, archive.open(zinfo, "w") as target:
+                while chunk := source.read(chunk_size):
+                    target.write(chunk)
+                    yield buffer.drain()
+            yield buffer.drain()
+    # Merkezi dizin
+    yield buffer.drain()
@@ -0,0 +1,119 @@
+"""ImageProcessor analiz adımları için mikro benchmark
+
+Vektörleştirilmiş kenar yoğunluğu, alfa eşikleme ve renk sayımını eski
+saf-Python uygulamalarıyla 1, 12 ve 50 MP görüntülerde karşılaştırır.
+Eski kenar yoğunluğu döngüsü büyük görüntülerde dakikalar sürdüğü için
+--legacy-max-mp üzerindeki boyutlarda satır örneği üzerinden ölçülüp
+piksel sayısına göre doğrusal olarak tahmin edilir.
+
+Kullanım (safewebp-backend klasöründen):
+    python -m benchmarks.bench_image_processor [--sizes 1 12 50]
+"""
+import argparse
+import json
+import math
+import time
+
+import numpy as np
+from PIL import Image
+
+from app.core.image_processor import ImageProcessor
+
+def legacy_edge_density(image):
+    """Eski saf-Python kenar yoğunluğu (referans)"""
+    if image.mode != 'L':
+        image = image.convert('L')
+
+    width, height = image.size
+    pixels = image.load()
+    edge_count = 0
+
+    for y in range(1, height-1):
+        for x in range(1, width-1):
+            gx = pixels[x+1, y] - pixels[x-1, y]
+            gy = pixels[x, y+1] - pixels[x, y-1]
+            gradient = math.sqrt(gx*gx + gy*gy)
+            if gradient > 30:
+                edge_count += 1
+
+    return edge_count / (width * height)
+
+def legacy_alpha_threshold(alpha):
+    """Eski liste tabanlı alfa eşikleme (referans)"""
+    new_alpha = Image.new('L', alpha.size)
+    new_alpha.putdata([255 if a > 128 else 0 for a in alpha.getdata()])
+    return new_alpha
+
+def legacy_color_count(image):
+    """Eski palet nicemlemeli renk sayımı (referans)"""
+    converted = image.convert('P', palette=Image.Palette.ADAPTIVE, colors=256)
+    return len(converted.getcolors(maxcolors=256))
+
+def make_image(megapixels, seed=0):
+    """Gürültü + degrade içeren deterministik RGBA test görüntüsü"""
+    width = int(math.sqrt(megapixels * 1_000_000 * 4 / 3))
+    height = int(megapixels * 1_000_000 / width)
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    noise = rng.normal(0, 20, (height, width, 3)).astype(np.float32)
+    rgb = np.clip(gradient + noise, 0, 255).astype(np.uint8)
+    alpha = rng.integers(0, 256, (height, width, 1), dtype=np.uint8)
+    return Image.fromarray(np.concatenate([rgb, alpha], axis=2), 'RGBA')
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def bench_size(processor, megapixels, legacy_max_mp):
+    image = make_image(megapixels)
+    width, height = image.size
+    gray = image.convert('L')
+    alpha = image.getchannel('A')
+    row = {'megapixels': megapixels, 'width': width, 'height': height}
+
+    # Kenar yoğunluğu
+    new_density, row['edge_density_new_s'] = timed(processor._calculate_edge_density, gray)
+    if megapixels <= legacy_max_mp:
+        old_density, row['edge_density_legacy_s'] = timed(legacy_edge_density, gray)
+        row['edge_density_match'] = old_density == new_density
+    else:
+        sample_rows = max(3, int(legacy_max_mp * 1_000_000 / width))
+        sample = gray.crop((0, 0, width, sample_rows))
+        _, sample_s = timed(legacy_edge_density, sample)
+        row['edge_density_legacy_s'] = sample_s * height / sample_rows
+        row['edge_density_legacy_estimated'] = True
+        row['edge_density_match'] = (
+            legacy_edge_density(sample) == processor._calculate_edge_density(sample)
+        )
+    row['edge_density_speedup'] = row['edge_density_legacy_s'] / row['edge_density_new_s']
+
+    # Alfa eşikleme (optimize_color_mode içindeki adım)
+    new_alpha, row['alpha_new_s'] = timed(processor.optimize_color_mode, image)
+    old_alpha, row['alpha_legacy_s'] = timed(legacy_alpha_threshold, alpha)
+    row['alpha_match'] = new_alpha.getchannel('A').tobytes() == old_alpha.tobytes()
+    row['alpha_speedup'] = row['alpha_legacy_s'] / row['alpha_new_s']
+
+    # Renk sayımı (analyze_image içindeki adım)
+    rgb = image.convert('RGB')
+    colors, row['colors_new_s'] = timed(rgb.getcolors, 256)
+    old_count, row['colors_legacy_s'] = timed(legacy_color_count, rgb)
+    row['colors_match'] = (len(colors) if colors is not None else 256) == old_count
+    row['colors_speedup'] = row['colors_legacy_s'] / row['colors_new_s']
+
+    return row
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1, 12, 50],
+                        help='Megapiksel cinsinden görüntü boyutları')
+    parser.add_argument('--legacy-max-mp', type=float, default=1.0,
+                        help='Eski kenar döngüsünün tam ölçüldüğü en büyük boyut')
+    args = parser.parse_args()
+
+    processor = ImageProcessor()
+    for megapixels in args.sizes:
+        print(json.dumps(bench_size(processor, megapixels, args.legacy_max_mp)), flush=True)
+
+if __name__ == '__main__':
+    main()
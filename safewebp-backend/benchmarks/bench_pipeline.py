@@ -0,0 +1,273 @@
+"""Dönüşüm pipeline'ı için tekrarlanabilir benchmark
+
+Deterministik sentetik kümeyi (benchmarks/corpus.py) üretir ve iki modda
+ölçer:
+
+  stage  ConversionPipeline.convert doğrudan çağrılır; load_image ->
+         ImageProcessor -> MLOptimizer -> encode adımlarının süreleri
+         pipeline'ın döndürdüğü "timings" alanından alınır. Her görüntü ayrı
+         bir süreçte ölçülür, böylece tepe RSS o görüntüye aittir.
+  e2e    İstekler FastAPI uygulamasına süreç içinde (httpx ASGITransport)
+         gönderilir; süreç havuzu, kabul kontrolü ve yanıt yolu dahildir.
+         Ayarlar form alanıyla verilebildiği için tek dosyalık
+         /api/v1/convert-batch istekleri kullanılır.
+         İşçi RSS değerleri o ana kadarki tepe değerlerdir.
+
+Her satır bir JSON nesnesidir; --output verilirse tüm sonuçlar ortam
+bilgisiyle tek bir JSON dosyasına da yazılır. Dönüşüm önbelleği ve diğer
+durum klasörleri geçici bir klasöre yönlendirilir, önbellek kapalıdır.
+
+e2e modu requirements.txt'te olmayan httpx paketine ihtiyaç duyar
+(pip install httpx); paket yoksa e2e atlanır ve stderr'e not düşülür.
+
+Kullanım (safewebp-backend klasöründen):
+    python -m benchmarks.bench_pipeline [--mode stage e2e] [--sizes 0.3 2 12 50]
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from benchmarks.corpus import KINDS, build_corpus
+
+DEFAULT_SETTINGS = {'quality': 80, 'smart_optimize': False}
+
+def percentile(values, percent):
+    """En yakın sıra yöntemiyle yüzdelik"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def peak_rss_mb(pid=None):
+    """Sürecin tepe RSS değeri (MB); başka süreçler için /proc okunur (yalnızca Linux)"""
+    if pid is None:
+        # Linux'ta KB, macOS'ta bayt
+        scale = 1 if platform.system() == 'Darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def isolate_state(workdir: Path):
+    """Uygulamanın yazdığı klasörleri geçici klasöre yönlendir, önbelleği kapat
+
+    Ayarlar içe aktarılırken okunduğundan app modüllerinden önce çağrılmalı.
+    """
+    os.environ['UPLOAD_DIR'] = str(workdir / 'uploads')
+    os.environ['CACHE_DIR'] = str(workdir / 'cache')
+    # Her istek soğuk dönüşüm olur
+    os.environ['CACHE_ENABLED'] = 'false'
+    os.environ['JOBS_DIR'] = str(workdir / 'jobs')
+    os.environ['JOBS_DB'] = str(workdir / 'jobs' / 'jobs.sqlite3')
+    os.environ['ML_TRAINING_DB'] = str(workdir / 'training.sqlite3')
+
+def summarize(item, latencies, output_bytes):
+    total = sum(latencies)
+    return {
+        'kind': item['kind'],
+        'megapixels': item['megapixels'],
+        'width': item['width'],
+        'height': item['height'],
+        'input_bytes': item['bytes'],
+        'sha256': item['sha256'],
+        'iterations': len(latencies),
+        'latency_p50_s': percentile(latencies, 50),
+        'latency_p99_s': percentile(latencies, 99),
+        'throughput_images_s': len(latencies) / total if total else None,
+        'throughput_mp_s': len(latencies) * item['megapixels'] / total if total else None,
+        'output_bytes': output_bytes,
+        'compression_ratio': item['bytes'] / output_bytes if output_bytes else None,
+    }
+
+def _stage_child(path: str, settings_json: str, repeat: int, warmup: int, output_dir: str) -> dict:
+    """Tek görüntüyü yeni bir süreçte pipeline üzerinden ölç"""
+    import cv2
+    from app.core.pipeline import ConversionPipeline
+    from app.schemas.image import ConversionSettings
+    from app.utils.file_handler import SpooledUpload
+
+    # Süreç havuzundaki işçilerle aynı koşullar
+    cv2.setNumThreads(1)
+    pipeline = ConversionPipeline()
+    conversion_settings = ConversionSettings.model_validate_json(settings_json)
+    source = Path(path)
+    upload = SpooledUpload(source.name, source.stat().st_size, path=source)
+    output_path = Path(output_dir) / f"{source.stem}.webp"
+
+    latencies = []
+    stage_runs = []
+    result = None
+    for iteration in range(warmup + repeat):
+        start = time.perf_counter()
+        result = pipeline.convert(upload, output_path, conversion_settings)
+        elapsed = time.perf_counter() - start
+        if iteration >= warmup:
+            latencies.append(elapsed)
+            stage_runs.append(result['timings'])
+    return {
+        'latencies': latencies,
+        'stage_runs': stage_runs,
+        'output_bytes': result['converted_size'],
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+def run_stage(items, args, workdir: Path):
+    context = multiprocessing.get_context('spawn')
+    for item in items:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            child = pool.submit(
+                _stage_child, str(item['path']), args.settings, args.repeat, args.warmup, str(workdir)
+            ).result()
+        row = {'mode': 'stage', **summarize(item, child['latencies'], child['output_bytes'])}
+        stages = {}
+        for timings in child['stage_runs']:
+            for stage, seconds in timings.items():
+                stages.setdefault(stage, []).append(seconds)
+        row['stages_p50_s'] = {stage: statistics.median(values) for stage, values in stages.items()}
+        row['peak_rss_mb'] = child['peak_rss_mb']
+        yield row
+
+def parse_server_timing(header: str) -> dict:
+    timings = {}
+    for entry in filter(None, (part.strip() for part in header.split(','))):
+        name, _, duration = entry.partition(';dur=')
+        if duration:
+            timings[name] = float(duration)
+    return timings
+
+async def _run_e2e(items, args):
+    import httpx
+    from app.main import app, conversion_executor
+
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+            for item in items:
+                data = item['path'].read_bytes()
+                semaphore = asyncio.Semaphore(args.concurrency)
+
+                async def send(index):
+                    async with semaphore:
+                        start = time.perf_counter()
+                        response = await client.post(
+                            '/api/v1/convert-batch',
+                            files=[('images', (f"{index}_{item['path'].name}", data, 'application/octet-stream'))],
+                            data={'conversion_settings': args.settings},
+                        )
+                        return response, time.perf_counter() - start
+
+                for index in range(args.warmup):
+                    await send(index)
+                started = time.perf_counter()
+                replies = await asyncio.gather(*(send(index) for index in range(args.repeat)))
+                wall = time.perf_counter() - started
+
+                ok = [(response, elapsed) for response, elapsed in replies if response.status_code == 200]
+                latencies = [elapsed for _, elapsed in ok] or [wall]
+                output_bytes = ok[0][0].json()['total_converted_size'] if ok else None
+                row = {'mode': 'e2e', **summarize(item, latencies, output_bytes)}
+                # Eşzamanlı isteklerde verim duvar saatine göre hesaplanır
+                row['throughput_images_s'] = len(ok) / wall
+                row['throughput_mp_s'] = len(ok) * item['megapixels'] / wall
+                row['concurrency'] = args.concurrency
+                row['errors'] = len(replies) - len(ok)
+                server_timings = {}
+                for response, _ in ok:
+                    for stage, duration in parse_server_timing(response.headers.get('server-timing', '')).items():
+                        server_timings.setdefault(stage, []).append(duration)
+                row['server_timing_p50_ms'] = {
+                    stage: statistics.median(values) for stage, values in server_timings.items()
+                }
+                row['peak_rss_mb'] = peak_rss_mb()
+                worker_peaks = [
+                    peak_rss_mb(pid) for pid in (conversion_executor._pool._processes or {})
+                ]
+                row['worker_peak_rss_mb'] = max(filter(None, worker_peaks), default=None)
+                yield row
+    finally:
+        await app.router.shutdown()
+
+def run_e2e(items, args):
+    loop = asyncio.new_event_loop()
+    rows = _run_e2e(items, args)
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(rows.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(rows.aclose())
+        loop.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', nargs='+', choices=['stage', 'e2e'], default=['stage', 'e2e'])
+    parser.add_argument('--kinds', nargs='+', choices=KINDS, default=list(KINDS))
+    parser.add_argument('--sizes', type=float, nargs='+', default=[0.3, 2, 12],
+                        help='Megapiksel cinsinden görüntü boyutları (ör. 0.3 2 12 50)')
+    parser.add_argument('--repeat', type=int, default=5, help='Görüntü başına ölçülen tekrar')
+    parser.add_argument('--warmup', type=int, default=1, help='Ölçülmeyen ısınma tekrarı')
+    parser.add_argument('--concurrency', type=int, default=1, help='e2e modunda eşzamanlı istek')
+    parser.add_argument('--settings', default=json.dumps(DEFAULT_SETTINGS),
+                        help='ConversionSettings JSON (varsayılan sabit kalite, ML tahmini deterministik olmadığı için)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--corpus-dir', type=Path,
+                        default=Path(tempfile.gettempdir()) / 'safewebp-bench-corpus')
+    parser.add_argument('--output', type=Path, help='Tüm sonuçların yazılacağı JSON dosyası')
+    args = parser.parse_args()
+
+    if 'e2e' in args.mode and importlib.util.find_spec('httpx') is None:
+        print("e2e modu atlandı: httpx kurulu değil (pip install httpx)", file=sys.stderr)
+        args.mode = [mode for mode in args.mode if mode != 'e2e']
+        if not args.mode:
+            sys.exit(1)
+
+    workdir = Path(tempfile.mkdtemp(prefix='safewebp-bench-'))
+    isolate_state(workdir)
+    items = build_corpus(args.corpus_dir, args.kinds, args.sizes, args.seed)
+
+    results = []
+    runners = {'stage': run_stage, 'e2e': lambda items, args, _: run_e2e(items, args)}
+    stdout = sys.stdout
+    # Uygulamanın hata ayıklama çıktıları stderr'e gider, stdout yalnızca JSON satırlarıdır
+    with contextlib.redirect_stdout(sys.stderr):
+        for mode in args.mode:
+            for row in runners[mode](items, args, workdir):
+                results.append(row)
+                stdout.write(json.dumps(row) + '\n')
+                stdout.flush()
+
+    if args.output:
+        document = {
+            'meta': {
+                'created_at': time.time(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'args': {key: str(value) for key, value in vars(args).items()},
+            },
+            'results': results,
+        }
+        args.output.write_text(json.dumps(document, indent=2))
+
+if __name__ == '__main__':
+    main()
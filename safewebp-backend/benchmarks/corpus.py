@@ -0,0 +1,123 @@
+"""Benchmark'lar için deterministik sentetik görüntü kümesi
+
+Her görüntü türü sabit tohumla üretilir; aynı sürüm Pillow/libheif ile
+aynı baytlar çıkar. Üretilen dosyalar klasörde saklanır ve yeniden
+kullanılır. Türler: fotoğraf (JPEG), ekran görüntüsü (PNG), çizim (PNG),
+alfa kanallı görüntü (RGBA PNG), paletli GIF ve HEIC.
+"""
+import hashlib
+import math
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+import pillow_heif
+
+KINDS = ('photo', 'screenshot', 'lineart', 'rgba', 'gif', 'heic')
+
+def image_size(megapixels: float) -> Tuple[int, int]:
+    """4:3 oranında verilen megapiksele en yakın boyut"""
+    width = int(math.sqrt(megapixels * 1_000_000 * 4 / 3))
+    height = int(megapixels * 1_000_000 / width)
+    return width, height
+
+def _smooth_noise(rng, size, octaves=(8, 32, 128)) -> Image.Image:
+    """Kaba ölçekli gürültü katmanlarını büyüterek fotoğrafa benzer bir L kanalı üret"""
+    width, height = size
+    result = None
+    for index, cells in enumerate(octaves):
+        grid = (max(2, cells * width // max(width, height)), max(2, cells * height // max(width, height)))
+        layer = Image.fromarray(rng.integers(0, 256, (grid[1], grid[0]), dtype=np.uint8), 'L')
+        layer = layer.resize(size, Image.Resampling.BICUBIC)
+        # İnce katmanlar daha az ağırlık alır (1/f benzeri spektrum)
+        result = layer if result is None else Image.blend(result, layer, 0.5 / (index + 1))
+    # Sensör gürültüsü (Image.effect_noise tohumlanamadığı için numpy ile)
+    grain = Image.fromarray(rng.integers(0, 256, (height, width), dtype=np.uint8), 'L')
+    return Image.blend(result, grain, 0.08)
+
+def make_photo(size, seed) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    return Image.merge('RGB', [_smooth_noise(rng, size) for _ in range(3)])
+
+def make_screenshot(size, seed) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    width, height = size
+    image = Image.new('RGB', size, (242, 242, 245))
+    draw = ImageDraw.Draw(image)
+    scale = max(1, width // 1280)
+    # Pencereler ve düğmeler
+    for _ in range(12):
+        x0, y0 = int(rng.integers(0, width * 0.8)), int(rng.integers(0, height * 0.8))
+        x1 = min(width, x0 + int(rng.integers(width // 10, width // 2)))
+        y1 = min(height, y0 + int(rng.integers(height // 10, height // 2)))
+        color = tuple(int(c) for c in rng.integers(180, 256, 3))
+        draw.rectangle((x0, y0, x1, y1), fill=color, outline=(120, 120, 130), width=scale)
+        # Metin satırlarını andıran kısa koyu çizgiler
+        for line_y in range(y0 + 12 * scale, y1 - 8 * scale, 14 * scale):
+            x = x0 + 8 * scale
+            while x < x1 - 40 * scale:
+                word = int(rng.integers(10, 40)) * scale
+                draw.rectangle((x, line_y, x + word, line_y + 6 * scale), fill=(40, 40, 48))
+                x += word + 6 * scale
+    return image
+
+def make_lineart(size, seed) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    width, height = size
+    image = Image.new('RGB', size, (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    stroke = max(1, width // 800)
+    for _ in range(300):
+        points = [(int(rng.integers(0, width)), int(rng.integers(0, height))) for _ in range(2)]
+        draw.line(points, fill=(0, 0, 0), width=stroke)
+    for _ in range(60):
+        x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+        radius = int(rng.integers(10, max(11, width // 10)))
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius), outline=(0, 0, 0), width=stroke)
+    return image
+
+def make_rgba(size, seed) -> Image.Image:
+    image = make_photo(size, seed).convert('RGBA')
+    # Ortada opak, kenarlara doğru saydamlaşan radyal maske
+    mask = Image.radial_gradient('L').resize(size, Image.Resampling.BILINEAR)
+    image.putalpha(mask.point(lambda value: 255 - value))
+    return image
+
+def make_gif(size, seed) -> Image.Image:
+    return make_screenshot(size, seed).quantize(64, dither=Image.Dither.NONE)
+
+GENERATORS = {
+    'photo': (make_photo, '.jpg', {'format': 'JPEG', 'quality': 90}),
+    'screenshot': (make_screenshot, '.png', {'format': 'PNG'}),
+    'lineart': (make_lineart, '.png', {'format': 'PNG'}),
+    'rgba': (make_rgba, '.png', {'format': 'PNG'}),
+    'gif': (make_gif, '.gif', {'format': 'GIF'}),
+    'heic': (make_photo, '.heic', {'format': 'HEIF', 'quality': 80}),
+}
+
+def build_corpus(corpus_dir: Path, kinds: List[str], sizes: List[float], seed: int = 0) -> List[Dict]:
+    """Eksik dosyaları üret, [{kind, megapixels, path, width, height, bytes, sha256}, ...] döndür"""
+    pillow_heif.register_heif_opener()
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    items = []
+    for megapixels in sizes:
+        size = image_size(megapixels)
+        for kind in kinds:
+            generator, suffix, save_kwargs = GENERATORS[kind]
+            path = corpus_dir / f"{kind}_{megapixels:g}mp_s{seed}{suffix}"
+            if not path.exists():
+                tmp_path = path.with_name(f".{path.name}.tmp")
+                generator(size, seed).save(tmp_path, **save_kwargs)
+                tmp_path.replace(path)
+            data = path.read_bytes()
+            items.append({
+                'kind': kind,
+                'megapixels': megapixels,
+                'path': path,
+                'width': size[0],
+                'height': size[1],
+                'bytes': len(data),
+                'sha256': hashlib.sha256(data).hexdigest(),
+            })
+    return items
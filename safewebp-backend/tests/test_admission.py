@@ -0,0 +1,114 @@
+import asyncio
+import io
+
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+
+from app.core.admission import (
+    ANALYSIS_BYTES_PER_PIXEL,
+    ANIMATION_BYTES_PER_PIXEL,
+    DECODED_BYTES_PER_PIXEL,
+    HEIF_BUFFER_BYTES_PER_PIXEL,
+    WORKING_BYTES_PER_PIXEL,
+    MemoryBudget,
+)
+from app.schemas.image import ConversionSettings
+from app.utils.file_handler import SpooledUpload
+
+def test_estimate_small_png():
+    budget = MemoryBudget(budget_bytes=1 << 40)
+    pixels = 1000 * 800
+    estimate = budget.estimate((1000, 800), "PNG", ConversionSettings(smart_optimize=False))
+    assert estimate == pixels * (
+        DECODED_BYTES_PER_PIXEL + WORKING_BYTES_PER_PIXEL + ANALYSIS_BYTES_PER_PIXEL
+    )
+
+def test_estimate_jpeg_decodes_at_draft_scale():
+    budget = MemoryBudget(budget_bytes=1 << 40)
+    conversion_settings = ConversionSettings(smart_optimize=False, quality=80)
+    # 12000x8000 -> 5000x3333 çalışma boyutu; JPEG en fazla 4 kat piksel çözülür
+    jpeg = budget.estimate((12000, 8000), "JPEG", conversion_settings)
+    png = budget.estimate((12000, 8000), "PNG", conversion_settings)
+    assert jpeg < png
+
+def test_estimate_charges_heic_at_full_decoded_size():
+    budget = MemoryBudget(budget_bytes=1 << 40)
+    conversion_settings = ConversionSettings(smart_optimize=False, quality=80)
+    source_pixels = 12000 * 8000
+    heic = budget.estimate((12000, 8000), "HEIF", conversion_settings)
+    png = budget.estimate((12000, 8000), "PNG", conversion_settings)
+    # Çalışma boyutuna küçültülse de tam çözüm ve libheif tamponu sayılır
+    assert heic - png == source_pixels * HEIF_BUFFER_BYTES_PER_PIXEL
+    assert heic > source_pixels * (DECODED_BYTES_PER_PIXEL + HEIF_BUFFER_BYTES_PER_PIXEL)
+
+def test_estimate_grows_for_animation_and_search():
+    budget = MemoryBudget(budget_bytes=1 << 40)
+    plain = ConversionSettings(smart_optimize=False)
+    still = budget.estimate((1000, 800), "GIF", plain)
+    animated = budget.estimate((1000, 800), "GIF", plain, animated=True)
+    assert animated - still == 1000 * 800 * ANIMATION_BYTES_PER_PIXEL
+    searched = budget.estimate(
+        (1000, 800), "PNG", ConversionSettings(smart_optimize=False, target_size=10_000)
+    )
+    assert searched > budget.estimate((1000, 800), "PNG", plain)
+
+def _gif_upload(frame_count: int) -> SpooledUpload:
+    frames = [Image.new("RGB", (320, 240), (index % 256, 0, 0)) for index in range(frame_count)]
+    buffer = io.BytesIO()
+    frames[0].save(buffer, "GIF", save_all=True, append_images=frames[1:], duration=40)
+    data = buffer.getvalue()
+    return SpooledUpload("anim.gif", len(data), data=data)
+
+def test_animation_estimate_does_not_depend_on_frame_count():
+    budget = MemoryBudget(budget_bytes=1 << 40)
+    plain = ConversionSettings(smart_optimize=False)
+    short = budget.inspect(_gif_upload(3), plain)
+    long = budget.inspect(_gif_upload(200), plain)
+    assert short == long
+
+def test_acquire_is_fifo():
+    async def scenario():
+        budget = MemoryBudget(budget_bytes=100)
+        await budget.acquire(80)
+        order = []
+
+        async def waiter(name, nbytes):
+            await budget.acquire(nbytes)
+            order.append(name)
+
+        # Büyük istek önce sıraya girer; arkasındaki küçük istek sığsa da öne geçmez
+        large = asyncio.create_task(waiter("large", 90))
+        await asyncio.sleep(0)
+        small = asyncio.create_task(waiter("small", 20))
+        await asyncio.sleep(0)
+        assert order == []
+        assert budget.stats()["waiting"] == 2
+
+        budget.release(80)
+        await large
+        assert order == ["large"]
+        assert not small.done()
+        budget.release(90)
+        await small
+        assert order == ["large", "small"]
+        assert budget.in_use == 20
+
+    asyncio.run(scenario())
+
+def test_acquire_times_out_with_503():
+    async def scenario():
+        budget = MemoryBudget(budget_bytes=100)
+        await budget.acquire(100)
+        with pytest.raises(HTTPException) as error:
+            await budget.acquire(10, timeout=0.01)
+        assert error.value.status_code == 503
+        assert error.value.headers["Retry-After"] == "5"
+        assert budget.timeouts == 1
+        assert budget.stats()["waiting"] == 0
+        # Süresi dolan bekleyen, sonraki isteklerin önünü tıkamaz
+        budget.release(100)
+        await budget.acquire(10, timeout=0.01)
+        assert budget.in_use == 10
+
+    asyncio.run(scenario())
@@ -0,0 +1,59 @@
+import io
+
+from PIL import Image, ImageDraw
+
+from app.core.animation_encoder import AnimationEncoder
+from app.core.image_processor import ImageProcessor
+
+def _gif(colors, durations, size=(200, 150)) -> Image.Image:
+    """Her karesi farklı konumda kutu çizilmiş animasyonlu GIF"""
+    frames = []
+    for index, color in enumerate(colors):
+        frame = Image.new("RGB", size, "white")
+        ImageDraw.Draw(frame).rectangle((10, 10, 60 + index * 10, 60), fill=color)
+        frames.append(frame)
+    buffer = io.BytesIO()
+    frames[0].save(
+        buffer, "GIF", save_all=True, append_images=frames[1:], duration=durations, loop=0
+    )
+    buffer.seek(0)
+    return Image.open(buffer)
+
+def _durations(image: Image.Image) -> list:
+    durations = []
+    for index in range(image.n_frames):
+        image.seek(index)
+        # WebP karelerinin süresi kare çözüldükten sonra okunabilir
+        image.load()
+        durations.append(image.info["duration"])
+    return durations
+
+def test_encodes_every_frame_with_its_duration():
+    source = _gif(["red", "green", "blue"], [100, 200, 300])
+    encoder = AnimationEncoder(ImageProcessor(), (100, 75), {"quality": 80, "method": 4})
+    encoded = encoder.encode(source)
+
+    output = Image.open(io.BytesIO(encoded["data"]))
+    assert output.format == "WEBP"
+    assert output.size == (100, 75)
+    assert output.n_frames == 3
+    assert _durations(output) == [100, 200, 300]
+    assert encoded["source_frames"] == encoded["encoded_frames"] == 3
+
+def test_long_animation_reuses_a_single_canvas():
+    count = 150
+    colors = [(index, 255 - index, (index * 7) % 256) for index in range(count)]
+    source = _gif(colors, [20] * count)
+    encoder = AnimationEncoder(ImageProcessor(), (100, 75), {"quality": 50, "method": 0})
+
+    # Kareler kodlayıcıya tek tek verilir; her seferinde aynı tuval güncellenir
+    boxes, durations = encoder._plan(source, "RGB")
+    canvases = {id(canvas) for canvas in encoder._canvases(source, "RGB", boxes)}
+    assert len(canvases) == 1
+    assert len(durations) == count
+
+    encoded = encoder.encode(source)
+    output = Image.open(io.BytesIO(encoded["data"]))
+    assert encoded["encoded_frames"] == count
+    # libwebp kayıplı modda neredeyse aynı kareleri birleştirebilir; süre korunur
+    assert sum(_durations(output)) == 20 * count
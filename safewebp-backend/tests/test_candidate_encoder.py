@@ -0,0 +1,62 @@
+import io
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from app.core.candidate_encoder import CandidateEncoder
+
+def _screenshot() -> Image.Image:
+    """Kayıpsız kodlamanın kazandığı metin ekran görüntüsü"""
+    image = Image.new("RGB", (1200, 800), "white")
+    draw = ImageDraw.Draw(image)
+    for row in range(40):
+        draw.text((20, 10 + row * 19), f"satir {row} " * 12, fill="black")
+    return image
+
+def _chunk(data: bytes) -> bytes:
+    return data[12:16]
+
+def test_candidates_keep_their_own_params():
+    image = _screenshot()
+    for _ in range(5):
+        encoder = CandidateEncoder(image, {"quality": 90, "method": 4})
+        lossy = {}
+
+        def encode_lossy() -> bytes:
+            buffer = io.BytesIO()
+            image.save(buffer, "webp", **encoder.lossy_params)
+            lossy["data"] = buffer.getvalue()
+            return lossy["data"]
+
+        chosen = encoder.run(encode_lossy)
+        assert _chunk(lossy["data"]) == b"VP8 "
+        assert chosen["candidate"] == "lossless"
+        assert _chunk(chosen["data"]) == b"VP8L"
+        assert chosen["sizes"]["lossy"] > chosen["sizes"]["lossless"]
+
+def test_candidate_meeting_target_beats_smaller_one():
+    # Kayıpsız kodlamanın çok büyük kaldığı gürültülü görüntü
+    pixels = np.random.default_rng(0).integers(0, 256, size=(1200, 600, 3), dtype=np.uint8)
+    image = Image.fromarray(pixels, "RGB")
+    encoder = CandidateEncoder(image, {"quality": 90, "method": 4})
+
+    def encode_lossy() -> bytes:
+        buffer = io.BytesIO()
+        image.save(buffer, "webp", quality=5, method=0)
+        return buffer.getvalue()
+
+    # Küçük ama hedefi tutmayan kayıplı aday, büyük kayıpsız adaya yenilir
+    chosen = encoder.run(encode_lossy, meets_target=lambda name, data: name == "lossless")
+    assert chosen["candidate"] == "lossless"
+    assert chosen["target_met"] is True
+    assert chosen["sizes"]["lossy"] < chosen["sizes"]["lossless"]
+
+    # İkisi de tutmuyorsa boyut belirler
+    chosen = encoder.run(encode_lossy, meets_target=lambda name, data: False)
+    assert chosen["candidate"] == "lossy"
+    assert chosen["target_met"] is False
+
+    # Kayıplı aday hedefi tutuyorsa büyük kayıpsız adaydan vazgeçilir
+    chosen = encoder.run(encode_lossy, meets_target=lambda name, data: True)
+    assert chosen["candidate"] == "lossy"
+    assert chosen["aborted"]
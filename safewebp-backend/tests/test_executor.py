@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.executor import ConversionExecutor, _warmup
+
+def test_killed_worker_fails_only_its_job_and_pool_recovers():
+    async def scenario():
+        executor = ConversionExecutor(max_workers=1)
+        try:
+            await executor.warmup()
+            broken = executor._pool
+            for process in list(broken._processes.values()):
+                process.kill()
+                process.join()
+
+            with pytest.raises(HTTPException) as error:
+                await executor.run("convert")
+            assert error.value.status_code == 503
+            assert error.value.headers["Retry-After"] == "5"
+
+            # Yeni havuz kuruldu ve sonraki işler çalışıyor
+            assert executor._pool is not None and executor._pool is not broken
+            loop = asyncio.get_running_loop()
+            assert await loop.run_in_executor(executor.start(), _warmup)
+        finally:
+            executor.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,155 @@
+import asyncio
+import uuid
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException, Request
+
+from app.utils.conversion_cache import ConversionCache
+from app.utils.file_delivery import (
+    CONTENT_NAME_PATTERN,
+    deliver_file,
+    parse_range,
+    publish_content_addressed,
+)
+from app.utils.upload_sweeper import UploadSweeper
+
+def _convert(upload_dir, cache, name, data=b"RIFF webp output"):
+    """Dönüşüm yolunu taklit et: önbellekten al ya da yaz ve önbelleğe ekle, sonra yayımla"""
+    pending = upload_dir / f".{name}.webp"
+    if cache.fetch("key", pending) is None:
+        pending.write_bytes(data)
+        cache.store("key", pending)
+    return publish_content_addressed(pending, "image_optimized")
+
+def test_repeat_publish_leaves_no_temporary_files(tmp_path):
+    upload_dir = tmp_path / "uploads"
+    upload_dir.mkdir()
+    cache = ConversionCache(tmp_path / "cache", max_bytes=1024 * 1024)
+
+    first = _convert(upload_dir, cache, "first")
+    second = _convert(upload_dir, cache, "second")
+
+    assert first == second
+    assert cache.hits == 1
+    assert sorted(path.name for path in upload_dir.iterdir()) == [first.name]
+    assert first.read_bytes() == b"RIFF webp output"
+
+def test_cache_hit_returns_stored_metadata_and_eviction_drops_it(tmp_path):
+    cache = ConversionCache(tmp_path / "cache", max_bytes=40)
+    output = tmp_path / "out.webp"
+    output.write_bytes(b"x" * 30)
+    metadata = {"quality": 72, "target_met": True, "candidate": "lossless", "passthrough": None}
+    cache.store("first", output, metadata)
+
+    assert cache.fetch("first", tmp_path / "hit.webp") == metadata
+    assert (tmp_path / "hit.webp").read_bytes() == b"x" * 30
+
+    # Kota aşılınca eski kayıt meta verisiyle birlikte silinir
+    newer = tmp_path / "newer.webp"
+    newer.write_bytes(b"y" * 30)
+    cache.store("second", newer, {"quality": 50})
+    assert cache.fetch("first", tmp_path / "miss.webp") is None
+    assert sorted(path.name for path in (tmp_path / "cache").iterdir()) == [
+        "second.json", "second.webp"
+    ]
+
+def test_published_name_is_never_temporary(tmp_path):
+    for stem in ("upload-photo_optimized", ".hidden_optimized", "..upload-x"):
+        pending = tmp_path / f".{uuid.uuid4().hex}.webp"
+        pending.write_bytes(stem.encode())
+        published = publish_content_addressed(pending, stem)
+        assert not UploadSweeper._is_temporary(published.name)
+        assert published.parent == tmp_path
+
+def _request(path: Path, method: str = "GET", **headers) -> tuple:
+    """deliver_file yanıtını ASGI üzerinden çalıştır: (durum, başlıklar, gövde)"""
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": "/",
+        "headers": [(key.replace("_", "-").encode(), value.encode()) for key, value in headers.items()],
+    }
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    async def run():
+        try:
+            response = deliver_file(Request(scope), path)
+        except HTTPException as error:
+            return error.status_code, error.headers or {}, b""
+        await response(scope, None, send)
+        start = messages[0]
+        body = b"".join(message.get("body", b"") for message in messages[1:])
+        return start["status"], {key.decode(): value.decode() for key, value in start["headers"]}, body
+
+    return asyncio.run(run())
+
+def _published(tmp_path, data: bytes) -> Path:
+    pending = tmp_path / ".pending.webp"
+    pending.write_bytes(data)
+    return publish_content_addressed(pending, "image_optimized")
+
+def test_parse_range():
+    assert parse_range("bytes=0-9", 100) == (0, 10)
+    assert parse_range("bytes=90-", 100) == (90, 100)
+    assert parse_range("bytes=-10", 100) == (90, 100)
+    assert parse_range("bytes=95-200", 100) == (95, 100)
+    # Anlaşılmayan veya çok aralıklı başlık yok sayılır
+    assert parse_range("items=0-9", 100) is None
+    assert parse_range("bytes=0-9,20-29", 100) is None
+    assert parse_range("bytes=9-0", 100) is None
+    with pytest.raises(HTTPException) as error:
+        parse_range("bytes=100-", 100)
+    assert error.value.status_code == 416
+    assert error.value.headers["Content-Range"] == "bytes */100"
+
+def test_content_addressed_output_is_immutable_and_revalidates(tmp_path):
+    data = bytes(range(256)) * 4
+    path = _published(tmp_path, data)
+    digest = CONTENT_NAME_PATTERN.search(path.name).group(1)
+
+    status, headers, body = _request(path)
+    assert status == 200
+    assert body == data
+    assert headers["etag"] == f'"{digest}"'
+    assert "immutable" in headers["cache-control"]
+    assert headers["content-type"] == "image/webp"
+
+    status, headers, body = _request(path, if_none_match=f'W/"other", "{digest}"')
+    assert status == 304
+    assert body == b""
+
+    status, headers, body = _request(path, "HEAD")
+    assert status == 200
+    assert headers["content-length"] == str(len(data))
+    assert body == b""
+
+def test_range_requests(tmp_path):
+    data = bytes(range(256)) * 4
+    path = _published(tmp_path, data)
+    etag = _request(path, "HEAD")[1]["etag"]
+
+    status, headers, body = _request(path, range="bytes=10-19")
+    assert status == 206
+    assert body == data[10:20]
+    assert headers["content-range"] == f"bytes 10-19/{len(data)}"
+    assert headers["content-length"] == "10"
+
+    # If-Range tutmuyorsa tam yanıt döner
+    status, _, body = _request(path, range="bytes=10-19", if_range='"stale"')
+    assert status == 200
+    assert body == data
+    status, _, body = _request(path, range="bytes=-4", if_range=etag)
+    assert status == 206
+    assert body == data[-4:]
+
+    status, headers, _ = _request(path, range=f"bytes={len(data)}-")
+    assert status == 416
+    assert headers["Content-Range"] == f"bytes */{len(data)}"
+
+def test_missing_file_is_404(tmp_path):
+    assert _request(tmp_path / "missing.webp")[0] == 404
+    assert _request(tmp_path)[0] == 404
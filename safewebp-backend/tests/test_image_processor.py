@@ -0,0 +1,31 @@
+import numpy as np
+from PIL import Image
+
+from app.core.image_processor import ImageProcessor
+
+def _palette_image() -> Image.Image:
+    pixels = np.zeros((300, 600), dtype=np.uint8)
+    pixels[:, 300:] = 1
+    pixels[100:200, 100:500] = 2
+    image = Image.fromarray(pixels, 'P')
+    image.putpalette([255, 0, 0, 0, 0, 255, 0, 255, 0])
+    image.info['transparency'] = 2
+    return image
+
+def test_strip_resize_matches_full_resize_for_palette_images():
+    image = _palette_image()
+    size = (500, 250)
+    full = image.resize(size, Image.Resampling.LANCZOS)
+    strips = ImageProcessor()._resize_in_strips(image, size, strip_rows=32)
+
+    assert strips.mode == full.mode
+    assert strips.info.get('transparency') == full.info.get('transparency')
+    assert np.array_equal(np.asarray(strips.convert('RGBA')), np.asarray(full.convert('RGBA')))
+
+def test_strip_resize_matches_full_resize_for_rgb_images():
+    image = _palette_image().convert('RGB')
+    size = (500, 250)
+    full = image.resize(size, Image.Resampling.LANCZOS)
+    strips = ImageProcessor()._resize_in_strips(image, size, strip_rows=32)
+
+    assert np.array_equal(np.asarray(strips), np.asarray(full))
@@ -0,0 +1,65 @@
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.core.job_queue import JobQueue
+from app.core.job_store import JobStore
+
+def _run(store: JobStore, handler, job_id: str = "job") -> dict:
+    """Tek dosyalık işi kuyruktan geçir ve bittiğinde iş kaydını döndür"""
+    store.create_job(job_id, "{}", [
+        {"filename": "a.png", "input_path": "/nonexistent/a.png", "size": 10, "digest": "d"}
+    ])
+
+    async def scenario():
+        queue = JobQueue(store, workers=1, lease=60)
+        queue.start(handler)
+        try:
+            while store.get_job(job_id)["status"] in ("queued", "running"):
+                await asyncio.sleep(0.01)
+        finally:
+            await queue.stop()
+        return store.get_job(job_id)
+
+    return asyncio.run(scenario())
+
+def test_transient_errors_are_retried_until_success(tmp_path):
+    calls = []
+
+    async def handler(item):
+        calls.append(item["attempts"])
+        if len(calls) == 1:
+            raise HTTPException(status_code=503, detail="dolu", headers={"Retry-After": "0"})
+        if len(calls) == 2:
+            raise BrokenProcessPool("çöktü")
+        return {"ok": True}
+
+    job = _run(JobStore(tmp_path / "jobs.sqlite3"), handler)
+    assert calls == [1, 2, 3]
+    assert job["status"] == "completed"
+    assert job["files"][0]["result"] == {"ok": True}
+
+def test_transient_error_fails_after_max_attempts(tmp_path):
+    calls = []
+
+    async def handler(item):
+        calls.append(item["attempts"])
+        raise HTTPException(status_code=503, detail="dolu", headers={"Retry-After": "0"})
+
+    job = _run(JobStore(tmp_path / "jobs.sqlite3"), handler)
+    assert calls == list(range(1, settings.JOB_MAX_ATTEMPTS + 1))
+    assert job["status"] == "failed"
+    assert job["files"][0]["error"] == "dolu"
+
+def test_other_errors_fail_without_retry(tmp_path):
+    calls = []
+
+    async def handler(item):
+        calls.append(item["attempts"])
+        raise ValueError("bozuk görüntü")
+
+    job = _run(JobStore(tmp_path / "jobs.sqlite3"), handler)
+    assert calls == [1]
+    assert job["files"][0]["error"] == "bozuk görüntü"
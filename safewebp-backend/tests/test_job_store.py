@@ -0,0 +1,69 @@
+from app.core.job_store import JobStore
+
+def _files(count: int) -> list:
+    return [
+        {"filename": f"{index}.png", "input_path": f"/in/{index}.png", "size": 10, "digest": "d"}
+        for index in range(count)
+    ]
+
+def test_create_rejects_duplicate_job_id(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    assert store.create_job("job", "{}", _files(1))
+    assert not store.create_job("job", "{}", _files(2))
+    assert store.get_job("job")["total_files"] == 1
+
+def test_claims_in_submission_order_and_closes_job(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    store.create_job("first", "{}", _files(2))
+    store.create_job("second", "{}", _files(1))
+
+    claimed = [store.claim_next(60) for _ in range(3)]
+    assert [(item["job_id"], item["index"]) for item in claimed] == [
+        ("first", 0), ("first", 1), ("second", 0)
+    ]
+    assert store.claim_next(60) is None
+    assert store.get_job("first")["status"] == "running"
+
+    progress = store.finish_file("first", 0, claimed[0]["claim"], result={"ok": True})
+    assert progress["status"] == "running"
+    assert progress["pending_files"] == 1
+    progress = store.finish_file("first", 1, claimed[1]["claim"], error="bozuk")
+    assert progress["status"] == "completed"
+    assert (progress["completed_files"], progress["failed_files"]) == (1, 1)
+
+    job = store.get_job("first")
+    assert [item["status"] for item in job["files"]] == ["completed", "failed"]
+    assert job["files"][0]["result"] == {"ok": True}
+    assert job["files"][1]["error"] == "bozuk"
+
+    # Hiçbir dosyası dönüştürülemeyen iş başarısız sayılır
+    assert store.finish_file("second", 0, claimed[2]["claim"], error="bozuk")["status"] == "failed"
+
+def test_expired_lease_is_reclaimed_and_stale_claim_is_fenced(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    store.create_job("job", "{}", _files(1))
+
+    # Kilidi hemen dolan (çöken) işçi
+    stale = store.claim_next(-1)
+    fresh = store.claim_next(60)
+    assert fresh["index"] == stale["index"]
+    assert fresh["attempts"] == 2
+    assert fresh["claim"] != stale["claim"]
+
+    # Eski işçinin yenileme ve sonuç yazmaları yok sayılır
+    assert not store.renew_lease("job", 0, stale["claim"], 60)
+    assert store.finish_file("job", 0, stale["claim"], result={"stale": True}) is None
+    assert store.renew_lease("job", 0, fresh["claim"], 60)
+    assert store.finish_file("job", 0, fresh["claim"], result={"fresh": True}) is not None
+    assert store.get_job("job")["files"][0]["result"] == {"fresh": True}
+
+def test_requeue_does_not_count_an_attempt(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    store.create_job("job", "{}", _files(1))
+
+    item = store.claim_next(60)
+    assert store.claim_next(60) is None
+    store.requeue_file("job", 0, item["claim"])
+    again = store.claim_next(60)
+    assert again["attempts"] == 1
+    assert store.stats() == {"jobs": {"running": 1}, "pending_files": 1}
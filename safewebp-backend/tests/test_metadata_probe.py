@@ -0,0 +1,30 @@
+import io
+
+import numpy as np
+from PIL import Image, PngImagePlugin
+
+from app.utils.metadata_probe import has_metadata
+
+def _encode(image_format: str, **params) -> io.BytesIO:
+    buffer = io.BytesIO()
+    pixels = np.random.default_rng(1).integers(0, 255, (8, 8, 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(buffer, image_format, **params)
+    buffer.seek(0)
+    return buffer
+
+def _exif() -> bytes:
+    exif = Image.Exif()
+    exif[0x0110] = "SecretCam"
+    return exif.tobytes()
+
+def test_plain_files_have_no_metadata():
+    for image_format in ("JPEG", "PNG", "GIF", "WEBP"):
+        assert not has_metadata(_encode(image_format), image_format)
+
+def test_metadata_is_detected():
+    text = PngImagePlugin.PngInfo()
+    text.add_text("Comment", "secret")
+    assert has_metadata(_encode("JPEG", exif=_exif()), "JPEG")
+    assert has_metadata(_encode("PNG", pnginfo=text), "PNG")
+    assert has_metadata(_encode("GIF", comment=b"secret"), "GIF")
+    assert has_metadata(_encode("WEBP", exif=_exif()), "WEBP")
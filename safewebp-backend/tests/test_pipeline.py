@@ -0,0 +1,36 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from app.config import settings
+from app.core.pipeline import ConversionPipeline
+from app.schemas.image import ConversionSettings
+from app.utils.file_handler import SpooledUpload
+
+def _tiny_png() -> bytes:
+    """PASSTHROUGH_MAX_BYTES altında kalan, WebP'ye çevrilince küçülen PNG"""
+    pixels = np.random.default_rng(0).integers(0, 256, (16, 16, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels, "RGB").save(buffer, "PNG")
+    return buffer.getvalue()
+
+def _convert(tmp_path, data: bytes, **options) -> dict:
+    upload = SpooledUpload("icon.png", len(data), data=data)
+    # 60 üstü kalitede küçük görüntüler büyütülür; karşılaştırma özgün boyutta yapılsın
+    conversion_settings = ConversionSettings(smart_optimize=False, quality=50, **options)
+    return ConversionPipeline().convert(upload, tmp_path / "icon.webp", conversion_settings)
+
+def test_tiny_file_is_passed_through_only_within_target(tmp_path):
+    data = _tiny_png()
+    assert len(data) <= settings.PASSTHROUGH_MAX_BYTES
+
+    assert _convert(tmp_path, data)["passthrough"] == "tiny"
+    assert _convert(tmp_path, data, target_size=len(data))["passthrough"] == "tiny"
+
+    # Bütçeyi aşan küçük dosya da dönüştürülür
+    result = _convert(tmp_path, data, target_size=len(data) - 1)
+    assert result["passthrough"] is None
+    assert result["filename"] == "icon.webp"
+    assert result["target_met"]
+    assert result["converted_size"] < len(data)
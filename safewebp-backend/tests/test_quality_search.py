@@ -0,0 +1,70 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from app.config import settings
+from app.core.quality_search import MIN_QUALITY, QualitySearch
+
+def _photo(width: int, height: int) -> Image.Image:
+    """Gradyan ve gürültüden oluşan, kaliteye duyarlı fotoğraf benzeri görüntü"""
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = np.stack([x + 0 * y, y + 0 * x, (x + y) / 2], axis=-1)
+    noisy = base + rng.normal(0, 24, size=base.shape)
+    return Image.fromarray(np.clip(noisy, 0, 255).astype(np.uint8), "RGB")
+
+def _size_at(image: Image.Image, quality: int) -> int:
+    buffer = io.BytesIO()
+    image.save(buffer, "webp", quality=quality, method=4)
+    return buffer.tell()
+
+def test_for_size_returns_highest_quality_within_budget():
+    image = _photo(400, 300)
+    target = (_size_at(image, 40) + _size_at(image, 60)) // 2
+
+    quality, data, met = QualitySearch(image, {"method": 4}).for_size(target)
+
+    assert met
+    assert len(data) <= target
+    assert len(data) == _size_at(image, quality)
+    # Bir üst kalite bütçeyi aşar
+    assert _size_at(image, quality + 1) > target
+
+def test_for_size_with_proxy_stays_within_encode_limit():
+    image = _photo(1600, 1200)
+    target = _size_at(image, 50)
+
+    search = QualitySearch(image, {"method": 4})
+    quality, data, met = search.for_size(target)
+
+    assert search.proxy is not None
+    assert max(search.proxy.size) == settings.QUALITY_SEARCH_PROXY_EDGE
+    assert met and len(data) <= target
+    assert len(search._full) <= settings.QUALITY_SEARCH_MAX_ENCODES
+
+def test_for_size_unreachable_budget_returns_smallest_output():
+    image = _photo(400, 300)
+    quality, data, met = QualitySearch(image, {"method": 4}).for_size(10)
+
+    assert not met
+    assert quality == MIN_QUALITY
+    assert len(data) == _size_at(image, MIN_QUALITY)
+
+def test_for_ssim_returns_lowest_quality_meeting_floor():
+    image = _photo(400, 300)
+    target = 0.9
+
+    quality, data, met = QualitySearch(image, {"method": 4}).for_ssim(target)
+
+    assert met
+    assert QualitySearch.measure(image, Image.open(io.BytesIO(data))) >= target
+    # Bir alt kalite SSIM tabanının altında kalır
+    buffer = io.BytesIO()
+    image.save(buffer, "webp", quality=quality - 1, method=4)
+    assert QualitySearch.measure(image, Image.open(buffer)) < target
+
+def test_ssim_of_identical_images_is_one():
+    image = _photo(64, 64)
+    assert abs(QualitySearch.measure(image, image) - 1.0) < 1e-6
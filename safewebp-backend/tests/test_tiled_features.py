@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.core.ml_optimizer import MLOptimizer
+
+def _image(width: int = 300, height: int = 200) -> Image.Image:
+    rng = np.random.default_rng(1)
+    pixels = np.zeros((height, width, 3), dtype=np.uint8)
+    pixels[:, :, 0] = np.linspace(0, 255, width, dtype=np.uint8)
+    pixels[40:160, 60:240] = (30, 200, 90)
+    pixels[::7, :, 2] = 255
+    pixels += rng.integers(0, 8, size=pixels.shape, dtype=np.uint8)
+    return Image.fromarray(pixels, "RGB")
+
+def test_strip_features_match_whole_image(tmp_path):
+    optimizer = MLOptimizer(str(tmp_path / "model.joblib"), feature_max_edge=0)
+    image = _image()
+
+    whole = optimizer.extract_features(np.asarray(image))
+    # Şerit sınırları kenar ve Laplacian komşuluklarını bölmez
+    strips = optimizer._accumulate_features(image, None, strip_rows=17)
+
+    assert strips["size"] == whole["size"]
+    assert strips["aspect_ratio"] == whole["aspect_ratio"]
+    for name in ("color_complexity", "saturation", "texture_complexity"):
+        assert strips[name] == pytest.approx(whole[name], rel=1e-6)
+    assert strips["edge_density"] == pytest.approx(whole["edge_density"], abs=1e-3)
+
+def test_strip_proxy_matches_whole_image_proxy(tmp_path, monkeypatch):
+    optimizer = MLOptimizer(str(tmp_path / "model.joblib"), feature_max_edge=64)
+    image = _image()
+
+    whole = optimizer.extract_features(np.asarray(image))
+    # Şerit yüksekliği küçültme katsayısının katı değilse de kutu ortalaması kaymaz
+    monkeypatch.setattr("app.core.ml_optimizer.settings.TILE_PIXELS", 300 * 23)
+    tiled = optimizer.extract_features_tiled(image)
+
+    assert tiled["size"] == whole["size"]
+    for name in ("color_complexity", "saturation"):
+        assert tiled[name] == pytest.approx(whole[name], rel=0.02)
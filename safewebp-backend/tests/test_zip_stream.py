@@ -0,0 +1,29 @@
+import io
+import zipfile
+
+from app.utils.zip_stream import iter_zip_stream
+
+def test_stream_is_a_valid_stored_archive(tmp_path):
+    first = tmp_path / "a.webp"
+    first.write_bytes(b"a" * 1000)
+    second = tmp_path / "b.webp"
+    second.write_bytes(bytes(range(256)) * 40)
+
+    chunks = list(iter_zip_stream([("a.webp", first), ("b.webp", second)], chunk_size=256))
+
+    # Dosya parça parça okunur, arşiv tek seferde üretilmez
+    assert len([chunk for chunk in chunks if chunk]) > 2
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    assert archive.namelist() == ["a.webp", "b.webp"]
+    assert all(info.compress_type == zipfile.ZIP_STORED for info in archive.infolist())
+    assert archive.read("a.webp") == first.read_bytes()
+    assert archive.read("b.webp") == second.read_bytes()
+
+def test_empty_file_and_empty_archive(tmp_path):
+    empty = tmp_path / "empty.webp"
+    empty.write_bytes(b"")
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(iter_zip_stream([("empty.webp", empty)]))))
+    assert archive.read("empty.webp") == b""
+    assert zipfile.ZipFile(io.BytesIO(b"".join(iter_zip_stream([])))).namelist() == []
@@ -16,8 +16,9 @@ class ApiService {
   }
 
   async convertImages(files, settings, onProgress) {
-    // WebSocket bağlantısını kur
-    this.setupWebSocket(onProgress);
+    // Bu batch'in ilerlemesini almak için iş kimliği oluştur ve abone ol
+    const jobId = crypto.randomUUID().replace(/-/g, '');
+    this.setupWebSocket(onProgress, jobId);
 
     const formData = new FormData();
     
@@ -34,6 +35,7 @@ class ApiService {
     };
     
     formData.append('conversion_settings', JSON.stringify(settingsData));
+    formData.append('job_id', jobId);
 
     try {
       console.log('Making request to:', `${this.baseUrl}/convert-batch`); // Debug için
@@ -69,14 +71,15 @@ class ApiService {
     }
   }
 
-  setupWebSocket(onProgress) {
+  setupWebSocket(onProgress, jobId) {
     if (this.ws) {
+      this.ws.onclose = null;
       this.ws.close();
     }
 
     // WebSocket URL'ini baseUrl'den türet
     const wsUrl = this.baseUrl.replace('http:', 'ws:').replace('https:', 'wss:');
-    const wsEndpoint = `${wsUrl.replace('/api/v1', '')}/ws`;
+    const wsEndpoint = `${wsUrl.replace('/api/v1', '')}/ws?job_id=${encodeURIComponent(jobId)}`;
     
     console.log('Connecting to WebSocket:', wsEndpoint); // Debug için
 
@@ -98,7 +101,7 @@ class ApiService {
     this.ws.onclose = () => {
       console.log('WebSocket connection closed');
       // Yeniden bağlanmayı dene
-      setTimeout(() => this.setupWebSocket(onProgress), 3000);
+      setTimeout(() => this.setupWebSocket(onProgress, jobId), 3000);
     };
 
     this.ws.onopen = () => {